@@ -0,0 +1,228 @@
+"""
+Optional asyncio fetch engine for GhostXML devices that use the requests library (Basic, Bearer, Digest, Token and no
+authentication).
+
+All requests run on a single event loop in one background thread, with a configurable limit on the number of requests
+in flight. Callers submit a request description (see `PluginDevice.build_request()`) from any thread and get back a
+`concurrent.futures.Future` that resolves to the response. Requires the httpx package; if it isn't installed the plugin
+falls back to making requests on its fetch worker threads.
+"""
+import asyncio
+import threading
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from response_limits import LimitedResponse, aload_response
+from token_cache import TokenCache
+
+
+class AsyncFetchEngine:
+    """Runs HTTP requests for all devices on a single asyncio event loop.
+
+    Responses are read within the device's size limit and returned as ``LimitedResponse``
+    objects, as they are by the fetch workers. Transport errors are re-raised as ``IOError`` so
+    they are handled the same way as ``requests`` exceptions.
+    """
+
+    def __init__(self, concurrency: int = 50, token_cache: TokenCache = None):
+        """Start the event loop thread and the shared HTTP client.
+
+        Args:
+            concurrency (int): The maximum number of requests in flight at once.
+            token_cache (TokenCache): The access-token cache shared with the fetch workers.
+
+        Raises:
+            ImportError: If the httpx package is not installed.
+        """
+        if httpx is None:
+            raise ImportError("The asyncio fetch engine requires the httpx package.")
+
+        self.concurrency = concurrency
+        self.token_cache = token_cache or TokenCache()
+        self.token_locks = {}  # token cache key: asyncio.Lock
+        self.client      = None
+        self.semaphore   = None
+        self.closed      = False
+        self._lock       = threading.Lock()
+        self.loop        = asyncio.new_event_loop()
+        self.thread      = threading.Thread(name="GhostXML-async", target=self._run_loop, daemon=True)
+        self.thread.start()
+
+        # The client and semaphore must be created on the loop that will use them.
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    # =============================================================================
+    def _run_loop(self) -> None:
+        """Run the event loop until ``close()`` stops it."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    # =============================================================================
+    async def _start(self) -> None:
+        """Create the shared HTTP client and the concurrency limiter."""
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.client    = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency),
+        )
+
+    # =============================================================================
+    def submit(self, request: dict = None):
+        """Schedule a request on the event loop.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            concurrent.futures.Future: A future that resolves to the ``LimitedResponse``.
+
+        Raises:
+            IOError: If the engine has been closed.
+        """
+        with self._lock:
+            if self.closed:
+                raise IOError("The asyncio fetch engine has been closed.")
+            return asyncio.run_coroutine_threadsafe(self._fetch(request), self.loop)
+
+    # =============================================================================
+    async def _fetch(self, request: dict = None):
+        """Make a request once a concurrency slot is free.
+
+        Args:
+            request (dict): The request description.
+
+        Returns:
+            LimitedResponse: The response to the data request.
+
+        Raises:
+            IOError: If the request fails, or is cancelled because the engine is closing.
+        """
+        try:
+            async with self.semaphore:
+                return await self._send(request)
+        except httpx.TransportError as err:
+            raise IOError(f"{type(err).__name__}: {err}") from err
+        except asyncio.CancelledError:
+            # Reported like any other failed request, so the device finishes its refresh and frees its host slot.
+            raise IOError("The request was cancelled because the asyncio fetch engine was closed.") from None
+
+    # =============================================================================
+    async def _send(self, request: dict = None) -> LimitedResponse:
+        """Make the request using the device's authentication method, reading the body within the device's size limit.
+
+        Args:
+            request (dict): The request description.
+
+        Returns:
+            LimitedResponse: The response to the data request.
+
+        Raises:
+            ResponseTooLarge: If the response is over the device's size limit.
+        """
+        headers  = dict(request['headers'])
+        timeout  = request['timeout']
+        url      = request['url']
+        password = request['password']
+        username = request['username']
+
+        match request['auth_type']:
+            case 'Digest':
+                auth     = httpx.DigestAuth(username, password)
+                response = await self._get(url, headers, timeout, auth)
+            case 'Basic':
+                auth     = httpx.BasicAuth(username, password)
+                response = await self._get(url, headers, timeout, auth)
+            case 'Bearer':
+                headers['Authorization'] = f"Bearer {request['token']}"
+                response = await self._get(url, headers, timeout)
+            case 'Token':
+                a_url    = request['token_url']
+                key      = TokenCache.token_key(request)
+                token    = await self._get_token(request, key)
+                response = await self._get(f"{a_url}?access_token={token}", headers, timeout)
+                if response.status_code == 401:
+                    # The token was revoked or expired early. Get a new one and try once more.
+                    await response.aclose()
+                    self.token_cache.invalidate(key, token)
+                    token    = await self._get_token(request, key)
+                    response = await self._get(f"{a_url}?access_token={token}", headers, timeout)
+            case _:
+                response = await self._get(url, headers, timeout)
+
+        return await aload_response(response, request['max_bytes'])
+
+    # =============================================================================
+    async def _get(self, url: str = "", headers: dict = None, timeout: float = 5, auth=None):
+        """Send a GET request without reading its body.
+
+        Args:
+            url (str): The URL.
+            headers (dict): The request headers.
+            timeout (float): The number of seconds to wait for the server.
+            auth (httpx.Auth): The authentication to use, if any.
+
+        Returns:
+            httpx.Response: The streamed response.
+        """
+        request = self.client.build_request("GET", url, headers=headers, timeout=timeout)
+        return await self.client.send(request, auth=auth, stream=True)
+
+    # =============================================================================
+    async def _get_token(self, request: dict = None, key: tuple = None) -> str:
+        """Return a Token device's access token, from the shared cache or the token server.
+
+        Args:
+            request (dict): The request description.
+            key (tuple): The token cache key.
+
+        Returns:
+            str: The access token.
+        """
+        token = self.token_cache.get(key)
+        if token is not None:
+            return token
+
+        # Only one request asks the token server at a time; the others use the token it gets.
+        async with self.token_locks.setdefault(key, asyncio.Lock()):
+            token = self.token_cache.get(key)
+            if token is None:
+                response = await self.client.post(
+                    request['token_url'], json={"pwd": request['password'], "remember": 1},
+                    headers={'Content-Type': 'application/json'}, timeout=request['timeout']
+                )
+                token = self.token_cache.store(key, response.json())
+
+        return token
+
+    # =============================================================================
+    async def _shutdown(self) -> None:
+        """Cancel the requests still in flight or waiting for a slot, then close the HTTP client."""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.client.aclose()
+
+    # =============================================================================
+    def close(self, timeout: float = 2.0) -> None:
+        """Fail the outstanding requests, close the HTTP client and stop the event loop.
+
+        Requests that haven't finished resolve with an ``IOError``; requests submitted after this
+        is called are refused.
+
+        Args:
+            timeout (float): The number of seconds to wait for the client to close.
+        """
+        with self._lock:
+            # Scheduled under the lock, so every request already submitted is on the loop before the shutdown starts.
+            self.closed = True
+            shutdown    = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            shutdown.result(timeout)
+        except Exception:  # noqa - the loop is being torn down regardless.
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
@@ -17,6 +17,27 @@ CHARS_TO_REPLACE = {
 
 CHARS_TO_REMOVE = ['/', '(', ')']
 
+# The number of raw key -> cleaned key results memoized by PluginDevice.clean_key().
+KEY_CACHE_SIZE = 8192
+
+# Inferred state types (see PluginDevice.infer_state_type) that get a companion `<key>_bool` state, and the string
+# values that map to True.
+BOOL_STATE_TYPES = ('onoff', 'truefalse', 'yesno')
+BOOL_TRUE_VALUES = ('armed', 'locked', 'on', 'open', 'true', 'up', 'yes')
+
+# The (lowercase) string values that give each boolean state type.
+BOOL_STATE_VALUES = {
+    'onoff':     frozenset(('on', 'off', 'open', 'locked', 'up', 'armed', 'closed', 'unlocked', 'down', 'disarmed')),
+    'yesno':     frozenset(('yes', 'no')),
+    'truefalse': frozenset(('true', 'false')),
+}
+
+# Device authentication methods (`useDigest`) that are always made with an HTTP client, even for file:// URLs.
+REQUEST_AUTH_TYPES = ('Basic', 'Bearer', 'Digest', 'Token')
+
+# Device states maintained by the plugin itself (see Devices.xml). These are always sent to the server.
+BOOKKEEPING_STATES = ('deviceIsOnline', 'deviceLastUpdated', 'deviceTimestamp', 'parse_error')
+
 DEBUG_LABELS = {
     10: "Debugging Messages",
     20: "Informational Messages",
@@ -25,4 +46,26 @@ DEBUG_LABELS = {
     50: "Critical Errors Only"
 }
 
+# Parsed in place of an empty XML payload.
+EMPTY_XML_PAYLOAD = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<Emptydict>"
+    "<Response>No data to return.</Response>"
+    "</Emptydict>"
+)
+
+# Returned by PluginDevice.get_the_data() when the source hasn't changed since the device's last good refresh.
+NOT_MODIFIED = object()
+
+# Bounds for the number of shared fetch worker threads (see PluginConfig.xml `fetchWorkers`).
+FETCH_WORKERS_MIN = 1
+FETCH_WORKERS_MAX = 64
+
+# The longest the refresh scheduler waits before checking for triggers and idle sessions (seconds).
+SCHEDULER_MAX_SLEEP = 1.0
+
+# Failing devices back off by this factor per consecutive failure (with the exponent capped).
+BACKOFF_FACTOR       = 2
+BACKOFF_MAX_EXPONENT = 16
+
 LOG_FORMAT = '%(asctime)s.%(msecs)03d\t%(levelname)-10s\t%(name)s.%(funcName)-28s %(message)s'
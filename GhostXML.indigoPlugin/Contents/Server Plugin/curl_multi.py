@@ -0,0 +1,388 @@
+"""
+Optional libcurl engine for Raw Curl devices.
+
+Raw Curl devices' commands are translated option for option into libcurl settings and run as transfers on a single
+libcurl multi handle, in one background thread, instead of as one curl process (and one timeout thread) per refresh.
+Because libcurl is what the curl command uses, the requests behave exactly as they did: the same headers (including
+curl's "Name:" and "Name;" forms), authentication, request data and redirects. The multi handle keeps connections open
+between refreshes, timeouts are enforced by libcurl, and each transfer reports how long name lookup, connecting, the
+TLS handshake and the first byte took.
+
+Supported options (short options can be combined, e.g. -sL)::
+
+    -H, --header            -u, --user              --basic, --digest, --ntlm, --anyauth
+    -d, --data, --data-raw, --data-ascii, --data-binary ('@file' is not supported)
+    -G, --get               -X, --request           -L, --location          -f, --fail
+    -i, --include           -A, --user-agent        -e, --referer           -b, --cookie (not a cookie file)
+    -x, --proxy             -m, --max-time          --connect-timeout       --compressed
+    --http1.0, --http1.1, --http2
+    -s, -S, -v, -k, -g and their long forms, which don't change the request
+
+Commands that use anything else (or URLs that use curl's globbing) are left to the other Raw Curl engines. Requires
+the pycurl package; if it isn't installed the plugin falls back to them.
+"""
+from collections import deque
+from concurrent.futures import Future
+import functools
+from io import BytesIO
+import threading
+
+try:
+    import pycurl
+except ImportError:
+    pycurl = None
+
+from curl_requests import split_curl_args
+
+DATA_OPTIONS   = ('-d', '--data', '--data-raw', '--data-ascii', '--data-binary')
+VALUE_OPTIONS  = {
+    '-H': '-H', '--header': '-H', '-u': '-u', '--user': '-u', '-X': '-X', '--request': '-X', '-A': '-A',
+    '--user-agent': '-A', '-e': '-e', '--referer': '-e', '-b': '-b', '--cookie': '-b', '-x': '-x', '--proxy': '-x',
+    '-m': '-m', '--max-time': '-m', '--connect-timeout': '--connect-timeout',
+    **{option: '-d' for option in DATA_OPTIONS},
+}
+SHORT_FLAGS    = 'fGgikLsSv'  # Short flags that can be combined (e.g. -sL).
+LONG_FLAGS     = {
+    '--anyauth': 'anyauth', '--basic': 'basic', '--compressed': 'compressed', '--digest': 'digest',
+    '--fail': 'f', '--get': 'G', '--globoff': 'g', '--http1.0': 'http1.0', '--http1.1': 'http1.1', '--http2': 'http2',
+    '--include': 'i', '--insecure': 'k', '--location': 'L', '--ntlm': 'ntlm', '--show-error': 'S', '--silent': 's',
+    '--verbose': 'v',
+}
+MAX_REDIRECTS  = 50    # The curl command's default with -L.
+SELECT_TIMEOUT = 0.05  # Longest wait (seconds) on the transfers before new requests are started.
+TIMING_PHASES  = ('dns', 'connect', 'tls', 'first_byte', 'total')
+
+
+class CurlResponse:
+    """The outcome of one transfer, as the curl command would report it."""
+
+    def __init__(self, body: bytes = b"", return_code: int = 0, error: bytes = b"", timings: dict = None):
+        """Record the outcome.
+
+        Args:
+            body (bytes): The response body.
+            return_code (int): curl's exit code for the transfer (0 on success).
+            error (bytes): libcurl's description of the failure.
+            timings (dict): Seconds from the start of the transfer to the end of each phase: ``dns``, ``connect``,
+                ``tls``, ``first_byte`` and ``total``.
+        """
+        self.body        = body
+        self.return_code = return_code
+        self.error       = error
+        self.timings     = timings or {}
+
+
+def curl_setopts(curl_array: str = "", url: str = "", timeout: float = 5, glob_off: bool = False,
+                 max_bytes: int = 0) -> list:
+    """Translate a Raw Curl device's curl options into libcurl settings.
+
+    Args:
+        curl_array (str): The device's curl options (after variable substitution).
+        url (str): The URL.
+        timeout (float): The device's timeout in seconds.
+        glob_off (bool): Whether the device turns off curl's URL globbing.
+        max_bytes (int): The device's size limit in bytes (0 for no limit).
+
+    Returns:
+        list: ``(pycurl option, value)`` pairs.
+
+    Raises:
+        ValueError: If the command uses an option (or URL globbing) that isn't supported.
+    """
+    args = split_curl_args(curl_array)
+    if args is None:
+        raise ValueError("The curl options can't be split into arguments.")
+
+    flags      = set()
+    headers    = []
+    data       = []
+    max_time   = timeout
+    setopts    = []
+    user_agent = f"curl/{pycurl.version_info()[1]}"
+
+    index = 0
+    while index < len(args):
+        arg    = args[index]
+        index += 1
+
+        if arg in LONG_FLAGS:
+            flags.add(LONG_FLAGS[arg])
+            continue
+        if arg[:1] == '-' and arg[1:] and set(arg[1:]) <= set(SHORT_FLAGS):
+            flags.update(arg[1:])
+            continue
+
+        if arg in VALUE_OPTIONS:
+            if index == len(args):
+                raise ValueError(f"'{arg}' needs a value.")
+            option, value = VALUE_OPTIONS[arg], args[index]
+            index += 1
+        elif arg[:2] in VALUE_OPTIONS:
+            # A short option with its value attached (e.g. -XPOST).
+            option, value = arg[:2], arg[2:]
+        else:
+            raise ValueError(f"'{arg}' is not supported.")
+
+        match option:
+            case '-H':
+                headers.append(value)
+            case '-u':
+                if ':' not in value:
+                    # curl would prompt for the password.
+                    raise ValueError("-u needs a password.")
+                setopts.append((pycurl.USERPWD, value))
+            case '-X':
+                setopts.append((pycurl.CUSTOMREQUEST, value))
+            case '-A':
+                user_agent = value
+            case '-e':
+                setopts.append((pycurl.REFERER, value))
+            case '-b':
+                if '=' not in value:
+                    raise ValueError("-b with a cookie file is not supported.")
+                setopts.append((pycurl.COOKIE, value))
+            case '-x':
+                setopts.append((pycurl.PROXY, value))
+            case '-m' | '--connect-timeout':
+                try:
+                    seconds = float(value)
+                except ValueError:
+                    raise ValueError(f"'{value}' is not a number of seconds.") from None
+                if option == '-m':
+                    max_time = min(max_time, seconds)
+                else:
+                    setopts.append((pycurl.CONNECTTIMEOUT_MS, int(seconds * 1000)))
+            case _:
+                if value.startswith('@') and arg != '--data-raw':
+                    # Data read from a file (or stdin).
+                    raise ValueError("Request data read from a file is not supported.")
+                data.append(value)
+
+    if not glob_off and 'g' not in flags and any(char in url for char in "{}[]"):
+        raise ValueError("URL globbing is not supported.")
+
+    body = "&".join(data).encode('utf-8')
+    if data and 'G' in flags:
+        url = f"{url}{'&' if '?' in url else '?'}{body.decode('utf-8')}"
+    elif data:
+        setopts += [(pycurl.POSTFIELDSIZE, len(body)), (pycurl.POSTFIELDS, body)]
+
+    auth = [method for name, method in (('basic', 'HTTPAUTH_BASIC'), ('digest', 'HTTPAUTH_DIGEST'),
+                                        ('ntlm', 'HTTPAUTH_NTLM'), ('anyauth', 'HTTPAUTH_ANY')) if name in flags]
+    if auth:
+        setopts.append((pycurl.HTTPAUTH, getattr(pycurl, auth[-1])))
+    if 'L' in flags:
+        setopts += [(pycurl.FOLLOWLOCATION, 1), (pycurl.MAXREDIRS, MAX_REDIRECTS)]
+    if 'f' in flags:
+        setopts.append((pycurl.FAILONERROR, 1))
+    if 'i' in flags:
+        setopts.append((pycurl.HEADER, 1))
+    if 'compressed' in flags:
+        setopts.append((pycurl.ACCEPT_ENCODING, ""))
+    for name, version in (('http1.0', 'CURL_HTTP_VERSION_1_0'), ('http1.1', 'CURL_HTTP_VERSION_1_1'),
+                          ('http2', 'CURL_HTTP_VERSION_2_0')):
+        if name in flags:
+            setopts.append((pycurl.HTTP_VERSION, getattr(pycurl, version)))
+    if headers:
+        setopts.append((pycurl.HTTPHEADER, headers))
+    if max_bytes:
+        # Refuses a declared length over the limit; longer bodies are cut off as they arrive (see _write()).
+        setopts.append((pycurl.MAXFILESIZE_LARGE, max_bytes))
+
+    # The plugin has always run curl with -k.
+    return setopts + [
+        (pycurl.URL, url),
+        (pycurl.USERAGENT, user_agent),
+        (pycurl.SSL_VERIFYPEER, 0),
+        (pycurl.SSL_VERIFYHOST, 0),
+        (pycurl.TIMEOUT_MS, int(max_time * 1000)),
+        (pycurl.NOSIGNAL, 1),
+    ]
+
+
+class CurlMultiEngine:
+    """Runs Raw Curl transfers for all devices on one libcurl multi handle.
+
+    Callers submit a request description (see ``PluginDevice.build_request()``) from any thread
+    and get back a ``concurrent.futures.Future`` that resolves to a ``CurlResponse``. Transfer
+    errors are reported through the response's curl exit code, as they were by the curl command.
+    If the multi handle itself fails, every outstanding future fails with an ``IOError``.
+    """
+
+    def __init__(self):
+        """Start the transfer thread.
+
+        Raises:
+            ImportError: If the pycurl package is not installed.
+        """
+        if pycurl is None:
+            raise ImportError("The libcurl curl engine requires the pycurl package.")
+
+        self.multi   = pycurl.CurlMulti()
+        self.pending = deque()  # (setopts, size limit, Future) waiting to be added to the multi handle
+        self.active  = {}       # pycurl.Curl: (Future, BytesIO) for transfers in progress
+        self.idle    = []       # Easy handles kept for reuse
+        self.closed  = False
+        self._lock   = threading.Lock()
+        self._wake   = threading.Event()
+        self.thread  = threading.Thread(name="GhostXML-curl", target=self._run, daemon=True)
+        self.thread.start()
+
+    # =============================================================================
+    def submit(self, request: dict = None) -> Future:
+        """Queue a Raw Curl request.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            Future: A future that resolves to the ``CurlResponse``.
+
+        Raises:
+            ValueError: If the request's curl options can't be run by libcurl (see ``curl_setopts()``).
+        """
+        setopts = curl_setopts(
+            request['curl_array'], request['url'], request['timeout'], bool(request['glob_off']), request['max_bytes']
+        )
+        future  = Future()
+        with self._lock:
+            if self.closed:
+                raise ValueError("The libcurl curl engine has been closed.")
+            self.pending.append((setopts, request['max_bytes'], future))
+        self._wake.set()
+
+        return future
+
+    # =============================================================================
+    def _run(self) -> None:
+        """Drive the transfers until ``close()`` stops the engine."""
+        while not self.closed:
+            self._start_pending()
+            if not self.active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            try:
+                self.multi.select(SELECT_TIMEOUT)
+                while self.multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+                    pass
+            except pycurl.error as err:
+                # The multi handle itself has failed, not one transfer. Left alone this would end the thread and leave
+                # every device waiting on its future.
+                self._fail_all(err)
+                continue
+
+            while True:
+                remaining, done, failed = self.multi.info_read()
+                for handle in done:
+                    self._finish(handle, 0, "")
+                for handle, return_code, message in failed:
+                    self._finish(handle, return_code, message)
+                if not remaining:
+                    break
+
+        for handle in list(self.active):
+            self._finish(handle, pycurl.E_ABORTED_BY_CALLBACK, "The plugin is shutting down.")
+        self.multi.close()
+
+    # =============================================================================
+    def _start_pending(self) -> None:
+        """Add the queued requests to the multi handle."""
+        while True:
+            with self._lock:
+                if not self.pending:
+                    return
+                setopts, max_bytes, future = self.pending.popleft()
+
+            handle = self.idle.pop() if self.idle else pycurl.Curl()
+            buffer = BytesIO()
+            self.active[handle] = (future, buffer)
+            try:
+                for option, value in setopts:
+                    handle.setopt(option, value)
+                handle.setopt(pycurl.WRITEFUNCTION, functools.partial(self._write, buffer, max_bytes))
+                self.multi.add_handle(handle)
+            except pycurl.error as err:
+                self._finish(handle, err.args[0], err.args[1], added=False)
+
+    # =============================================================================
+    @staticmethod
+    def _write(buffer: BytesIO = None, max_bytes: int = 0, data: bytes = b"") -> int | None:
+        """Keep a chunk of a transfer's body, or stop the transfer if the chunk takes it over the size limit.
+
+        Args:
+            buffer (BytesIO): The transfer's body so far.
+            max_bytes (int): The device's size limit in bytes (0 for no limit).
+            data (bytes): The chunk.
+
+        Returns:
+            int | None: None to continue, or 0 to have libcurl stop the transfer (with a write error).
+        """
+        if max_bytes and buffer.tell() + len(data) > max_bytes:
+            return 0
+        buffer.write(data)
+        return None
+
+    # =============================================================================
+    def _finish(self, handle=None, return_code: int = 0, message: str = "", added: bool = True) -> None:
+        """Resolve a transfer's future and keep its handle for the next transfer.
+
+        Args:
+            handle (pycurl.Curl): The transfer's easy handle.
+            return_code (int): libcurl's result code (the curl command's exit code).
+            message (str): libcurl's description of the failure.
+            added (bool): Whether the handle was added to the multi handle.
+        """
+        future, buffer = self.active.pop(handle)
+        timings = {
+            'dns':        handle.getinfo(pycurl.NAMELOOKUP_TIME),
+            'connect':    handle.getinfo(pycurl.CONNECT_TIME),
+            'tls':        handle.getinfo(pycurl.APPCONNECT_TIME),
+            'first_byte': handle.getinfo(pycurl.STARTTRANSFER_TIME),
+            'total':      handle.getinfo(pycurl.TOTAL_TIME),
+        }
+        if added:
+            self.multi.remove_handle(handle)
+        handle.reset()
+        self.idle.append(handle)
+
+        if return_code == pycurl.E_WRITE_ERROR:
+            # Only _write() fails writes: the body passed the size limit.
+            return_code, message = pycurl.E_FILESIZE_EXCEEDED, "The response is larger than the size limit."
+
+        # Like the curl command, a failed transfer returns whatever it received.
+        future.set_result(CurlResponse(buffer.getvalue(), return_code, message.encode('utf-8', 'replace'), timings))
+
+    # =============================================================================
+    def _fail_all(self, err: Exception = None) -> None:
+        """Fail every transfer in progress or queued, and replace the multi handle that failed.
+
+        Args:
+            err (Exception): The multi handle's error.
+        """
+        with self._lock:
+            pending, self.pending = self.pending, deque()
+        futures = [future for future, _ in self.active.values()] + [future for _, _, future in pending]
+
+        # Closing an easy handle also removes it from the multi handle.
+        for handle in self.active:
+            handle.close()
+        self.active = {}
+        self.multi.close()
+        self.multi = pycurl.CurlMulti()
+
+        for future in futures:
+            future.set_exception(IOError(f"The libcurl curl engine failed: {err}"))
+
+    # =============================================================================
+    def close(self) -> None:
+        """Stop the transfer thread. Transfers in progress are reported as aborted."""
+        with self._lock:
+            self.closed = True
+            pending, self.pending = self.pending, deque()
+        self._wake.set()
+        self.thread.join(timeout=5)
+
+        for _, _, future in pending:
+            future.set_result(CurlResponse(b"", pycurl.E_ABORTED_BY_CALLBACK, b"The plugin is shutting down."))
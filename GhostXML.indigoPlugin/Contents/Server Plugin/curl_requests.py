@@ -0,0 +1,204 @@
+"""
+In-process requests for Raw Curl devices.
+
+Raw Curl devices describe their request as curl command-line options. Commands that only use the common options
+(headers, basic auth, request data and method, plus flags that don't change the request) are made with the requests
+library on a pooled session instead of by running /usr/bin/curl, which saves a process (and a timeout thread) per
+refresh. Commands that use anything else are still run by curl.
+
+Supported options::
+
+    -H, --header "Name: value"      a request header ("Name;" sends it empty)
+    -u, --user user:password        basic authentication
+    -d, --data, --data-raw,         request data (joined with '&' when repeated; sent as a form
+    --data-ascii, --data-binary     unless a Content-Type header is given; '@file' is not supported)
+    -X, --request METHOD            the request method (POST if there is data, GET otherwise)
+    -L, --location                  follow redirects
+    -s, -S, -v, -k, -g, --compressed and their long forms, which don't change the request
+
+As with the curl command the plugin runs, certificates are not verified (curl's -k), redirects are only followed with
+-L, cookies are not kept between refreshes, and the User-Agent is curl's unless a header sets it. A header name given
+more than once is left to curl, which sends every copy.
+"""
+import functools
+import shlex
+import subprocess
+import warnings
+
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+
+from response_limits import ResponseTooLarge, load_response
+
+DATA_OPTIONS  = ('-d', '--data', '--data-raw', '--data-ascii', '--data-binary')
+VALUE_OPTIONS = ('-H', '--header', '-u', '--user', '-X', '--request') + DATA_OPTIONS
+SHORT_FLAGS   = 'gkLsSv'  # Short flags that can be combined (e.g. -sL).
+LONG_FLAGS    = ('--compressed', '--globoff', '--insecure', '--location', '--show-error', '--silent', '--verbose')
+
+# curl exit codes for the errors requests can raise (see curlcodes.py).
+CURL_COULDNT_CONNECT    = 7
+CURL_OPERATION_TIMEDOUT = 28
+CURL_SSL_CONNECT_ERROR  = 35
+CURL_RECV_ERROR         = 56
+CURL_FILESIZE_EXCEEDED  = 63
+
+
+@functools.lru_cache(maxsize=None)
+def curl_user_agent() -> str:
+    """Return the User-Agent the curl command sends (e.g. ``curl/8.7.1``).
+
+    Returns:
+        str: The User-Agent, or ``curl`` if curl's version can't be read.
+    """
+    try:
+        # "curl 8.7.1 (x86_64-apple-darwin23.0) libcurl/8.7.1 ..."
+        version = subprocess.run(
+            ['/usr/bin/curl', '--version'], capture_output=True, timeout=5, check=True
+        ).stdout.split()[1].decode()
+    except (OSError, IndexError, UnicodeDecodeError, subprocess.SubprocessError):
+        return "curl"
+
+    return f"curl/{version}"
+
+
+def split_curl_args(curl_array: str = "") -> list | None:
+    """Split a Raw Curl device's curl options into arguments, as the curl command receives them.
+
+    Args:
+        curl_array (str): The device's curl options (after variable substitution).
+
+    Returns:
+        list | None: The arguments, or None if the options can't be split (e.g. an unclosed quote).
+    """
+    try:
+        # Line continuations leave a newline at the start of the next option.
+        args = [arg.strip() for arg in shlex.split(curl_array)]
+    except ValueError:
+        return None
+
+    return [arg for arg in args if arg]
+
+
+def parse_curl_args(curl_array: str = "") -> dict | None:
+    """Parse a Raw Curl device's curl options into the parts of an equivalent request.
+
+    Args:
+        curl_array (str): The device's curl options (after variable substitution).
+
+    Returns:
+        dict | None: The request's ``method``, ``headers``, ``auth``, ``data`` and ``follow_redirects``, or None if the
+        options include anything that can't be made in-process.
+    """
+    args = split_curl_args(curl_array)
+    if args is None:
+        return None
+
+    method  = None
+    headers = {}
+    auth    = None
+    data    = []
+    follow  = False
+
+    index = 0
+    while index < len(args):
+        arg    = args[index]
+        index += 1
+
+        if arg in LONG_FLAGS or (arg[:1] == '-' and arg[1:] and set(arg[1:]) <= set(SHORT_FLAGS)):
+            follow = follow or arg == '--location' or (arg[:2] != '--' and 'L' in arg)
+            continue
+
+        if arg in VALUE_OPTIONS:
+            if index == len(args):
+                return None
+            option, value = arg, args[index]
+            index += 1
+        elif arg[:2] in ('-H', '-u', '-X', '-d'):
+            # A short option with its value attached (e.g. -XPOST).
+            option, value = arg[:2], arg[2:]
+        else:
+            return None
+
+        match option:
+            case '-H' | '--header':
+                if ':' in value:
+                    name, _, header_value = value.partition(':')
+                    header_value = header_value.strip()
+                    if not header_value:
+                        # "Name:" tells curl to drop a header it would send itself.
+                        return None
+                elif value.endswith(';'):
+                    name, header_value = value[:-1], ""
+                else:
+                    return None
+                name = name.strip()
+                if any(existing.lower() == name.lower() for existing in headers):
+                    # curl sends every copy of a repeated header; a dict can only hold one.
+                    return None
+                headers[name] = header_value
+            case '-u' | '--user':
+                if ':' not in value:
+                    # curl would prompt for the password.
+                    return None
+                user, _, password = value.partition(':')
+                auth = (user, password)
+            case '-X' | '--request':
+                method = value.upper()
+            case _:
+                if value.startswith('@') and option != '--data-raw':
+                    # Data read from a file (or stdin).
+                    return None
+                data.append(value)
+
+    if data and not any(name.lower() == 'content-type' for name in headers):
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    if not any(name.lower() == 'user-agent' for name in headers):
+        headers['User-Agent'] = curl_user_agent()
+
+    return {
+        'method':           method or ('POST' if data else 'GET'),
+        'headers':          headers,
+        'auth':             auth,
+        'data':             "&".join(data).encode('utf-8') if data else None,
+        'follow_redirects': follow,
+    }
+
+
+def send(session: requests.Session = None, url: str = "", options: dict = None, timeout: float = 5,
+         max_bytes: int = 0) -> tuple:
+    """Make a parsed curl request, reporting failures the way curl does.
+
+    Like curl without -f, the response body is returned whatever the HTTP status. A body over the size limit is
+    reported as curl's "maximum file size exceeded".
+
+    Args:
+        session (requests.Session): The pooled session to make the request with.
+        url (str): The URL.
+        options (dict): The request parts from ``parse_curl_args()``.
+        timeout (float): The number of seconds to wait for the server.
+        max_bytes (int): The device's size limit in bytes (0 for no limit).
+
+    Returns:
+        tuple: ``(body, return_code, error)``: the response body (bytes), curl's exit code for the failure (0 on
+        success) and a description of the failure (bytes).
+    """
+    try:
+        # The plugin has always run curl with -k, so in-process requests don't verify certificates either. Only this
+        # request's warnings are silenced; other devices' requests still warn.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', InsecureRequestWarning)
+            response = session.request(
+                options['method'], url, headers=options['headers'], auth=options['auth'], data=options['data'],
+                timeout=timeout, verify=False, allow_redirects=options['follow_redirects'], stream=True
+            )
+            return load_response(response, max_bytes).content, 0, b""
+    except ResponseTooLarge as err:
+        return b"", CURL_FILESIZE_EXCEEDED, str(err).encode()
+    except requests.exceptions.Timeout as err:
+        return b"", CURL_OPERATION_TIMEDOUT, str(err).encode()
+    except requests.exceptions.SSLError as err:
+        return b"", CURL_SSL_CONNECT_ERROR, str(err).encode()
+    except requests.exceptions.ConnectionError as err:
+        return b"", CURL_COULDNT_CONNECT, str(err).encode()
+    except requests.exceptions.RequestException as err:
+        return b"", CURL_RECV_ERROR, str(err).encode()
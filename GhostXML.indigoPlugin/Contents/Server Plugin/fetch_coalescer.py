@@ -0,0 +1,194 @@
+"""
+Request coalescing for GhostXML devices that share a source.
+
+Devices that make the same HTTP request (the same URL after variable substitution, authentication, headers and size
+limit) share one fetch: a request that is already in flight, or that completed within the freshness window, is
+answered with the same response instead of being made again. Devices that also flatten the payload the same way
+(feed type, state selectors and key filters) share the parsed states as well.
+
+Only successful fetches and parses are reused once they have completed: a fetch that raised, returned an HTTP status
+other than 200 or 304, or (for curl) exited with a non-zero code is forgotten, so a device whose source failed tries
+again on its next refresh.
+"""
+import threading
+import time as t
+from concurrent.futures import Future
+
+
+class FetchCoalescer:
+    """A thread-safe cache of recent fetches and parses, keyed by request and by payload.
+
+    Fetches are shared as ``concurrent.futures.Future`` objects, so a device can wait on a
+    request another device has in flight whether it was made on a fetch worker or by the
+    async fetch engine.
+    """
+
+    def __init__(self, window: float = 5.0):
+        """Initialize the cache.
+
+        Args:
+            window (float): The number of seconds a completed fetch or parse is reused.
+        """
+        self.window  = window
+        self.fetches = {}  # request key: [Future, epoch time it completed (None while in flight)]
+        self.parses  = {}  # parse key: (epoch time it completed, final_dict)
+        self.shared  = 0   # Fetches and parses answered from the cache.
+        self._lock   = threading.Lock()
+
+    # =============================================================================
+    @staticmethod
+    def request_key(request: dict = None) -> tuple:
+        """Return the key that identical requests share.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            tuple: The request key.
+        """
+        return (
+            request['url'], request['auth_type'], request['username'], request['password'], request['token'],
+            request['token_url'], tuple(sorted(request['headers'].items())), request['max_bytes']
+        )
+
+    # =============================================================================
+    def fetch(self, key: tuple = None, start=None) -> Future:
+        """Return the shared fetch for a request, starting it if there isn't one.
+
+        Args:
+            key (tuple): The request key (see ``request_key()``).
+            start (callable): Makes the request. Returns the response, or a ``Future`` that
+                resolves to it.
+
+        Returns:
+            Future: A future that resolves to the response.
+        """
+        now = t.time()
+        with self._lock:
+            self._expire(now)
+            entry = self.fetches.get(key)
+            if entry is not None:
+                self.shared += 1
+                return entry[0]
+
+            future = Future()
+            self.fetches[key] = [future, None]
+
+        future.add_done_callback(lambda done: self._completed(key, done))
+        try:
+            response = start()
+        except Exception as err:  # noqa - the caller reports the error, as it would for its own request.
+            future.set_exception(err)
+            return future
+
+        if isinstance(response, Future):
+            response.add_done_callback(lambda done: self._copy_result(done, future))
+        else:
+            future.set_result(response)
+
+        return future
+
+    # =============================================================================
+    @staticmethod
+    def _copy_result(source: Future = None, target: Future = None) -> None:
+        """Resolve the shared future with the outcome of the request it is waiting on.
+
+        Args:
+            source (Future): The future of the request.
+            target (Future): The shared future.
+        """
+        err = source.exception()
+        if err is not None:
+            target.set_exception(err)
+        else:
+            target.set_result(source.result())
+
+    # =============================================================================
+    def _completed(self, key: tuple = None, future: Future = None) -> None:
+        """Start a fetch's freshness window, or forget it if it failed or returned an error response.
+
+        Args:
+            key (tuple): The request key.
+            future (Future): The completed fetch.
+        """
+        with self._lock:
+            entry = self.fetches.get(key)
+            if entry is None or entry[0] is not future:
+                return
+            if future.exception() is not None or not self._reusable(future.result()):
+                del self.fetches[key]
+            else:
+                entry[1] = t.time()
+
+    # =============================================================================
+    @staticmethod
+    def _reusable(response=None) -> bool:
+        """Return whether a completed fetch can be handed to other devices.
+
+        Args:
+            response: The response: an HTTP response with a ``status_code``, or a curl result with a ``return_code``.
+
+        Returns:
+            bool: True for a 200 or 304 HTTP response, or a curl transfer that exited with 0.
+        """
+        status_code = getattr(response, 'status_code', None)
+        if status_code is not None:
+            return status_code in (200, 304)
+        return getattr(response, 'return_code', 0) == 0
+
+    # =============================================================================
+    def parsed(self, key: tuple = None) -> dict | None:
+        """Return a copy of the states recently parsed from the same payload, if any.
+
+        Args:
+            key (tuple): The parse key: the payload digest and everything that affects how it is flattened.
+
+        Returns:
+            dict | None: The parsed states, or None if there are none within the freshness window.
+        """
+        with self._lock:
+            entry = self.parses.get(key)
+            if entry is None or t.time() - entry[0] > self.window:
+                return None
+            self.shared += 1
+            return dict(entry[1])
+
+    # =============================================================================
+    def store_parsed(self, key: tuple = None, final_dict: dict = None) -> None:
+        """Keep a copy of the states parsed from a payload for other devices to use.
+
+        Args:
+            key (tuple): The parse key.
+            final_dict (dict): The parsed states.
+        """
+        if self.window <= 0:
+            return
+
+        now = t.time()
+        with self._lock:
+            self._expire(now)
+            self.parses[key] = (now, dict(final_dict))
+
+    # =============================================================================
+    def _expire(self, now: float = 0.0) -> None:
+        """Forget fetches and parses older than the freshness window. The caller must hold the lock.
+
+        Args:
+            now (float): The current epoch time.
+        """
+        cutoff = now - self.window
+        for key in [key for key, (_, done) in self.fetches.items() if done is not None and done < cutoff]:
+            del self.fetches[key]
+        for key in [key for key, (done, _) in self.parses.items() if done < cutoff]:
+            del self.parses[key]
+
+    # =============================================================================
+    def configure(self, window: float = 5.0) -> None:
+        """Apply a new freshness window.
+
+        Args:
+            window (float): The number of seconds a completed fetch or parse is reused.
+        """
+        with self._lock:
+            self.window = window
+            self._expire(t.time())
@@ -0,0 +1,243 @@
+"""
+Per-host concurrency and rate limits for GhostXML devices.
+
+Devices that poll the same host share its limits: at most `max_concurrent` requests to the host are in flight at once,
+and a token bucket holds requests to at most `rate` per second (with bursts of up to one second's worth). A request
+that would exceed a limit is queued (first come, first served) and started as soon as the host has room, so limits
+delay refreshes but never fail them. Queued requests don't hold a fetch worker while they wait.
+
+Limits are keyed by host name (without the port). A value of zero means no limit. Overrides for individual hosts are
+written ``host=concurrency`` or ``host=concurrency/rate``, separated by commas or new lines, e.g.::
+
+    192.168.1.20=1, api.example.com=4/2.5
+"""
+import threading
+import time as t
+from collections import deque
+from urllib.parse import urlsplit
+
+
+def parse_overrides(text: str = "") -> dict:
+    """Parse the per-host override field.
+
+    Args:
+        text (str): The override field value.
+
+    Returns:
+        dict: ``{host: (max_concurrent, rate)}``.
+
+    Raises:
+        ValueError: If an override is not in the form ``host=concurrency[/rate]``.
+    """
+    overrides = {}
+    for entry in text.replace('\n', ',').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+
+        host, _, limits = entry.partition('=')
+        concurrency, _, rate = limits.partition('/')
+        try:
+            max_concurrent = int(concurrency)
+            rate           = float(rate) if rate.strip() else 0.0
+        except ValueError:
+            raise ValueError(f"'{entry}' must be in the form host=concurrency or host=concurrency/rate.") from None
+        if not host.strip() or max_concurrent < 0 or rate < 0:
+            raise ValueError(f"'{entry}' must name a host and use limits of zero or more.")
+
+        overrides[host.strip().lower()] = (max_concurrent, rate)
+
+    return overrides
+
+
+class _HostState:
+    """The in-flight count, token bucket and queue of one host."""
+
+    def __init__(self, rate: float = 0.0):
+        """Start the host with a full token bucket.
+
+        Args:
+            rate (float): The host's rate limit.
+        """
+        self.active  = 0
+        self.tokens  = max(1.0, rate)
+        self.stamp   = t.monotonic()
+        self.waiting = deque()
+        self.timer   = None
+
+
+class HostLimiter:
+    """A thread-safe set of per-host request limits.
+
+    Callers hand ``run()`` a callable that starts the request; it is called at once if the
+    host has room, or later (on the thread that frees the room) if not. It is passed the host
+    whose slot it holds (an empty string if the host has no limits), which must be handed to
+    ``release()`` once the host has answered.
+    """
+
+    def __init__(self, max_concurrent: int = 0, rate: float = 0.0, overrides: dict = None):
+        """Initialize the limiter.
+
+        Args:
+            max_concurrent (int): The default number of requests in flight per host (0 for no limit).
+            rate (float): The default number of requests per second per host (0 for no limit).
+            overrides (dict): ``{host: (max_concurrent, rate)}`` for hosts with their own limits.
+        """
+        self.max_concurrent = max_concurrent
+        self.rate           = rate
+        self.overrides      = overrides or {}
+        self.hosts          = {}  # host: _HostState, kept (with its token bucket) for as long as the plugin runs
+        self._lock          = threading.Lock()
+
+    # =============================================================================
+    @staticmethod
+    def host_of(request: dict = None) -> str:
+        """Return the host a request is made to.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            str: The lower-case host name, or an empty string for local files.
+        """
+        if not request or request['call_type'] == "file":
+            return ""
+        return urlsplit(request['url']).hostname or ""
+
+    # =============================================================================
+    def limits(self, host: str = "") -> tuple:
+        """Return the ``(max_concurrent, rate)`` limits for a host.
+
+        Args:
+            host (str): The host name.
+
+        Returns:
+            tuple: The host's limits.
+        """
+        return self.overrides.get(host, (self.max_concurrent, self.rate))
+
+    # =============================================================================
+    def run(self, host: str = "", start=None) -> None:
+        """Start a request now if its host has room, otherwise queue it.
+
+        Args:
+            host (str): The host the request is made to (see ``host_of()``).
+            start (callable): Starts the request. Called with the host whose slot it holds.
+        """
+        if not host or self.limits(host) == (0, 0):
+            start("")
+            return
+
+        with self._lock:
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = _HostState(self.limits(host)[1])
+            state.waiting.append(start)
+            ready = self._ready(host, state)
+
+        for start_next in ready:
+            start_next(host)
+
+    # =============================================================================
+    def release(self, host: str = "") -> None:
+        """Free a host's slot once its request has been answered, and start the next queued request.
+
+        Args:
+            host (str): The host whose slot the request held. An empty string is ignored.
+        """
+        with self._lock:
+            state = self.hosts.get(host)
+            if state is None:
+                return
+            state.active = max(0, state.active - 1)
+            ready        = self._ready(host, state)
+
+        for start_next in ready:
+            start_next(host)
+
+    # =============================================================================
+    def _ready(self, host: str = "", state: _HostState = None) -> list:
+        """Take the queued requests a host has room for. The caller must hold the lock.
+
+        If the host is only waiting for its token bucket to refill, a timer is set to try again.
+
+        Args:
+            host (str): The host name.
+            state (_HostState): The host's state.
+
+        Returns:
+            list: The start callables to call (outside the lock).
+        """
+        max_concurrent, rate = self.limits(host)
+        ready = []
+
+        while state.waiting and (not max_concurrent or state.active < max_concurrent):
+            if rate:
+                now          = t.monotonic()
+                state.tokens = min(max(1.0, rate), state.tokens + (now - state.stamp) * rate)
+                state.stamp  = now
+                if state.tokens < 1:
+                    if state.timer is None:
+                        state.timer = threading.Timer((1 - state.tokens) / rate, self._refilled, [host])
+                        state.timer.daemon = True
+                        state.timer.start()
+                    break
+                state.tokens -= 1
+
+            state.active += 1
+            ready.append(state.waiting.popleft())
+
+        return ready
+
+    # =============================================================================
+    def _refilled(self, host: str = "") -> None:
+        """Start the requests that were waiting for a host's token bucket to refill.
+
+        Args:
+            host (str): The host name.
+        """
+        with self._lock:
+            state = self.hosts.get(host)
+            if state is None:
+                return
+            state.timer = None
+            ready       = self._ready(host, state)
+
+        for start_next in ready:
+            start_next(host)
+
+    # =============================================================================
+    def configure(self, max_concurrent: int = 0, rate: float = 0.0, overrides: dict = None) -> None:
+        """Apply new limits. Queued requests that the new limits allow are started.
+
+        Args:
+            max_concurrent (int): The default number of requests in flight per host (0 for no limit).
+            rate (float): The default number of requests per second per host (0 for no limit).
+            overrides (dict): ``{host: (max_concurrent, rate)}`` for hosts with their own limits.
+        """
+        with self._lock:
+            self.max_concurrent = max_concurrent
+            self.rate           = rate
+            self.overrides      = overrides or {}
+
+            ready = []
+            for host, state in self.hosts.items():
+                if state.timer is not None:
+                    state.timer.cancel()
+                    state.timer = None
+                if not self.limits(host)[1]:
+                    state.tokens = 1.0
+                ready.extend((host, start_next) for start_next in self._ready(host, state))
+
+        for host, start_next in ready:
+            start_next(host)
+
+    # =============================================================================
+    def close(self) -> None:
+        """Cancel any pending refill timers and drop queued requests."""
+        with self._lock:
+            for state in self.hosts.values():
+                if state.timer is not None:
+                    state.timer.cancel()
+                state.waiting.clear()
+            self.hosts.clear()
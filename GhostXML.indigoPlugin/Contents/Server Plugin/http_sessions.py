@@ -0,0 +1,195 @@
+"""
+Pooled keep-alive HTTP sessions for GhostXML devices.
+
+Devices that poll the same host with the same credentials share one `requests.Session`, so connections (and TLS
+sessions) are reused across polls instead of being opened for every request. Sessions are keyed by scheme, host and
+authentication, closed when the last device using them stops, and expired after a period of inactivity. Like the
+one-off requests they replace, sessions don't keep cookies between polls (or share them between devices).
+"""
+from http.cookiejar import DefaultCookiePolicy
+import threading
+import time as t
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+
+
+class SessionPool:
+    """A thread-safe pool of ``requests.Session`` objects shared by devices.
+
+    Each session is mounted with an ``HTTPAdapter`` sized by ``pool_size`` and carries the
+    device's authentication, so Digest auth can reuse its server nonce between polls.
+    """
+
+    def __init__(self, pool_size: int = 10, idle_expiry: int = 300):
+        """Initialize the pool.
+
+        Args:
+            pool_size (int): The maximum number of connections kept open per session.
+            idle_expiry (int): The number of seconds an unused session is kept before it is
+                closed.
+        """
+        self.pool_size   = pool_size
+        self.idle_expiry = idle_expiry
+        self.sessions    = {}  # key: requests.Session
+        self.last_used   = {}  # key: epoch time the session was last handed out
+        self.users       = {}  # key: set of device IDs using the session
+        self.device_keys = {}  # dev_id: key of the session the device last used
+        self._lock       = threading.Lock()
+
+    # =============================================================================
+    @staticmethod
+    def session_key(request: dict = None) -> tuple:
+        """Return the pool key for a request: scheme, host and authentication.
+
+        Token devices are keyed on their token URL's host, which is the host both their token and
+        data requests go to.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            tuple: The session key.
+        """
+        parts = urlsplit(request['token_url'] if request['auth_type'] == 'Token' else request['url'])
+        match request['auth_type']:
+            case 'Basic' | 'Digest':
+                auth = (request['auth_type'], request['username'], request['password'])
+            case 'Bearer':
+                auth = (request['auth_type'], request['token'])
+            case _:
+                auth = (request['auth_type'],)
+
+        return (parts.scheme, parts.netloc) + auth
+
+    # =============================================================================
+    def _new_session(self, request: dict = None) -> requests.Session:
+        """Create a session with a sized connection pool and the request's authentication, that keeps no cookies.
+
+        Args:
+            request (dict): The request description.
+
+        Returns:
+            requests.Session: The new session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        match request['auth_type']:
+            case 'Digest':
+                session.auth = HTTPDigestAuth(request['username'], request['password'])
+            case 'Basic':
+                session.auth = HTTPBasicAuth(request['username'], request['password'])
+            case 'Bearer':
+                session.headers['Authorization'] = f"Bearer {request['token']}"
+
+        return session
+
+    # =============================================================================
+    def acquire(self, dev_id: int = 0, request: dict = None) -> requests.Session:
+        """Return the shared session for a device's request, creating it if needed.
+
+        Args:
+            dev_id (int): The Indigo device ID making the request.
+            request (dict): The request description.
+
+        Returns:
+            requests.Session: The session to make the request with.
+        """
+        key = self.session_key(request)
+
+        with self._lock:
+            # If the device's configuration has changed, it no longer uses its old session.
+            old_key = self.device_keys.get(dev_id)
+            if old_key is not None and old_key != key:
+                self._release_key(dev_id, old_key)
+
+            if key not in self.sessions:
+                self.sessions[key] = self._new_session(request)
+                self.users[key]    = set()
+
+            self.users[key].add(dev_id)
+            self.device_keys[dev_id] = key
+            self.last_used[key]      = t.time()
+            return self.sessions[key]
+
+    # =============================================================================
+    def _release_key(self, dev_id: int = 0, key: tuple = None) -> None:
+        """Remove a device from a session's users and close the session if it is unused.
+
+        The caller must hold the pool lock.
+
+        Args:
+            dev_id (int): The Indigo device ID.
+            key (tuple): The session key.
+        """
+        users = self.users.get(key)
+        if users is None:
+            return
+
+        users.discard(dev_id)
+        if not users:
+            self._close_key(key)
+
+    # =============================================================================
+    def _close_key(self, key: tuple = None) -> None:
+        """Close and forget a session. The caller must hold the pool lock.
+
+        Args:
+            key (tuple): The session key.
+        """
+        session = self.sessions.pop(key, None)
+        self.last_used.pop(key, None)
+        for dev_id in self.users.pop(key, set()):
+            if self.device_keys.get(dev_id) == key:
+                del self.device_keys[dev_id]
+        if session is not None:
+            session.close()
+
+    # =============================================================================
+    def release(self, dev_id: int = 0) -> None:
+        """Release the session used by a device that has stopped communicating.
+
+        Args:
+            dev_id (int): The Indigo device ID.
+        """
+        with self._lock:
+            key = self.device_keys.pop(dev_id, None)
+            if key is not None:
+                self._release_key(dev_id, key)
+
+    # =============================================================================
+    def expire_idle(self) -> None:
+        """Close sessions that haven't been used within the idle expiry period.
+
+        Expired sessions are recreated the next time a device needs them.
+        """
+        cutoff = t.time() - self.idle_expiry
+        with self._lock:
+            for key in [key for key, last_used in self.last_used.items() if last_used < cutoff]:
+                self._close_key(key)
+
+    # =============================================================================
+    def configure(self, pool_size: int = 10, idle_expiry: int = 300) -> None:
+        """Apply new pool settings. Existing sessions are closed if the pool size changes.
+
+        Args:
+            pool_size (int): The maximum number of connections kept open per session.
+            idle_expiry (int): The number of seconds an unused session is kept.
+        """
+        self.idle_expiry = idle_expiry
+        if pool_size != self.pool_size:
+            self.pool_size = pool_size
+            self.close_all()
+
+    # =============================================================================
+    def close_all(self) -> None:
+        """Close every session in the pool."""
+        with self._lock:
+            for key in list(self.sessions):
+                self._close_key(key)
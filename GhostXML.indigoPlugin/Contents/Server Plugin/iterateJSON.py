@@ -0,0 +1,164 @@
+"""
+This module receives parsed JSON data and yields the key/value pairs which represent it, one per leaf value.
+
+Nested keys are joined with the '_ghostxml_' delimiter (which the plugin's key cleaner turns into an underscore), list
+items are keyed by their index, and empty lists and dicts become None so that they still create a device state. A
+top-level list is keyed 'No_<index>', since Indigo state names can't begin with a number. The data is walked once with
+an explicit stack (skipping any subtrees the device's state selectors or key filters rule out); nothing is built in
+between the parsed JSON and the plugin's final state dictionary.
+
+Payloads are decoded with orjson or ujson when one is installed (checked once, at import), and with the standard library
+`json` module otherwise. Both fast decoders accept the raw response bytes, so no decode step is needed first.
+"""
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+DELIMITER = '_ghostxml_'
+MAX_DEPTH = 64
+MAX_KEYS  = 100000
+
+if orjson is not None:
+    _fast_loads = orjson.loads
+    BACKEND     = f"orjson {orjson.__version__}"
+elif ujson is not None:
+    _fast_loads = ujson.loads
+    BACKEND     = f"ujson {ujson.__version__}"
+else:
+    _fast_loads = None
+    BACKEND     = "json (standard library)"
+
+logger = logging.getLogger("Plugin")
+
+
+def loads(payload: bytes | str = b""):
+    """Decode a JSON payload with the fastest available backend.
+
+    The fast decoders are stricter than the standard library (neither accepts `NaN` or `Infinity`, and orjson rejects
+    integers wider than 64 bits), so a payload they refuse is retried with the standard library before it is treated
+    as a parse error.
+
+    Args:
+        payload (bytes | str): The raw JSON payload.
+
+    Returns:
+        The decoded JSON data.
+
+    Raises:
+        ValueError: If the payload is not valid JSON.
+    """
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(payload)
+        except ValueError:
+            pass
+
+    return json.loads(payload)
+
+
+def iterate_main(data=None, max_depth: int = MAX_DEPTH, max_keys: int = MAX_KEYS, name: str = "JSON",  # noqa
+                 selectors=None, filters=None):
+    """Yield the flat key/value pairs for parsed JSON data.
+
+    If the device has state selectors (see `state_selectors.StateSelectors`), only the values at or below a selected
+    path are yielded; other subtrees are skipped without being walked. Include and exclude key patterns (see
+    `state_selectors.KeyFilters`) are matched against the key joined with underscores, and excluded subtrees are
+    skipped the same way. Data nested deeper than `max_depth`, and values beyond the first `max_keys`, are skipped with
+    a warning.
+
+    Args:
+        data: The parsed JSON data.
+        max_depth (int): The maximum number of nested objects and arrays below the top level that are walked.
+        max_keys (int): The maximum number of key/value pairs yielded.
+        name (str): The name of the source, used in log messages.
+        selectors (StateSelectors): The device's state selectors, if any.
+        filters (KeyFilters): The device's include and exclude key patterns, if any.
+
+    Yields:
+        tuple: The next ``(key, value)`` pair.
+    """
+    if isinstance(data, list):
+        items = enumerate(data)
+    elif isinstance(data, dict):
+        items = iter(data.items())
+    else:
+        return
+
+    depth_exceeded = False
+    keys_exceeded  = False
+    keys_yielded   = 0
+
+    # Each stack entry is (key prefix, iterator over the (key, value) pairs still to walk, depth, selector state, filter
+    # state). A selector state of None, or a filter state of True, means everything below is kept.
+    stack = [("", items, 0, selectors.initial if selectors else None, filters.initial if filters else True)]
+
+    while stack:
+        prefix, items, depth, states, included = stack[-1]
+
+        for (key, value) in items:
+            # List items are keyed by their (int) index.
+            is_index = isinstance(key, int)
+
+            if states is None:
+                child_states = None
+            else:
+                child_states = selectors.advance(states, None if is_index else key, key if is_index else None)
+                if child_states is not None and not child_states:
+                    continue
+
+            if prefix:
+                key = f"{prefix}{DELIMITER}{key}"
+            elif is_index:
+                key = f"No_{key}"
+
+            if isinstance(value, dict) and value:
+                children = iter(value.items())
+
+            elif isinstance(value, list) and value:
+                children = enumerate(value)
+
+            elif child_states is None:
+                if filters and not filters.keep(key.replace(DELIMITER, "_"), included):
+                    continue
+                if keys_yielded >= max_keys:
+                    keys_exceeded = True
+                    stack.clear()
+                    break
+                # Empty lists and dicts become None, so the state is still created.
+                yield key, None if isinstance(value, (dict, list)) else value
+                keys_yielded += 1
+                continue
+
+            else:
+                # A value where the selectors that reach it expect more levels below.
+                continue
+
+            child_included = included
+            if filters:
+                child_included = filters.descend(key.replace(DELIMITER, "_"), included)
+                if child_included is None:
+                    continue
+
+            if depth >= max_depth:
+                depth_exceeded = True
+                continue
+
+            stack.append((key, children, depth + 1, child_states, child_included))
+            break
+
+        else:
+            stack.pop()
+
+    if depth_exceeded:
+        logger.warning(f"[{name}] JSON data nested more than {max_depth} levels deep was skipped.")
+    if keys_exceeded:
+        logger.warning(f"[{name}] The JSON source has more than {max_keys} values. The rest were skipped.")
@@ -2,10 +2,16 @@
 This module receives the XML data as a string and returns a dictionary (finalDict) which contains key/value pairs which
 represent the source XML. It is an amalgam of bits and pieces across the web.
 
-Credit for XmlDictConfig(): https://code.activestate.com/recipes/410469-xml-as-dictionary/
+The payload is read with an incremental (pull) parser; each element is folded into a lightweight nested dict when its
+end tag arrives and is then cleared, so the full ElementTree is never held in memory. A single walk over the nested
+dict then emits the final key/value pairs -- list expansion (to any depth), de-duplication and attribute-key cleanup
+included.
+
+Credit for the nested dict layout: https://code.activestate.com/recipes/410469-xml-as-dictionary/
 Credit for update_shim(): https://stackoverflow.com/users/3871670/adam-clark
 Credit for flatten_dict(): https://codereview.stackexchange.com/users/1659/winston-ewert
 """
+import logging
 from xml.etree import ElementTree
 
 try:
@@ -13,164 +19,304 @@ try:
 except ImportError:
     pass
 
+ATTRIBS_SUFFIX = '_A_t_t_r_i_b_s'
+CHUNK_SIZE     = 65536
+MAX_DEPTH      = 64
+MAX_KEYS       = 100000
+
+XSI_NAMESPACE  = '{http://www.w3.org/2001/XMLSchema-instance}'
+
+logger = logging.getLogger("Plugin")
 
-class XmlDictConfig(dict):
-    """Converts an XML ElementTree element into a nested dictionary.
 
-    Recursively walks the XML tree, mapping element tags to their text content or nested
-    XmlDictConfig instances. When duplicate tags are encountered, their values are collected
-    into a list. Element attributes are stored under a key suffixed with '_A_t_t_r_i_b_s'.
+def update_shim(node: dict, a_dict: dict) -> None:
+    """Update a nested dict node while handling duplicate keys by collecting values into lists.
+
+    When a key already exists in the node, the existing value and the new value are combined into a list (which moves
+    the key to the end of the node). If the existing value is already a list, the new value is appended.
+
+    Args:
+        node (dict): The node to update.
+        a_dict (dict): The key/value pairs to merge into the node.
     """
+    for key in a_dict:
+        if key in node:
+            value = node.pop(key)
+            if isinstance(value, list):
+                value.append(a_dict[key])
+                node[key] = value
+            else:
+                node[key] = [value, a_dict[key]]
+        else:
+            node.update(a_dict)
 
-    def __init__(self, parent_element):
-        super().__init__()
 
-        if parent_element.items():
-            self.update_shim(dict(parent_element.items()))
+def add_value(node: dict, key: str, value) -> None:
+    """Add a single key to a nested dict node; the same as ``update_shim(node, {key: value})``.
 
-        for element in parent_element:
-            if len(element):
-                a_dict = XmlDictConfig(element)
+    Args:
+        node (dict): The node to update.
+        key (str): The key to add.
+        value: The value to add.
+    """
+    if key in node:
+        existing = node.pop(key)
+        if isinstance(existing, list):
+            existing.append(value)
+            node[key] = existing
+        else:
+            node[key] = [existing, value]
+    else:
+        node[key] = value
 
-                if element.items():
-                    a_dict.update_shim(dict(element.items()))
-                self.update_shim({element.tag: a_dict})
 
-            elif element.items():
-                # This line added to handle when value and attribs are both present.
-                self.update_shim({element.tag: element.text})
-                # This line added to create a unique element.tag for attribs.
-                element_tag_attribs = element.tag + '_A_t_t_r_i_b_s'
-                # This line modded to use new element.tag + '_Attribs'.
-                self.update_shim({element_tag_attribs: dict(element.items())})
-            else:
-                # WAS: _self.update_shim({element.tag: element.text.strip()})_ with strip(), the function will choke on
-                # some XML. 'NoneType' object has no attribute 'strip'.
-                self.update_shim({element.tag: element.text})
+def local_name(name: str = "") -> str:
+    """Return a tag or attribute name without its namespace ('{uri}name' -> 'name').
 
-    def update_shim(self, a_dict):  # noqa
-        """Update the dictionary while handling duplicate keys by collecting values into lists.
+    Args:
+        name (str): The qualified name produced by the parser.
+
+    Returns:
+        str: The local name.
+    """
+    return name.rpartition('}')[2] if name[:1] == '{' else name
 
-        When a key already exists in the dictionary, the existing value and the new value are
-        combined into a list. If the existing value is already a list, the new value is appended.
 
-        Args:
-            a_dict (dict): The dictionary whose key/value pairs will be merged into this instance.
-        """
+def local_attributes(attrib: dict) -> dict:
+    """Return an element's attributes keyed by local name.
 
-        temp_dict = a_dict.copy()
+    Schema instance attributes (``xsi:schemaLocation``, ``xsi:noNamespaceSchemaLocation``, ``xsi:type`` and so on)
+    describe the document rather than the data, so they are dropped.
 
-        for key in temp_dict.keys():
-            if key in self:
-                value = self.pop(key)
+    Args:
+        attrib (dict): The element's attributes.
 
-                # if type(value) is not list:
-                if not isinstance(value, list):
-                    list_of_dicts = []  # noqa
-                    list_of_dicts.append(value)
-                    list_of_dicts.append(a_dict[key])
-                    self.update({key: list_of_dicts})
-                else:
-                    value.append(a_dict[key])
-                    self.update({key: value})
-            else:
-                self.update(a_dict)
+    Returns:
+        dict: The attributes keyed by local name.
+    """
+    return {local_name(key): value for key, value in attrib.items() if not key.startswith(XSI_NAMESPACE)}
+
+
+def parse_nested(payload: bytes | str = "", selectors=None) -> dict:
+    """Parse an XML payload into a nested dict, one element at a time.
 
+    Elements with children become nested dicts (their attributes are merged into the dict); leaf elements become
+    their text, with any attributes stored under a sibling key suffixed with '_A_t_t_r_i_b_s'. Duplicate tags are
+    collected into lists. Each element is cleared as soon as it has been folded into its parent.
 
-def flatten_dict(d_to_flatten):
-    """Recursively flatten a nested dictionary into a single-level dictionary.
+    Namespaces are resolved by the parser and dropped from tag and attribute names, whether the document uses a
+    default namespace or prefixes. Bytes are passed to the parser as-is (without copying), so the document's own
+    encoding declaration is honored.
 
-    Nested keys are joined with an underscore separator. For example, a nested structure of
-    ``{'a': {'b': 1}}`` becomes ``{'a_b': 1}``.
+    If the device has state selectors (see `state_selectors.StateSelectors`), only the elements at or below a selected
+    path are kept. Elements on the way to a selected path contribute their selected children (but not their own text
+    or attributes), and elements that can't lead to one are skipped along with everything inside them. Selected
+    elements whose tag repeats in the source keep their place in the tag's list (see `place_selected()`), so they get
+    the same keys as they do without selectors.
 
     Args:
-        d_to_flatten (dict): The nested dictionary to flatten.
+        payload (bytes | str): The raw XML payload.
+        selectors (StateSelectors): The device's state selectors, if any.
 
     Returns:
-        dict: A flat dictionary with underscore-joined keys.
+        dict: The nested dict for the document's root element.
     """
+    parser  = ElementTree.XMLPullParser(events=('start', 'end'))
+    # [node, has_children, attributes, selector state, tag counts, position, selected positions] for each open element
+    stack   = []
+    root    = {}
+    tags    = {}  # qualified tag: local name
+    skipped = [None, False, None, None, None, None, None]
+
+    # Slices of a memoryview feed the parser without copying the payload chunk by chunk.
+    view = memoryview(payload) if isinstance(payload, (bytes, bytearray)) else payload
+    for start in range(0, max(len(view), 1), CHUNK_SIZE):
+        parser.feed(view[start:start + CHUNK_SIZE])
+        for event, element in parser.read_events():
+            if event == 'start':
+                position = None
+                if not stack:
+                    states = selectors.initial if selectors else None
+                else:
+                    parent = stack[-1]
+                    if parent is skipped:
+                        stack.append(skipped)
+                        continue
+
+                    # A selector state of None means everything below is kept.
+                    states = parent[3]
+                    if states is not None:
+                        tag = tags.get(element.tag)
+                        if tag is None:
+                            tag = tags[element.tag] = local_name(element.tag)
+                        position = parent[4][tag] = parent[4].get(tag, 0) + 1
+                        states   = selectors.advance(states, tag, position)
+                        if states is not None and not states:
+                            stack.append(skipped)
+                            continue
+                    parent[1] = True
+
+                node       = {}
+                attributes = local_attributes(element.attrib) if element.attrib and states is None else None
+                if attributes:
+                    update_shim(node, attributes)
+                tracked = states is not None
+                stack.append([node, False, attributes, states, {} if tracked else None, position,
+                              {} if tracked else None])
+                continue
+
+            node, has_children, attributes, states, counts, position, selected = stack.pop()
+            if selected:
+                place_selected(node, counts, selected)
+
+            if stack and stack[-1][3] is not None:
+                # A child of an element on the way to a selected path. Leaves with attributes are also counted among
+                # themselves, as that is how their attribute keys are numbered.
+                tag = tags.get(element.tag)
+                if tag is None:
+                    tag = tags[element.tag] = local_name(element.tag)
+                if not len(element) and element.attrib and local_attributes(element.attrib):
+                    stack[-1][4][tag + ATTRIBS_SUFFIX] = stack[-1][4].get(tag + ATTRIBS_SUFFIX, 0) + 1
+
+            if node is None:
+                pass
+            elif not stack:
+                root = node
+            elif states is not None and not has_children:
+                # On the way to a selected path, but nothing below it was selected.
+                pass
+            else:
+                parent = stack[-1][0]
+                tag    = tags.get(element.tag)
+                if tag is None:
+                    tag = tags[element.tag] = local_name(element.tag)
+
+                if has_children:
+                    if attributes:
+                        update_shim(node, attributes)
+                    add_value(parent, tag, node)
+                elif attributes:
+                    # Leaf elements keep their text under the tag and their attributes under a unique tag.
+                    add_value(parent, tag, element.text)
+                    add_value(parent, tag + ATTRIBS_SUFFIX, attributes)
+                else:
+                    add_value(parent, tag, element.text)
 
-    def expand(key, value):
+                if position:
+                    stack[-1][6].setdefault(tag, []).append(position)
+                    if attributes and not has_children:
+                        stack[-1][6].setdefault(tag + ATTRIBS_SUFFIX, []).append(stack[-1][4][tag + ATTRIBS_SUFFIX])
+            element.clear()
 
-        if isinstance(value, dict):
-            return [(key + '_' + k, v) for k, v in flatten_dict(value).items()]
-        else:
-            return [(key, value)]
+    parser.close()
+    return root
+
+
+def place_selected(node: dict, counts: dict, selected: dict) -> None:
+    """Put selected elements back in their place among the instances of their tag.
 
-    items = [item for k, v in d_to_flatten.items() for item in expand(k, v)]
-    return dict(items)
+    Without selectors, the instances of a repeated tag become a list: the first leaf's text is kept under the tag, and
+    elements with children (and leaves' attributes) are numbered by their place in the list ('item_2_title'). With
+    selectors only some instances are kept, so the kept ones are spread over a list with an empty dict (which produces
+    no keys) in place of each instance that wasn't selected.
 
+    Args:
+        node (dict): The nested dict for an element on the way to a selected path.
+        counts (dict): The number of child elements with each tag in the source (and of leaves with attributes, under
+            the attributes key).
+        selected (dict): The positions (from 1) of the selected child elements by key.
+    """
+    for key, positions in selected.items():
+        if counts.get(key, 0) < 2 or key not in node:
+            continue
 
-def iterate_main(root):  # noqa
+        values = node[key] if len(positions) > 1 else [node[key]]
+        placed = [{} for _ in range(max(positions))]
+        for position, value in zip(positions, values):
+            placed[position - 1] = value
+        node[key] = placed
+
+
+def iterate_main(root, max_depth: int = MAX_DEPTH, max_keys: int = MAX_KEYS, name: str = "XML",  # noqa
+                 selectors=None, filters=None):
     """Parse an XML string into a flat key/value dictionary.
 
-    Converts an XML string into a flat dictionary by first building a nested dict via
-    XmlDictConfig, then flattening it. Handles duplicate tags, nested lists, and element
-    attributes. Attribute keys (suffixed '_A_t_t_r_i_b_s') are cleaned up in the final pass.
-    If a parse error occurs, returns a dictionary with a single error-state entry.
+    Builds a nested dict with `parse_nested()`, then walks it once with an explicit stack, joining nested keys with an
+    underscore. Lists (duplicate tags) keep their first value under their own key and have their dict items expanded
+    into numbered keys, to any depth. Attribute keys (suffixed '_A_t_t_r_i_b_s') are cleaned up as they are emitted;
+    include and exclude key patterns are matched before that, and subtrees they exclude are not walked.
+    Data nested deeper than `max_depth`, and values beyond the first `max_keys`, are skipped with a warning. If a parse
+    error occurs, returns a dictionary with a single error-state entry.
 
     Args:
-        root (str): A string containing the raw XML payload.
+        root (bytes | str): The raw XML payload.
+        max_depth (int): The maximum number of nested elements and lists below the root that are walked.
+        max_keys (int): The maximum number of key/value pairs returned.
+        name (str): The name of the source, used in log messages.
+        selectors (StateSelectors): The device's state selectors, if any (see `parse_nested()`).
+        filters (KeyFilters): The device's include and exclude key patterns, if any.
 
     Returns:
         dict: A flat dictionary of key/value pairs derived from the XML structure.
     """
 
+    final_dict     = {}
+    depth_exceeded = False
+    keys_exceeded  = False
+
     try:
-        root         = ElementTree.fromstring(root)
-        xml_dict     = XmlDictConfig(root)
-        flatxml_dict = flatten_dict(xml_dict)
-        final_dict   = {}
+        # Each stack entry is (key prefix, iterator over the (key, value) pairs still to walk, depth, filter state). A
+        # filter state of True means everything below is kept.
+        stack = [("", iter(parse_nested(root, selectors).items()), 0, filters.initial if filters else True)]
 
-        for (key, value) in flatxml_dict.items():
+        while stack:
+            prefix, items, depth, included = stack[-1]
 
-            final_dict[key] = value
+            for (key, value) in items:
+                if prefix:
+                    key = f"{prefix}_{key}"
 
-            # See if any 'value' is another list. These lists may contain information for more values we want--for
-            # example, when there are multiple instances of the same tag (with different attributes or values.)
-            if isinstance(value, list):
+                if isinstance(value, dict):
+                    children = iter(value.items())
 
-                # If any lists found contain a dictionary, iterate over that dictionary and make more key/value pairs.
-                # Also, this may need more counters depending on the depth of the source XML data.  Right now it only
-                # goes so deep.
-                counter = 1
-                for value_item in value:
-
-                    if isinstance(value_item, dict):
-                        for (value_key1, value1) in value_item.items():
-                            new_key1 = f"{key}_{counter}_{value_key1}"
-                            final_dict[new_key1] = value1
-
-                            if isinstance(value1, dict):
-                                for (value_key2, value2) in value1.items():
-                                    new_key2 = f"{key}_{counter}_{value_key1}_{value_key2}"
-                                    final_dict[new_key2] = value2
-
-                                if isinstance(value2, dict):
-                                    for (value_key3, value3) in value2.items():
-                                        new_key3 = f"{key}_{counter}_{value_key2}_{value_key3}"
-                                        final_dict[new_key3] = value3
-                    counter += 1
-
-        # We may be left with values that contain lists of duplicates. Take the first one and leave the rest.
-        for (key, value) in final_dict.items():
-            if isinstance(value, list):
-                final_dict[key] = value[0]
-
-        # Find any remaining dicts, and delete them. This operation should ultimately determine if all the dict items
-        # have already been pulled out to ensure that we don't lose anything.
-        iter_dict = final_dict.copy()
-        for (key, value) in iter_dict.items():
-            if isinstance(value, dict):
-
-                del final_dict[key]
-
-        # Now that we're done, get rid of the placeholder Attribs tag component since we don't need it anymore.
-        iter_dict = final_dict.copy()
-        for (key, value) in iter_dict.items():
-            del final_dict[key]
-            key = key.replace('_A_t_t_r_i_b_s', "")
-            final_dict[key] = value
+                elif isinstance(value, list):
+                    # Duplicate tags keep the first value under their own key. Any dicts in the list (multiple
+                    # instances of the same tag with children) are expanded into numbered keys.
+                    if not isinstance(value[0], dict) and (not filters or filters.keep(key, included)):
+                        final_dict[key.replace(ATTRIBS_SUFFIX, "")] = value[0]
+                    children = ((str(counter), item) for counter, item in enumerate(value, 1) if isinstance(item, dict))
+
+                else:
+                    if filters and not filters.keep(key, included):
+                        continue
+                    key = key.replace(ATTRIBS_SUFFIX, "")
+                    if len(final_dict) >= max_keys and key not in final_dict:
+                        keys_exceeded = True
+                        stack.clear()
+                        break
+                    final_dict[key] = value
+                    continue
+
+                child_included = included
+                if filters:
+                    child_included = filters.descend(key, included)
+                    if child_included is None:
+                        continue
+
+                if depth >= max_depth:
+                    depth_exceeded = True
+                    continue
+
+                stack.append((key, children, depth + 1, child_included))
+                break
+
+            else:
+                stack.pop()
+
+        if depth_exceeded:
+            logger.warning(f"[{name}] XML data nested more than {max_depth} levels deep was skipped.")
+        if keys_exceeded:
+            logger.warning(f"[{name}] The XML source has more than {max_keys} values. The rest were skipped.")
 
     except Exception as err:  # noqa
         indigo.server.log(f"Parse error: {err}. Check XML source.", isError=True)
@@ -8,24 +8,39 @@ This plugin provides an engine which parses tag/value pairs into transitive Indi
 """
 
 # =============================== Stock Imports ===============================
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import hashlib
+import heapq
 import json
 import logging
 import os
 import platform
-from queue import Queue  # import queue
+import random
+from queue import Empty, Queue  # import queue
 import re
 import shlex
 import subprocess
 import sys
+import tempfile
 import threading
 import time as t
 import xml.etree.ElementTree as Etree
 import requests
-from requests.auth import HTTPBasicAuth, HTTPDigestAuth
 
 # ============================ Third-party Imports ============================
-import flatdict  # https://github.com/gmr/flatdict - flatdict deprecated Python 2 in v4.0.0
+import curl_requests
+import iterateJSON
 import iterateXML
+from async_fetch import AsyncFetchEngine
+from curl_multi import TIMING_PHASES, CurlMultiEngine, CurlResponse
+from fetch_coalescer import FetchCoalescer
+from host_limits import HostLimiter, parse_overrides
+from http_sessions import SessionPool
+from response_limits import READ_CHUNK_SIZE, ResponseTooLarge, load_response, max_bytes_for, read_limited
+from state_selectors import KeyFilters, StateSelectors
+from token_cache import TokenCache
 try:
     import indigo  # noqa
 except ImportError:
@@ -41,7 +56,7 @@ __build__     = ""
 __copyright__ = "There is no copyright for the GhostXML code base."
 __license__   = "MIT"
 __title__     = "GhostXML Plugin for Indigo Home Control"
-__version__   = "2025.2.1"
+__version__   = "2025.3.0"
 
 
 # =============================================================================
@@ -69,8 +84,25 @@ class Plugin(indigo.PluginBase):
         self.master_trigger_dict      = {'disabled': Queue()}
         self.plugin_is_shutting_down  = False
         self.managed_devices          = {}  # Managed list of plugin devices
+        self.next_due                 = {}  # dev_id: time the device is next due for a refresh
+        self.schedule                 = []  # Min-heap of (due time, dev_id); entries not in next_due are stale.
+        self.schedule_lock            = threading.Lock()
+        self.schedule_changed         = threading.Condition(self.schedule_lock)  # Wakes the scheduler.
         self.changing_managed_devices = False
         self.prepare_to_sleep         = False
+        self.fetch_workers            = self._fetch_worker_count(self.pluginPrefs)
+        self.fetch_executor           = ThreadPoolExecutor(max_workers=self.fetch_workers,
+                                                           thread_name_prefix="GhostXML"
+                                                           )
+        self.async_engine             = None  # AsyncFetchEngine when the asyncio fetch engine is selected.
+        self.curl_engine              = None  # CurlMultiEngine when the libcurl Raw Curl engine is selected.
+        self.session_pool             = SessionPool(**self._session_pool_settings(self.pluginPrefs))
+        self.host_limiter             = HostLimiter(**self._host_limit_settings(self.pluginPrefs))
+        self.fetch_coalescer          = FetchCoalescer(window=self._coalesce_window(self.pluginPrefs))
+        self.token_cache              = TokenCache(ttl=self._token_ttl(self.pluginPrefs))
+        self.curl_backend             = self.pluginPrefs.get('curlEngine', kDefaultPluginPrefs['curlEngine'])
+        self.parse_limits             = self._parse_limits(self.pluginPrefs)
+        self.schedule_settings        = self._schedule_settings(self.pluginPrefs)
 
         # =============================== Debug Logging ================================
         try:
@@ -82,6 +114,9 @@ class Plugin(indigo.PluginBase):
         self.plugin_file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
         self.indigo_log_handler.setLevel(self.debug_level)
 
+        self._configure_async_engine(self.pluginPrefs)
+        self._configure_curl_engine(self.pluginPrefs)
+
         self.plugin_is_initializing = False
 
     # =============================================================================
@@ -101,7 +136,11 @@ class Plugin(indigo.PluginBase):
         sys_version = sys.version.replace('\n', '')
         indigo.server.log(f"{'Python version:':<31} {sys_version}")
         indigo.server.log(f"{'Mac OS Version:':<31} {platform.mac_ver()[0]}")
+        indigo.server.log(f"{'JSON parser:':<31} {iterateJSON.BACKEND}")
         indigo.server.log(f"{'Process ID:':<31} {os.getpid()}")
+        skipped = sum(plugin_device.skipped_parses for plugin_device in self.managed_devices.values())
+        indigo.server.log(f"{'Unchanged payloads skipped:':<31} {skipped}")
+        indigo.server.log(f"{'Shared fetches and parses:':<31} {self.fetch_coalescer.shared}")
         indigo.server.log("=" * 135)
 
     # =============================================================================
@@ -128,8 +167,12 @@ class Plugin(indigo.PluginBase):
         if not user_cancelled:
             dev = indigo.devices[dev_id]
 
-            # Replace device to list of managed devices to ensure any configuration changes are used.
+            # Replace device to list of managed devices to ensure any configuration changes are used. Any work still
+            # pending for the old instance is dropped so the two never refresh the device concurrently.
+            if dev.id in self.managed_devices:
+                self.managed_devices[dev.id].stop()
             self.managed_devices[dev.id] = PluginDevice(self, dev)
+            self.schedule_device(dev.id, due=self._initial_due_time(dev))
 
     # =============================================================================
     def closed_prefs_config_ui(self, values_dict: indigo.Dict = None, user_cancelled: bool = False) -> indigo.Dict:  # noqa
@@ -154,6 +197,27 @@ class Plugin(indigo.PluginBase):
             self.debug_level = int(values_dict.get('showDebugLevel', "30"))
             self.indigo_log_handler.setLevel(self.debug_level)
             indigo.server.log(f"Logging level: {DEBUG_LABELS[self.debug_level]} ({self.debug_level})")
+
+            # Fetch Workers - a running executor can't be resized, so swap in a new one. Work already submitted to the
+            # old executor is allowed to finish.
+            fetch_workers = self._fetch_worker_count(values_dict)
+            if fetch_workers != self.fetch_workers:
+                old_executor        = self.fetch_executor
+                self.fetch_workers  = fetch_workers
+                self.fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="GhostXML")
+                old_executor.shutdown(wait=False)
+                self.logger.info(f"Fetch workers: {fetch_workers}")
+
+            self._configure_async_engine(values_dict)
+            self.session_pool.configure(**self._session_pool_settings(values_dict))
+            self.host_limiter.configure(**self._host_limit_settings(values_dict))
+            self.fetch_coalescer.configure(window=self._coalesce_window(values_dict))
+            self.token_cache.configure(ttl=self._token_ttl(values_dict))
+            self.parse_limits      = self._parse_limits(values_dict)
+            self.schedule_settings = self._schedule_settings(values_dict)
+            self.curl_backend      = values_dict.get('curlEngine', kDefaultPluginPrefs['curlEngine'])
+            self._configure_curl_engine(values_dict)
+
             self.logger.debug("Plugin prefs saved.")
 
         else:
@@ -171,7 +235,11 @@ class Plugin(indigo.PluginBase):
             dev (indigo.Device): The Indigo device that was deleted.
         """
         self.logger.debug("%s %s deleted." % (dev.name, dev.id))
-        self.managed_devices.pop(dev.id, None)
+        plugin_device = self.managed_devices.pop(dev.id, None)
+        self.unschedule_device(dev.id)
+        if plugin_device:
+            plugin_device.stop()
+        self.session_pool.release(dev.id)
 
     # =============================================================================
     def device_start_comm(self, dev: indigo.Device = None) -> None:  # noqa
@@ -231,8 +299,11 @@ class Plugin(indigo.PluginBase):
 
         # Add device to list of managed devices
         self.changing_managed_devices = True
+        if dev.id in self.managed_devices:
+            self.managed_devices[dev.id].stop()
         self.managed_devices[dev.id] = PluginDevice(self, dev)
         self.changing_managed_devices = False
+        self.schedule_device(dev.id, due=self._initial_due_time(dev))
 
         # Force refresh of device when comm started
         if int(dev.pluginProps.get('refreshFreq', 0)) == 0:
@@ -246,7 +317,7 @@ class Plugin(indigo.PluginBase):
     def device_stop_comm(self, dev: indigo.Device = None) -> None:  # noqa
         """Standard Indigo method called when a device is disabled.
 
-        Joins the device's update thread, removes it from the managed devices list, and
+        Drains the device's pending refresh work, removes it from the managed devices list, and
         updates the device's state icon to reflect the disabled condition.
 
         Args:
@@ -254,13 +325,16 @@ class Plugin(indigo.PluginBase):
         """
         # =============================================================================
         try:
-            # Join the related thread. There must be a timeout set because the threads may never terminate on their own.
-            self.managed_devices[dev.id].dev_thread.join(0.25)
+            # Drop any queued refreshes and give an in-flight refresh a moment to finish. There must be a timeout set
+            # because a slow source may not return for some time.
+            self.managed_devices[dev.id].stop()
 
             # Delete the device from the list of managed devices.
             self.changing_managed_devices = True
             del self.managed_devices[dev.id]
             self.changing_managed_devices = False
+            self.unschedule_device(dev.id)
+            self.session_pool.release(dev.id)
 
             # Update the device's icon to reflect the stopped condition.
             dev.setErrorStateOnServer("")
@@ -294,38 +368,25 @@ class Plugin(indigo.PluginBase):
         Returns:
             list: The updated list of Indigo device state dictionaries.
         """
-        def parse_the_states(k: str, v) -> list:
+        def parse_the_states(k: str, v, state_type: str = None) -> list:
             b_key = f"{k}_bool"  # boolean key
             u_key = f"{k}"
 
-            try:
-                # Integers
-                _ = int(v)  # Try int; if it fails move on to the next one.
-                state_list.append(self.getDeviceStateDictForNumberType(u_key, u_key, u_key))
-            except (TypeError, ValueError):
-                try:
-                    # Floats
-                    _ = float(v)  # Try float; if it fails move on to the next one.
+            # Bools - we create a state for the original data (in string form) and for the boolean representation.
+            match state_type or PluginDevice.infer_state_type(v):
+                case 'number':
                     state_list.append(self.getDeviceStateDictForNumberType(u_key, u_key, u_key))
-                except (TypeError, ValueError):
-                    try:
-                        # Bools - we create a state for the original data (in string form) and for the boolean
-                        # representation.
-                        match v.lower():
-                            case 'on' | 'off' | 'open' | 'locked' | 'up' | 'armed' | 'closed' | 'unlocked' | 'down' | \
-                                 'disarmed':
-                                state_list.append(self.getDeviceStateDictForBoolOnOffType(u_key, u_key, u_key))
-                                state_list.append(self.getDeviceStateDictForBoolOnOffType(b_key, b_key, b_key))
-                            case 'yes' | 'no':
-                                state_list.append(self.getDeviceStateDictForBoolYesNoType(u_key, u_key, u_key))
-                                state_list.append(self.getDeviceStateDictForBoolYesNoType(b_key, b_key, b_key))
-                            case 'true' | 'false':
-                                state_list.append(self.getDeviceStateDictForBoolTrueFalseType(u_key, u_key, u_key))
-                                state_list.append(self.getDeviceStateDictForBoolTrueFalseType(b_key, b_key, b_key))
-                            case _:
-                                state_list.append(self.getDeviceStateDictForStringType(u_key, u_key, u_key))
-                    except (AttributeError, TypeError, ValueError):
-                        state_list.append(self.getDeviceStateDictForStringType(u_key, u_key, u_key))
+                case 'onoff':
+                    state_list.append(self.getDeviceStateDictForBoolOnOffType(u_key, u_key, u_key))
+                    state_list.append(self.getDeviceStateDictForBoolOnOffType(b_key, b_key, b_key))
+                case 'yesno':
+                    state_list.append(self.getDeviceStateDictForBoolYesNoType(u_key, u_key, u_key))
+                    state_list.append(self.getDeviceStateDictForBoolYesNoType(b_key, b_key, b_key))
+                case 'truefalse':
+                    state_list.append(self.getDeviceStateDictForBoolTrueFalseType(u_key, u_key, u_key))
+                    state_list.append(self.getDeviceStateDictForBoolTrueFalseType(b_key, b_key, b_key))
+                case _:
+                    state_list.append(self.getDeviceStateDictForStringType(u_key, u_key, u_key))
 
             return state_list
 
@@ -360,11 +421,13 @@ class Plugin(indigo.PluginBase):
                         value = dev.states[key]
                         state_list = parse_the_states(k=key, v=value)
 
-                # If there are managed devices, return the keys that are in finalDict.
+                # If there are managed devices, return the keys that are in finalDict. Types come from the device's
+                # type-schema cache, so only new or changed values are probed.
                 else:
-                    for key in sorted(self.managed_devices[dev.id].final_dict):
-                        value = self.managed_devices[dev.id].final_dict[key]
-                        state_list = parse_the_states(k=key, v=value)
+                    plugin_device = self.managed_devices[dev.id]
+                    for key in sorted(plugin_device.final_dict):
+                        value = plugin_device.final_dict[key]
+                        state_list = parse_the_states(k=key, v=value, state_type=plugin_device.state_type(key, value))
 
             return state_list
         except Exception:
@@ -507,39 +570,21 @@ class Plugin(indigo.PluginBase):
     def run_concurrent_thread(self) -> None:  # noqa
         """Standard Indigo method that runs continuously while the plugin is enabled.
 
-        Iterates managed devices every two seconds to check whether each device is due for a
-        data refresh, dispatches updates to device queues, processes triggers, and handles
-        excessive bad calls by disabling the offending device.
+        Waits until the earliest device in the refresh schedule is due (or an earlier one is
+        scheduled, and at most ``SCHEDULER_MAX_SLEEP`` seconds), dispatches only the devices that
+        are due, and processes triggers.
         """
         self.sleep(1)
 
         try:
             while not self.plugin_is_shutting_down:
-                # If the dict of managed devices is not being changed.
-                if not self.changing_managed_devices and not self.prepare_to_sleep:
-                    # Iterate devices to see if an update is required.
-
-                    for dev_id in self.managed_devices:
-                        dev = self.managed_devices[dev_id].device
-
-                        # 2019-12-22 DaveL17
-                        # If device name has changed in Indigo, update the copy in managedDevices.
-                        if dev.name != indigo.devices[dev_id].name:
-                            self.managed_devices[dev_id].device.name = indigo.devices[dev_id].name
-
-                        # If a device has failed too many times, disable it and notify the user.
-                        retries = int(dev.pluginProps.get('maxRetries', 10))
-                        if retries != -1 and self.managed_devices[dev_id].bad_calls >= retries:
-                            self._process_bad_calls(dev, retries)
-
-                        # If _time_to_update returns True, add device to its queue.
-                        else:
-                            if self._time_to_update(dev):
-                                self.logger.debug("Time to update: [%s]" % dev.name)
-                                self.managed_devices[dev_id].queue.put(dev)
+                if not self.prepare_to_sleep:
+                    for dev_id in self._pop_due_devices():
+                        self._dispatch_scheduled_device(dev_id)
 
                 self._process_triggers()
-                self.sleep(2)
+                self.session_pool.expire_idle()
+                self._wait_until_next_due()
 
         except self.StopThread:
             self.indigo_log_handler.setLevel(20)
@@ -569,11 +614,32 @@ class Plugin(indigo.PluginBase):
         indigo.server.log("GhostXML Plugin devices do not support the ping function.")
         return {'result': 'Failure'}
 
+    # =============================================================================
+    def stopConcurrentThread(self) -> None:  # noqa
+        """Standard Indigo method called to stop the concurrent thread.
+
+        Wakes the refresh scheduler so that it stops without waiting for the next due device.
+        """
+        indigo.PluginBase.stopConcurrentThread(self)
+        with self.schedule_changed:
+            self.schedule_changed.notify_all()
+
     # =============================================================================
     def shutdown(self) -> None:
         """Standard Indigo method called when the plugin is disabled.
         """
         self.plugin_is_shutting_down = True
+        for plugin_device in list(self.managed_devices.values()):
+            plugin_device.stop(timeout=0)
+        self.fetch_executor.shutdown(wait=False, cancel_futures=True)
+        if self.async_engine:
+            self.async_engine.close()
+            self.async_engine = None
+        if self.curl_engine:
+            self.curl_engine.close()
+            self.curl_engine = None
+        self.session_pool.close_all()
+        self.host_limiter.close()
         self.indigo_log_handler.setLevel(20)
         self.logger.info('Shutdown complete.')
 
@@ -619,6 +685,103 @@ class Plugin(indigo.PluginBase):
         """
         self.logger.info("Trigger [%s] stopped." % trigger.name)
 
+    # =============================================================================
+    @staticmethod
+    def validate_prefs_config_ui(values_dict: indigo.Dict = None) -> tuple:  # noqa
+        """Standard Indigo method called to validate the plugin preferences dialog on close.
+
+        Args:
+            values_dict (indigo.Dict): The dialog field values to validate.
+
+        Returns:
+            tuple: ``(True, values_dict)`` if valid, or ``(False, values_dict, error_msg_dict)``
+            with populated errors if validation fails.
+        """
+        error_msg_dict = indigo.Dict()
+
+        # The number of fetch workers must be an integer within the supported range.
+        try:
+            fetch_workers = int(values_dict['fetchWorkers'])
+            if not FETCH_WORKERS_MIN <= fetch_workers <= FETCH_WORKERS_MAX:
+                error_msg_dict['fetchWorkers'] = (
+                    f"The number of fetch workers must be between {FETCH_WORKERS_MIN} and {FETCH_WORKERS_MAX}."
+                )
+        except (KeyError, ValueError):
+            error_msg_dict['fetchWorkers'] = "The number of fetch workers must be an integer."
+
+        # The session pool settings must be positive integers.
+        for key, label in (('sessionPoolSize', "pool size"), ('sessionIdleExpiry', "idle expiry")):
+            try:
+                if int(values_dict.get(key, kDefaultPluginPrefs[key])) < 1:
+                    error_msg_dict[key] = f"The session {label} must be greater than zero."
+            except ValueError:
+                error_msg_dict[key] = f"The session {label} must be an integer."
+
+        # The parse limits must be positive integers.
+        for key, label in (('parseMaxDepth', "maximum nesting depth"), ('parseMaxKeys', "maximum number of values")):
+            try:
+                if int(values_dict.get(key, kDefaultPluginPrefs[key])) < 1:
+                    error_msg_dict[key] = f"The {label} must be greater than zero."
+            except ValueError:
+                error_msg_dict[key] = f"The {label} must be an integer."
+
+        # The per-host limits must be zero (no limit) or more, and the overrides must be host=concurrency[/rate].
+        try:
+            if int(values_dict.get('hostMaxConcurrent', kDefaultPluginPrefs['hostMaxConcurrent'])) < 0:
+                error_msg_dict['hostMaxConcurrent'] = "The per-host request limit must be zero or greater."
+        except ValueError:
+            error_msg_dict['hostMaxConcurrent'] = "The per-host request limit must be an integer."
+
+        try:
+            if float(values_dict.get('hostRateLimit', kDefaultPluginPrefs['hostRateLimit'])) < 0:
+                error_msg_dict['hostRateLimit'] = "The per-host rate limit must be zero or greater."
+        except ValueError:
+            error_msg_dict['hostRateLimit'] = "The per-host rate limit must be a number."
+
+        try:
+            parse_overrides(values_dict.get('hostOverrides', ""))
+        except ValueError as err:
+            error_msg_dict['hostOverrides'] = str(err)
+
+        # The coalescing window must be zero (share only requests in flight) or more.
+        try:
+            if float(values_dict.get('coalesceWindow', kDefaultPluginPrefs['coalesceWindow'])) < 0:
+                error_msg_dict['coalesceWindow'] = "The shared fetch window must be zero or greater."
+        except ValueError:
+            error_msg_dict['coalesceWindow'] = "The shared fetch window must be a number."
+
+        # The token TTL must be zero (don't cache tokens without an expiry) or more.
+        try:
+            if int(values_dict.get('tokenTtl', kDefaultPluginPrefs['tokenTtl'])) < 0:
+                error_msg_dict['tokenTtl'] = "The token lifetime must be zero or greater."
+        except ValueError:
+            error_msg_dict['tokenTtl'] = "The token lifetime must be an integer."
+
+        # The backoff cap must be zero (no backoff) or more, and the schedule jitter a percentage.
+        try:
+            if int(values_dict.get('backoffMax', kDefaultPluginPrefs['backoffMax'])) < 0:
+                error_msg_dict['backoffMax'] = "The maximum backoff must be zero or greater."
+        except ValueError:
+            error_msg_dict['backoffMax'] = "The maximum backoff must be an integer."
+
+        try:
+            if not 0 <= int(values_dict.get('scheduleJitter', kDefaultPluginPrefs['scheduleJitter'])) <= 100:
+                error_msg_dict['scheduleJitter'] = "The schedule jitter must be between 0 and 100 percent."
+        except ValueError:
+            error_msg_dict['scheduleJitter'] = "The schedule jitter must be an integer."
+
+        # The async concurrency limit must be a positive integer.
+        try:
+            if int(values_dict.get('asyncConcurrency', kDefaultPluginPrefs['asyncConcurrency'])) < 1:
+                error_msg_dict['asyncConcurrency'] = "The concurrency limit must be greater than zero."
+        except ValueError:
+            error_msg_dict['asyncConcurrency'] = "The concurrency limit must be an integer."
+
+        if len(error_msg_dict) > 0:
+            return False, values_dict, error_msg_dict
+
+        return True, values_dict
+
     # =============================================================================
     @staticmethod
     def validate_device_config_ui(values_dict: indigo.Dict = None, type_id: str = "", dev_id: int = 0) -> tuple:  # noqa
@@ -697,6 +860,12 @@ class Plugin(indigo.PluginBase):
         except ValueError:
             error_msg_dict['maxRetries'] = "The max retries value must be an integer."
 
+        # The response size limit must be a number of megabytes, zero or more.
+        try:
+            max_bytes_for(values_dict.get('maxResponseSize', 50))
+        except ValueError:
+            error_msg_dict['maxResponseSize'] = "The max response size must be a number of megabytes (0 for no limit)."
+
         # Test the source URL/Path for proper prefix.
         if not url:
             error_msg_dict['sourceXML'] = "A URL/Path is required."
@@ -720,6 +889,12 @@ class Plugin(indigo.PluginBase):
             if values_dict['digestPass'].replace(" ", "") == "":
                 error_msg_dict['digestPass'] = "You must supply a password."
 
+        # State selectors must compile for the device's feed type.
+        try:
+            StateSelectors(values_dict.get('stateSelectors', ""), values_dict.get('feedType', "XML"))
+        except ValueError as err:
+            error_msg_dict['stateSelectors'] = str(err)
+
         # Test the variable substitution IDs and indexes for URL subs. If substitutions aren't enabled, we can skip
         # this bit.
         if values_dict['doSubs']:
@@ -769,11 +944,15 @@ class Plugin(indigo.PluginBase):
             values_dict (indigo.Dict): The action values dict. Must include ``deviceId`` and
                 ``props['new_refresh_freq']``.
         """
-        dev       = self.managed_devices[values_dict.deviceId].device
-        new_props = dev.pluginProps
+        plugin_device = self.managed_devices[values_dict.deviceId]
+        dev           = plugin_device.device
+        new_props     = dev.pluginProps
         new_props['refreshFreq'] = int(values_dict.props['new_refresh_freq'])
         dev.replacePluginPropsOnServer(new_props)
 
+        # Count the new frequency from the device's last refresh rather than from now.
+        self.schedule_device(dev.id, due=self._initial_due_time(dev, plugin_device.last_dispatch or None))
+
     # =============================================================================
     @staticmethod
     def comms_kill_all() -> bool:
@@ -833,11 +1012,204 @@ class Plugin(indigo.PluginBase):
         self.logger.info(f"{'Indigo version:':<31} {indigo.server.version}")
         sys_version = sys.version.replace('\n', '')
         self.logger.info(f"{'Python version:':<31} {sys_version}")
-        self.logger.info(f"{'Flatdict version:':<31} {flatdict.__version__}")
         self.logger.info(f"{'Process ID:':<31} {os.getpid()}")
         self.logger.info("=" * 130)
         self.indigo_log_handler.setLevel(self.debug_level)
 
+    # =============================================================================
+    @staticmethod
+    def _fetch_worker_count(prefs: indigo.Dict = None) -> int:
+        """Return the number of shared fetch worker threads configured in plugin preferences.
+
+        Falls back to the default worker count if the preference is missing or invalid.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            int: The number of fetch workers, bounded to ``FETCH_WORKERS_MIN``..``FETCH_WORKERS_MAX``.
+        """
+        try:
+            workers = int(prefs.get('fetchWorkers', kDefaultPluginPrefs['fetchWorkers']))
+        except (TypeError, ValueError):
+            workers = int(kDefaultPluginPrefs['fetchWorkers'])
+
+        return max(FETCH_WORKERS_MIN, min(workers, FETCH_WORKERS_MAX))
+
+    # =============================================================================
+    @staticmethod
+    def _session_pool_settings(prefs: indigo.Dict = None) -> dict:
+        """Return the HTTP session pool settings from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            dict: The ``pool_size`` and ``idle_expiry`` keyword arguments for ``SessionPool``.
+        """
+        settings = {}
+        for arg, key in (('pool_size', 'sessionPoolSize'), ('idle_expiry', 'sessionIdleExpiry')):
+            try:
+                settings[arg] = max(1, int(prefs.get(key, kDefaultPluginPrefs[key])))
+            except (TypeError, ValueError):
+                settings[arg] = int(kDefaultPluginPrefs[key])
+
+        return settings
+
+    # =============================================================================
+    @staticmethod
+    def _coalesce_window(prefs: indigo.Dict = None) -> float:
+        """Return the number of seconds a completed fetch or parse is shared, from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            float: The freshness window for ``FetchCoalescer``.
+        """
+        try:
+            return max(0.0, float(prefs.get('coalesceWindow', kDefaultPluginPrefs['coalesceWindow'])))
+        except (TypeError, ValueError):
+            return float(kDefaultPluginPrefs['coalesceWindow'])
+
+    # =============================================================================
+    @staticmethod
+    def _token_ttl(prefs: indigo.Dict = None) -> int:
+        """Return how long an access token without an expiry is cached, from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            int: The TTL in seconds for ``TokenCache``.
+        """
+        try:
+            return max(0, int(prefs.get('tokenTtl', kDefaultPluginPrefs['tokenTtl'])))
+        except (TypeError, ValueError):
+            return int(kDefaultPluginPrefs['tokenTtl'])
+
+    # =============================================================================
+    @staticmethod
+    def _host_limit_settings(prefs: indigo.Dict = None) -> dict:
+        """Return the per-host request limits from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            dict: The ``max_concurrent``, ``rate`` and ``overrides`` keyword arguments for ``HostLimiter``.
+        """
+        try:
+            max_concurrent = max(0, int(prefs.get('hostMaxConcurrent', kDefaultPluginPrefs['hostMaxConcurrent'])))
+        except (TypeError, ValueError):
+            max_concurrent = int(kDefaultPluginPrefs['hostMaxConcurrent'])
+
+        try:
+            rate = max(0.0, float(prefs.get('hostRateLimit', kDefaultPluginPrefs['hostRateLimit'])))
+        except (TypeError, ValueError):
+            rate = float(kDefaultPluginPrefs['hostRateLimit'])
+
+        try:
+            overrides = parse_overrides(prefs.get('hostOverrides', ""))
+        except ValueError:
+            overrides = {}
+
+        return {'max_concurrent': max_concurrent, 'rate': rate, 'overrides': overrides}
+
+    # =============================================================================
+    @staticmethod
+    def _parse_limits(prefs: indigo.Dict = None) -> dict:
+        """Return the payload parse limits from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            dict: The ``max_depth`` and ``max_keys`` keyword arguments for the flatteners.
+        """
+        limits = {}
+        for arg, key in (('max_depth', 'parseMaxDepth'), ('max_keys', 'parseMaxKeys')):
+            try:
+                limits[arg] = max(1, int(prefs.get(key, kDefaultPluginPrefs[key])))
+            except (TypeError, ValueError):
+                limits[arg] = int(kDefaultPluginPrefs[key])
+
+        return limits
+
+    # =============================================================================
+    @staticmethod
+    def _schedule_settings(prefs: indigo.Dict = None) -> dict:
+        """Return the refresh schedule settings from plugin preferences.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+
+        Returns:
+            dict: ``backoff_max``, the longest interval (in seconds) a failing device backs off to (zero for no
+            backoff), and ``jitter``, the largest random delay added to each interval (as a fraction of it).
+        """
+        try:
+            backoff_max = max(0, int(prefs.get('backoffMax', kDefaultPluginPrefs['backoffMax'])))
+        except (TypeError, ValueError):
+            backoff_max = int(kDefaultPluginPrefs['backoffMax'])
+
+        try:
+            jitter = max(0, min(int(prefs.get('scheduleJitter', kDefaultPluginPrefs['scheduleJitter'])), 100))
+        except (TypeError, ValueError):
+            jitter = int(kDefaultPluginPrefs['scheduleJitter'])
+
+        return {'backoff_max': backoff_max, 'jitter': jitter / 100}
+
+    # =============================================================================
+    def _configure_async_engine(self, prefs: indigo.Dict = None) -> None:
+        """Start, restart or stop the asyncio fetch engine to match plugin preferences.
+
+        If the engine is selected but can't be started (for example, because httpx is not
+        installed), the plugin falls back to making requests on the fetch worker threads.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+        """
+        use_async = prefs.get('fetchEngine', kDefaultPluginPrefs['fetchEngine']) == 'asyncio'
+        try:
+            concurrency = max(1, int(prefs.get('asyncConcurrency', kDefaultPluginPrefs['asyncConcurrency'])))
+        except (TypeError, ValueError):
+            concurrency = int(kDefaultPluginPrefs['asyncConcurrency'])
+
+        if self.async_engine and (not use_async or self.async_engine.concurrency != concurrency):
+            self.async_engine.close()
+            self.async_engine = None
+
+        if use_async and not self.async_engine:
+            try:
+                self.async_engine = AsyncFetchEngine(concurrency=concurrency, token_cache=self.token_cache)
+                self.logger.info(f"Using the asyncio fetch engine ({concurrency} concurrent requests).")
+            except ImportError as err:
+                self.logger.warning(f"{err} Falling back to the thread fetch engine.")
+
+    # =============================================================================
+    def _configure_curl_engine(self, prefs: indigo.Dict = None) -> None:
+        """Start or stop the libcurl Raw Curl engine to match plugin preferences.
+
+        If the engine is selected but can't be started (for example, because pycurl is not
+        installed), Raw Curl requests are made in-process with the requests library instead.
+
+        Args:
+            prefs (indigo.Dict): The plugin preferences (or prefs dialog values) to read.
+        """
+        use_libcurl = prefs.get('curlEngine', kDefaultPluginPrefs['curlEngine']) == 'libcurl'
+
+        if self.curl_engine and not use_libcurl:
+            self.curl_engine.close()
+            self.curl_engine = None
+
+        if use_libcurl and not self.curl_engine:
+            try:
+                self.curl_engine = CurlMultiEngine()
+                self.logger.info("Using the libcurl engine for Raw Curl devices.")
+            except ImportError as err:
+                self.logger.warning(f"{err} Falling back to in-process requests.")
+
     # =============================================================================
     def _process_bad_calls(self, dev: indigo.Device = None, retries: int = 0) -> bool | None:
         """Disable a device that has exceeded its maximum number of consecutive failed calls.
@@ -929,8 +1301,8 @@ class Plugin(indigo.PluginBase):
     def refresh_data(self) -> bool:
         """Initiate a data refresh for all managed plugin devices.
 
-        Adds each managed device to its own update queue. If no devices are active, logs a
-        warning and returns early.
+        Dispatches each managed device to the shared fetch executor. If no devices are active,
+        logs a warning and returns early.
 
         Returns:
             bool: True on success, False if a KeyError occurs during iteration.
@@ -944,7 +1316,8 @@ class Plugin(indigo.PluginBase):
         try:
             for dev_id in self.managed_devices:
                 dev = self.managed_devices[dev_id].device
-                self.managed_devices[dev_id].queue.put(dev)
+                self.managed_devices[dev_id].dispatch(dev)
+                self.schedule_device(dev_id)
 
             return True
 
@@ -960,45 +1333,203 @@ class Plugin(indigo.PluginBase):
             values_dict (indigo.Dict): The action values dictionary. Must include ``deviceId``.
         """
         dev = self.managed_devices[values_dict.deviceId].device
-        self.managed_devices[dev.id].queue.put(dev)
+        self.managed_devices[dev.id].dispatch(dev)
+        self.schedule_device(dev.id)
 
     # =============================================================================
-    @staticmethod
-    def _time_to_update(dev: indigo.Device = None) -> bool:  # noqa
-        """Determine whether a device is due for a data refresh.
+    # ============================== Refresh Schedule =============================
+    # =============================================================================
+    def schedule_device(self, dev_id: int = 0, due: float | None = None) -> None:
+        """Set the time at which a managed device is next due for a refresh.
 
-        Compares the time elapsed since the device's last update against its configured refresh
-        frequency. Returns False if the device has no timestamp, is disabled, or is not yet due.
+        Any earlier entry for the device is superseded. Devices set to manual refresh (a refresh
+        frequency of zero) are removed from the schedule.
+
+        Args:
+            dev_id (int): The Indigo device ID.
+            due (float | None): The epoch time the device is due. If None, the device is due one
+                refresh interval (backed off if its recent refreshes failed) after its last dispatch.
+        """
+        plugin_device = self.managed_devices.get(dev_id)
+        if plugin_device is None:
+            return
+
+        if due is None:
+            due = self._next_due_time(
+                plugin_device.device, plugin_device.last_dispatch or t.time(), plugin_device.bad_calls
+            )
+
+        with self.schedule_lock:
+            if due is None:
+                self.next_due.pop(dev_id, None)
+                return
+            self.next_due[dev_id] = due
+            heapq.heappush(self.schedule, (due, dev_id))
+            if self.schedule[0] == (due, dev_id):
+                # The device is now the first due; wake the scheduler if it is waiting for a later one.
+                self.schedule_changed.notify_all()
+
+    # =============================================================================
+    def unschedule_device(self, dev_id: int = 0) -> None:
+        """Remove a device from the refresh schedule.
+
+        The device's heap entry is left in place and discarded when it reaches the top.
+
+        Args:
+            dev_id (int): The Indigo device ID.
+        """
+        with self.schedule_lock:
+            self.next_due.pop(dev_id, None)
+
+    # =============================================================================
+    def _next_due_time(self, dev: indigo.Device = None, last_refresh: float = 0.0, failures: int = 0
+                       ) -> float | None:
+        """Return the time a device is next due, counting one refresh interval from ``last_refresh``.
+
+        After consecutive failures the interval doubles with each failure, up to the maximum backoff (but never below
+        the refresh frequency). A random delay of up to the schedule jitter is added to every interval so that devices
+        with the same refresh frequency drift apart instead of refreshing together.
 
         Args:
             dev (indigo.Device): The device to evaluate.
+            last_refresh (float): The epoch time of the device's last refresh.
+            failures (int): The number of consecutive failed refreshes.
 
         Returns:
-            bool: True if the device should be refreshed now, False otherwise.
+            float | None: The epoch time the device is due, or None if the device is set to
+            manual refresh.
+        """
+        refresh_freq = int(dev.pluginProps.get("refreshFreq", 300))
+        if refresh_freq <= 0:
+            return None
+
+        interval    = refresh_freq
+        backoff_max = self.schedule_settings['backoff_max']
+        if failures > 0 and backoff_max > refresh_freq:
+            interval = min(refresh_freq * BACKOFF_FACTOR ** min(failures, BACKOFF_MAX_EXPONENT), backoff_max)
+
+        return last_refresh + interval * (1 + random.uniform(0, self.schedule_settings['jitter']))
+
+    # =============================================================================
+    def _initial_due_time(self, dev: indigo.Device = None, last_refresh: float | None = None) -> float | None:
+        """Return the time a newly managed (or reconfigured) device is first due for a refresh.
+
+        Unless ``last_refresh`` is given, uses the device's ``deviceTimestamp`` state so that a
+        device which refreshed recently isn't polled again on plugin restart. Overdue devices
+        are due immediately.
+
+        Args:
+            dev (indigo.Device): The device to evaluate.
+            last_refresh (float | None): The epoch time of the device's last refresh, if known.
+
+        Returns:
+            float | None: The epoch time the device is due, or None if the device is set to
+            manual refresh.
+        """
+        if last_refresh is None:
+            try:
+                last_refresh = float(dev.states.get("deviceTimestamp", 0) or 0)
+            except (TypeError, ValueError):
+                last_refresh = 0.0
+
+        due = self._next_due_time(dev, last_refresh)
+        if due is None:
+            return None
+
+        return max(due, t.time())
+
+    # =============================================================================
+    def _pop_due_devices(self) -> list:
+        """Remove and return the IDs of all devices whose refresh is due.
+
+        Returns:
+            list: The IDs of the due devices, earliest first.
+        """
+        now = t.time()
+        due_devices = []
+
+        with self.schedule_lock:
+            while self.schedule and self.schedule[0][0] <= now:
+                due, dev_id = heapq.heappop(self.schedule)
+                # Skip stale entries left behind when a device was rescheduled or removed.
+                if self.next_due.get(dev_id) == due:
+                    del self.next_due[dev_id]
+                    due_devices.append(dev_id)
+
+        return due_devices
+
+    # =============================================================================
+    def _wait_until_next_due(self) -> None:
+        """Wait until the earliest device in the schedule is due.
+
+        ``schedule_device()`` ends the wait early when it schedules a device ahead of the earliest
+        one, and ``stopConcurrentThread()`` when the plugin stops. The wait is capped at
+        ``SCHEDULER_MAX_SLEEP`` so that triggers and idle sessions are still checked.
+
+        Raises:
+            StopThread: If Indigo has asked the concurrent thread to stop.
+        """
+        with self.schedule_changed:
+            delay = self.schedule[0][0] - t.time() if self.schedule else SCHEDULER_MAX_SLEEP
+            if delay > 0 and not self.stopThread:
+                self.schedule_changed.wait(min(delay, SCHEDULER_MAX_SLEEP))
+
+        if self.stopThread:
+            raise self.StopThread
+
+    # =============================================================================
+    def _dispatch_scheduled_device(self, dev_id: int = 0) -> None:
+        """Dispatch a device whose refresh is due and schedule its next refresh.
+
+        A device that has failed too many times is disabled instead of refreshed.
+
+        Args:
+            dev_id (int): The Indigo device ID.
         """
-        # 2022-02-15 DaveL17 - Refactored for simplicity. See GitHub for prior code.
-        # If device has a deviceTimestamp key and is enabled, test to see if the device is ready for a refresh.
-        if "deviceTimestamp" in dev.states and dev.enabled:
-            t_since_upd = int(t.time() - float(dev.states["deviceTimestamp"]))
+        plugin_device = self.managed_devices.get(dev_id)
+        if plugin_device is None:
+            return
 
-            if int(t_since_upd) > int(dev.pluginProps.get("refreshFreq", 300)) > 0:
-                return True
+        dev = plugin_device.device
 
-        # If the device does not have a timestamp key, is not ready for a refresh, or is disabled.
-        return False
+        # If a device has failed too many times, disable it and notify the user.
+        retries = int(dev.pluginProps.get('maxRetries', 10))
+        if retries != -1 and plugin_device.bad_calls >= retries:
+            self._process_bad_calls(dev, retries)
+            return
 
+        # 2019-12-22 DaveL17
+        # If device name has changed in Indigo, update the copy in managedDevices.
+        try:
+            dev.name = indigo.devices[dev_id].name
+        except KeyError:
+            return
+
+        self.logger.debug("Time to update: [%s]" % dev.name)
+        plugin_device.dispatch(dev)
+        self.schedule_device(dev_id)
 
 # =============================================================================
 class PluginDevice:
-    """Represents a single managed GhostXML device and its associated update thread and queue.
+    """Represents a single managed GhostXML device and its pending refresh work.
 
-    Stores the Indigo device instance, raw and parsed data, bad-call counter, and the
-    per-device Queue/Thread pair used to dispatch asynchronous data refresh tasks.
+    Stores the Indigo device instance, raw and parsed data, and bad-call counter. Refresh tasks
+    are queued per device and run on the plugin's shared fetch executor; at most one task per
+    device runs at a time so refreshes of the same device never overlap.
     """
 
+    # Key sanitizer tables, built once from constants.py. Multi-character replacements go through a single regex pass;
+    # single-character replacements and removals go through str.translate(). This is equivalent to the original
+    # replace-then-remove passes because no multi-character token contains a single-character one.
+    _KEY_REPLACEMENTS = {k: v for k, v in CHARS_TO_REPLACE.items() if len(k) > 1}
+    _KEY_PATTERN      = re.compile("|".join(re.escape(k) for k in _KEY_REPLACEMENTS))
+    _KEY_TABLE        = str.maketrans(
+        {**{k: v for k, v in CHARS_TO_REPLACE.items() if len(k) == 1}, **{c: None for c in CHARS_TO_REMOVE}}
+    )
+
     # =============================================================================
     def __init__(self, plugin: Plugin, device: indigo.Device) -> None:
-        """Initialize the PluginDevice, set up instance attributes, and start the update thread.
+        """Initialize the PluginDevice and set up instance attributes.
 
         Args:
             plugin (Plugin): The parent Plugin instance.
@@ -1009,183 +1540,497 @@ class PluginDevice:
         self.device            = device
         self.host_plugin       = plugin
         self.bad_calls         = 0
+        self.last_dispatch     = 0.0  # Epoch time of the device's most recent dispatch.
         self.final_dict        = {}
-        self.json_raw_data     = ''
         self.raw_data          = ''
         self.old_device_states = {}
+        self.validators         = {}  # ETag/Last-Modified, file mtime/size and payload digest of the last good refresh.
+        self.skipped_parses     = 0   # Refreshes skipped because the payload matched the last good refresh.
+        self.pushed_states      = {}  # key: (type, value, uiValue) last sent to the server by parse_state_values.
+        self.state_fingerprint  = None  # Key set (and inferred types) behind the device's current state list.
+        self.state_types        = {}  # key: (value type, inferred type, value) - the type cache for Real Type devices.
+        self.key_collisions     = set()  # Cleaned keys already reported as produced by more than one raw key.
+        self.pending_validators = {}  # Validators from the current refresh, kept if it succeeds.
+        self.selectors          = self._compile_selectors(device)
+        self.key_filters        = KeyFilters(
+            device.pluginProps.get('stateInclude', ""), device.pluginProps.get('stateExclude', "")
+        )
 
-        self.queue      = Queue(maxsize=0)
-        self.dev_thread = threading.Thread(name=self.device.id, target=self._initiate_device_update, args=(self.queue,))
-        self.dev_thread.start()
+        self.queue   = Queue(maxsize=0)
+        self.busy    = False  # True while a task for this device is on the fetch executor.
+        self.stopped = False
+        self.held_host = ""  # The host whose request slot the running task holds (see HostLimiter).
+        self.idle    = threading.Event()
+        self.idle.set()
+        self._lock   = threading.Lock()  # Guards the task queue and busy flag, and the type cache (state_types).
 
         self.plugin_device_is_initializing = False
         self.logger = logging.getLogger("Plugin")
 
+    # =============================================================================
+    @staticmethod
+    def _compile_selectors(dev: indigo.Device = None) -> StateSelectors:
+        """Compile the device's state selectors once, when the device is started.
+
+        The config dialog rejects selectors that won't compile, so an error here means the props were changed some
+        other way; the device is then refreshed without selectors rather than not at all.
+
+        Args:
+            dev (indigo.Device): The Indigo device.
+
+        Returns:
+            StateSelectors: The compiled selectors (empty if the device has none).
+        """
+        feed_type = dev.pluginProps.get('feedType', "XML")
+        try:
+            return StateSelectors(dev.pluginProps.get('stateSelectors', ""), feed_type)
+        except ValueError as err:
+            logging.getLogger("Plugin").warning(f"[{dev.name}] State selectors ignored: {err}")
+            return StateSelectors("", feed_type)
+
     # =============================================================================
     def __str__(self) -> str:
         """Return a formatted string representation of the PluginDevice.
 
         Returns:
-            str: A string showing the device ID, thread, and queue information.
+            str: A string showing the device ID, busy flag, and number of queued tasks.
         """
-        return f"[{self.device.id:>11}] {self.dev_thread:<46} {self.queue:<40}"
+        return f"[{self.device.id:>11}] busy: {self.busy!s:<5} queued: {self.queue.qsize():<4}"
 
     # =============================================================================
-    def _initiate_device_update(self, update_queue: Queue = None) -> None:
-        """Keep the device thread alive and dispatch updates from the queue.
+    def dispatch(self, dev: indigo.Device = None) -> None:
+        """Queue a refresh of the device and hand it to the shared fetch executor.
+
+        If a refresh of this device is already running, the task waits in the device's queue
+        and is picked up as soon as the running one finishes.
+
+        Args:
+            dev (indigo.Device): The Indigo device to refresh.
+        """
+        with self._lock:
+            if self.stopped:
+                return
+            self.last_dispatch = t.time()
+            self.queue.put(dev)
+            if self.busy:
+                return
+            self.busy = True
+            self.idle.clear()
+
+        self._run_next()
 
-        Runs as the device's background thread target. Polls the queue every 250ms and calls
-        ``refresh_data_for_dev()`` for each task retrieved. Acts as a bridge between the Plugin
-        class's main loop and the per-device refresh logic.
+    # =============================================================================
+    def stop(self, timeout: float = 1.0) -> bool:
+        """Drop any queued refreshes and wait for an in-flight refresh to finish.
 
         Args:
-            update_queue (Queue): The queue from which device refresh tasks are consumed.
+            timeout (float): The number of seconds to wait for an in-flight refresh.
+
+        Returns:
+            bool: True if the device has no refresh running, False if the wait timed out.
         """
-        while True:
-            t.sleep(0.25)
-            while not update_queue.empty():
+        with self._lock:
+            self.stopped = True
+            while True:
                 try:
-                    # Set the class' debug level to the level set for the main plugin thread--otherwise, it will stay
-                    # initiated at 5. We do this here in case the main plugin logger level has changed.
-                    self.logger.setLevel(self.host_plugin.debug_level)
-                    task = update_queue.get()
-                    self.refresh_data_for_dev(task)
-                except Exception:  # noqa - handler is inside the loop so one failure doesn't kill the thread.
-                    self.logger.exception("General exception:")
+                    self.queue.get_nowait()
+                except Empty:
+                    break
+
+        return self.idle.wait(timeout)
+
+    # =============================================================================
+    def _run_next(self) -> None:
+        """Submit the device's next queued task to the fetch executor.
+
+        Clears the busy flag when the queue is empty so the next ``dispatch()`` starts a new
+        chain.
+        """
+        with self._lock:
+            try:
+                task = self.queue.get_nowait()
+            except Empty:
+                self.busy = False
+                self.idle.set()
+                return
+
+        try:
+            request = self.build_request(task)
+        except Exception:  # noqa - the thread path reports the problem.
+            request = None
+
+        # The task waits (without holding a fetch worker) until the source's host is within its request limits.
+        limiter = self.host_plugin.host_limiter
+        limiter.run(limiter.host_of(request), lambda held_host: self._start_task(task, request, held_host))
+
+    # =============================================================================
+    def _start_task(self, task: indigo.Device = None, request: dict = None, held_host: str = "") -> None:
+        """Start a refresh task once its host has room for the request.
+
+        Args:
+            task (indigo.Device): The Indigo device to refresh.
+            request (dict): The request description, or None if it couldn't be built.
+            held_host (str): The host whose request slot the task holds.
+        """
+        self.held_host = held_host
+
+        # With the async fetch engine, HTTP requests are made on the event loop and only the processing of the
+        # response takes a fetch worker.
+        engine = self.host_plugin.async_engine
+        if engine and request and request['call_type'] == "request" and not self.stopped:
+            try:
+                # Devices making the same request share it (see FetchCoalescer).
+                future = self.host_plugin.fetch_coalescer.fetch(
+                    FetchCoalescer.request_key(request), lambda: engine.submit(request)
+                )
+                future.add_done_callback(lambda fetched: self._fetched(task, fetched))
+                return
+            except Exception:  # noqa - fall back to the thread path, which reports the problem.
+                pass
+
+        # With the libcurl engine, Raw Curl transfers run on its multi handle. Commands it can't run go to the fetch
+        # workers.
+        curl_engine = self.host_plugin.curl_engine
+        if curl_engine and request and request['call_type'] == "curl" and not self.stopped:
+            try:
+                future = curl_engine.submit(request)
+                future.add_done_callback(lambda fetched: self._fetched(task, fetched))
+                return
+            except ValueError as err:
+                self.host_plugin.logger.debug("[%s] Raw Curl: not using libcurl. %s" % (task.name, err))
+
+        self._submit_task(task)
+
+    # =============================================================================
+    def _fetched(self, task: indigo.Device = None, fetched: Future = None) -> None:
+        """Free the host's request slot once the async fetch or libcurl engine has its response, then process it.
+
+        Args:
+            task (indigo.Device): The Indigo device to refresh.
+            fetched (Future): The engine's future for this refresh.
+        """
+        self._release_host()
+        self._submit_task(task, fetched)
+
+    # =============================================================================
+    def _release_host(self) -> None:
+        """Free the request slot held by the running task, if any."""
+        held_host, self.held_host = self.held_host, ""
+        if held_host:
+            self.host_plugin.host_limiter.release(held_host)
+
+    # =============================================================================
+    def _submit_task(self, task: indigo.Device = None, fetched: Future = None) -> None:
+        """Hand a refresh task to the shared fetch executor.
+
+        Args:
+            task (indigo.Device): The Indigo device to refresh.
+            fetched (Future): The async fetch or libcurl engine's future for this refresh, if any.
+        """
+        try:
+            self.host_plugin.fetch_executor.submit(self._process_task, task, fetched)
+        except RuntimeError:
+            # The executor has been shut down (plugin shutdown or a change to the number of workers).
+            self._release_host()
+            with self._lock:
+                self.busy = False
+                self.idle.set()
+
+    # =============================================================================
+    def _process_task(self, task: indigo.Device = None, fetched: Future = None) -> None:
+        """Run a single refresh task on a fetch worker, then chain the device's next task.
+
+        Acts as a bridge between the Plugin class's scheduler and the per-device refresh logic.
+
+        Args:
+            task (indigo.Device): The Indigo device to refresh.
+            fetched (Future): The async fetch or libcurl engine's future for this refresh, if any.
+        """
+        try:
+            if not self.stopped:
+                # Set the class' debug level to the level set for the main plugin thread--otherwise, it will stay
+                # initiated at 5. We do this here in case the main plugin logger level has changed.
+                self.logger.setLevel(self.host_plugin.debug_level)
+                failures = self.bad_calls
+                self.refresh_data_for_dev(task, fetched)
+
+                # Back off after a failure, or return to the normal schedule after a success.
+                if self.bad_calls != failures and not self.stopped:
+                    self.host_plugin.schedule_device(task.id)
+                    if self.bad_calls:
+                        self.logger.debug(f"[{task.name}] Backing off after {self.bad_calls} consecutive failures.")
+        except Exception:  # noqa - one failure must not stall the device's queue.
+            self.logger.exception("General exception:")
+        finally:
+            self._release_host()
+            self._run_next()
+
+    # =============================================================================
+    def build_request(self, dev: indigo.Device = None) -> dict:
+        """Resolve the device's configuration into a description of the request to make.
+
+        Applies any configured Indigo variable substitutions to the URL and raw curl commands,
+        and works out how the source is read: ``curl`` (Raw curl auth), ``file`` (a local file
+        with no auth) or ``request`` (the requests library or the async fetch engine). HTTP
+        requests carry ``If-None-Match``/``If-Modified-Since`` headers when the validators from
+        the last good refresh are known.
+
+        Args:
+            dev (indigo.Device): The Indigo device whose data source is being polled.
+
+        Returns:
+            dict: The request description.
+        """
+        auth_type  = dev.pluginProps.get('useDigest', 'None')
+        curl_array = dev.pluginProps.get('curlArray', '')
+        subber     = self.host_plugin.substitute
+        url        = dev.pluginProps['sourceXML']
+
+        # Format any needed URL substitutions
+        if dev.pluginProps.get('doSubs', False):
+            self.logger.debug("[%s] URL: %s (before substitution)" % (dev.name, url))
+            url = subber(url.replace("[A]", f"%%v:{dev.pluginProps['subA']}%%"))
+            url = subber(url.replace("[B]", f"%%v:{dev.pluginProps['subB']}%%"))
+            url = subber(url.replace("[C]", f"%%v:{dev.pluginProps['subC']}%%"))
+            url = subber(url.replace("[D]", f"%%v:{dev.pluginProps['subD']}%%"))
+            url = subber(url.replace("[E]", f"%%v:{dev.pluginProps['subE']}%%"))
+            self.logger.debug("[%s] URL: %s (after substitution)" % (dev.name, url))
+
+        # Added by DaveL17 - 2020 10 09
+        # Format any needed Raw Curl substitutions
+        if dev.pluginProps.get('curlSubs', False):
+            self.logger.debug("[%s] Raw Curl: %s (before substitution)" % (dev.name, curl_array))
+            curl_array = subber(curl_array.replace("[A]", f"%%v:{dev.pluginProps['curlSubA']}%%"))
+            curl_array = subber(curl_array.replace("[B]", f"%%v:{dev.pluginProps['curlSubB']}%%"))
+            curl_array = subber(curl_array.replace("[C]", f"%%v:{dev.pluginProps['curlSubC']}%%"))
+            curl_array = subber(curl_array.replace("[D]", f"%%v:{dev.pluginProps['curlSubD']}%%"))
+            curl_array = subber(curl_array.replace("[E]", f"%%v:{dev.pluginProps['curlSubE']}%%"))
+            self.logger.debug("[%s] Raw Curl: %s (after substitution)" % (dev.name, curl_array))
+
+        # The validators only describe the device's current states if its last refresh was good.
+        if self.bad_calls:
+            self.validators = {}
+
+        headers = {}
+        if auth_type == "Raw":
+            call_type = "curl"
+        elif auth_type not in REQUEST_AUTH_TYPES and url.startswith('file'):
+            # If the locator is a reference to a file, requests won't handle it.
+            call_type = "file"
+        else:
+            call_type = "request"
+
+            # Conditional GET: ask the server to reply 304 if the source hasn't changed since the last good refresh.
+            if 'etag' in self.validators:
+                headers['If-None-Match'] = self.validators['etag']
+            if 'last_modified' in self.validators:
+                headers['If-Modified-Since'] = self.validators['last_modified']
+
+        return {
+            'auth_type':  auth_type,
+            'call_type':  call_type,
+            'curl_array': curl_array,
+            'glob_off':   'g' if dev.pluginProps.get('disableGlobbing', False) else '',
+            'headers':    headers,
+            'max_bytes':  max_bytes_for(dev.pluginProps.get('maxResponseSize', 50)),
+            'password':   dev.pluginProps.get('digestPass', ''),
+            'timeout':    int(dev.pluginProps.get('timeout', 5)),
+            'token':      dev.pluginProps.get('token', ''),
+            'token_url':  dev.pluginProps.get('tokenUrl', ''),
+            'url':        url,
+            'username':   dev.pluginProps.get('digestUser', ''),
+        }
+
+    # =============================================================================
+    def send_request(self, request: dict = None) -> requests.Response:
+        """Make a blocking request using the device's auth method.
+
+        Requests are made on a keep-alive session shared by all devices that poll the same
+        host with the same credentials (see ``SessionPool``). The session carries the Basic,
+        Digest or Bearer authentication. The body is streamed and read within the device's size
+        limit (see ``response_limits``).
+
+        Args:
+            request (dict): The request description built by ``build_request()``.
+
+        Returns:
+            LimitedResponse: The response to the data request.
+
+        Raises:
+            ResponseTooLarge: If the response is over the device's size limit.
+        """
+        session  = self.host_plugin.session_pool.acquire(self.device.id, request)
+        timeout  = request['timeout']
+        url      = request['url']
+
+        match request['auth_type']:
+            # ===============================  Token Auth  ================================
+            # berkinet and DaveL17
+            case 'Token':
+                a_url = request['token_url']
+                key   = TokenCache.token_key(request)
+                token = self._get_token(session, request, key)
+
+                response = session.get(
+                    f"{a_url}?access_token={token}", headers=request['headers'], timeout=timeout, stream=True
+                )
+                if response.status_code == 401:
+                    # The token was revoked or expired early. Get a new one and try once more.
+                    response.close()
+                    self.host_plugin.token_cache.invalidate(key, token)
+                    token    = self._get_token(session, request, key)
+                    response = session.get(
+                        f"{a_url}?access_token={token}", headers=request['headers'], timeout=timeout, stream=True
+                    )
+            # ======================  Basic, Bearer, Digest, No Auth  =====================
+            case _:
+                response = session.get(url, headers=request['headers'], timeout=timeout, stream=True)
+
+        return load_response(response, request['max_bytes'])
+
+    # =============================================================================
+    def _get_token(self, session: requests.Session = None, request: dict = None, key: tuple = None) -> str:
+        """Return a Token device's access token, from the shared cache or the token server.
+
+        Args:
+            session (requests.Session): The session to request a new token with.
+            request (dict): The request description built by ``build_request()``.
+            key (tuple): The token cache key.
+
+        Returns:
+            str: The access token.
+        """
+        token_cache = self.host_plugin.token_cache
+        token       = token_cache.get(key)
+        if token is not None:
+            return token
+
+        # Only one device asks the token server at a time; the others use the token it gets.
+        with token_cache.lock(key):
+            token = token_cache.get(key)
+            if token is None:
+                response = session.post(
+                    request['token_url'], json={"pwd": request['password'], "remember": 1},
+                    headers={'Content-Type': 'application/json'}, timeout=request['timeout']
+                )
+                token = token_cache.store(key, response.json())
+
+        return token
+
+    # =============================================================================
+    def curl_options(self, request: dict = None) -> dict | None:
+        """Return a Raw Curl request's options if it can be made in-process.
+
+        Args:
+            request (dict): The request description built by ``build_request()``.
+
+        Returns:
+            dict | None: The parsed options (see ``curl_requests.parse_curl_args()``), or None if the request must be
+            run by curl: in-process requests are turned off, the command uses an option the plugin doesn't handle
+            itself, or the URL uses curl's globbing.
+        """
+        if self.host_plugin.curl_backend == "subprocess":
+            return None
+        if not request['glob_off'] and any(char in request['url'] for char in "{}[]"):
+            return None
+
+        options = curl_requests.parse_curl_args(request['curl_array'])
+        if options is None:
+            self.host_plugin.logger.debug("[%s] Raw Curl: options not handled in-process; running curl." % self.device.name)
+        return options
 
     # =============================================================================
-    def get_the_data(self, dev: indigo.Device = None) -> str | bytes:
+    def get_the_data(self, dev: indigo.Device = None, fetched: Future = None) -> str | bytes:
         """Retrieve raw data from the device's configured URL or file path.
 
-        Constructs the API URL (applying any configured Indigo variable substitutions), selects
-        the appropriate authentication method (Raw curl, Digest, Basic, Bearer, Token, or none),
-        issues the request, and returns the raw response. A timer-based kill mechanism handles
-        curl subprocess timeouts.
+        Builds the request (see ``build_request()``), reads the source using the appropriate
+        method (Raw curl, a local file, or the requests library), and returns the raw response.
+        A timer-based kill mechanism handles curl subprocess timeouts. If the request was
+        already made by the async fetch engine (or the libcurl engine), its result is used instead.
 
         Args:
             dev (indigo.Device): The Indigo device whose data source is being polled.
+            fetched (Future): The async fetch or libcurl engine's future for this refresh, if any.
 
         Returns:
-            str | bytes: The raw XML or JSON response body, or a JSON error sentinel string on
-            failure.
+            str | bytes: The raw XML or JSON response body, ``NOT_MODIFIED`` if the source hasn't
+            changed since the last good refresh, or a JSON error sentinel string on failure.
         """
         return_code = 0
         result      = ""
         err         = ""
+        self.pending_validators = {}
         try:
-            auth_type  = dev.pluginProps.get('useDigest', 'None')
-            call_type  = ""
-            curl_array = dev.pluginProps.get('curlArray', '')
-            password   = dev.pluginProps.get('digestPass', '')
-            subber     = self.host_plugin.substitute
-            url        = dev.pluginProps['sourceXML']
-            username   = dev.pluginProps.get('digestUser', '')
-            timeout    = int(dev.pluginProps.get('timeout', 5))
-
-            if dev.pluginProps.get('disableGlobbing', False):
-                glob_off = 'g'
+            if fetched is not None:
+                # The async fetch engine (or, for Raw Curl devices, the libcurl engine) has already made the request.
+                request   = None
+                call_type = "curl" if isinstance(fetched.result(), CurlResponse) else "request"
             else:
-                glob_off = ''
-
-            # Format any needed URL substitutions
-            if dev.pluginProps.get('doSubs', False):
-                self.logger.debug("[%s] URL: %s (before substitution)" % (dev.name, url))
-                url = subber(url.replace("[A]", f"%%v:{dev.pluginProps['subA']}%%"))
-                url = subber(url.replace("[B]", f"%%v:{dev.pluginProps['subB']}%%"))
-                url = subber(url.replace("[C]", f"%%v:{dev.pluginProps['subC']}%%"))
-                url = subber(url.replace("[D]", f"%%v:{dev.pluginProps['subD']}%%"))
-                url = subber(url.replace("[E]", f"%%v:{dev.pluginProps['subE']}%%"))
-                self.logger.debug("[%s] URL: %s (after substitution)" % (dev.name, url))
-
-            # Added by DaveL17 - 2020 10 09
-            # Format any needed Raw Curl substitutions
-            if dev.pluginProps.get('curlSubs', False):
-                self.logger.debug("[%s] Raw Curl: %s (before substitution)" % (dev.name, curl_array))
-                curl_array = subber(curl_array.replace("[A]", f"%%v:{dev.pluginProps['curlSubA']}%%"))
-                curl_array = subber(curl_array.replace("[B]", f"%%v:{dev.pluginProps['curlSubB']}%%"))
-                curl_array = subber(curl_array.replace("[C]", f"%%v:{dev.pluginProps['curlSubC']}%%"))
-                curl_array = subber(curl_array.replace("[D]", f"%%v:{dev.pluginProps['curlSubD']}%%"))
-                curl_array = subber(curl_array.replace("[E]", f"%%v:{dev.pluginProps['curlSubE']}%%"))
-                self.logger.debug("[%s] Raw Curl: %s (after substitution)" % (dev.name, curl_array))
+                request   = self.build_request(dev)
+                call_type = request['call_type']
 
             # Initiate curl call to data source.
-            # ================================  Curl Auth  ================================
-            # GlennNZ
-            match auth_type:
-                case "Raw":
-                    # Since this option is processing raw curl commands, it will need to remain a curl call via
-                    # subprocess().
-                    # v = [verbose] s = [silent] k = [insecure]
-                    call_type = "curl"
-                    # List form + no shell=True prevents shell injection via curl_array/url variable substitutions.
-                    proc = subprocess.Popen(
-                        ['/usr/bin/curl', f'-vsk{glob_off}'] + shlex.split(curl_array) + [url],
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                    )
-                # ===============================  Digest Auth  ===============================
-                case 'Digest':
-                    call_type = 'request'
-                    proc = requests.get(url, auth=HTTPDigestAuth(username, password), timeout=timeout)
-                # ===============================  Basic Auth  ================================
-                case 'Basic':
-                    call_type = 'request'
-                    basic = HTTPBasicAuth(username, password)
-                    proc = requests.get(url, auth=basic, timeout=timeout)
-                # ===============================  Bearer Auth  ===============================
-                case 'Bearer':
-                    call_type = 'request'
-                    token = dev.pluginProps['token']
-                    proc = requests.get(url, headers={'Authorization': f'Bearer {token}'}, timeout=timeout)
-                # ===============================  Token Auth  ================================
-                # berkinet and DaveL17
-                case 'Token':
-                    a_url     = dev.pluginProps['tokenUrl']
-                    call_type = 'request'
-                    data = {"pwd": password, "remember": 1}
-                    headers = {'Content-Type': 'application/json'}
-
-                    # Get the token
-                    response = requests.post(a_url, json=data, headers=headers, timeout=timeout)
-                    reply = response.json()
-                    token = reply["access_token"]
-
-                    url = f"{a_url}?access_token={token}"
-                    proc = requests.get(url, timeout=timeout)
-                # =================================  No Auth  =================================
-                case _:
-                    if url.startswith('file'):
-                        # If the locator is a reference to a file, requests won't handle it.
-                        call_type = 'file'
-                        url = url.replace('file://', '')
-                        url = url.replace('%20', ' ')
-                        with open(url, 'r', encoding="utf-8") as infile:
-                            proc = bytes(infile.read(), 'utf-8')
-                    else:
-                        call_type = 'request'
-                        proc = requests.get(url, timeout=timeout)
-
-            # =============================================================================
-            # The following code adds a timeout function to the call.
-            # Added by GlennNZ and DaveL17 2018-07-18
-            # duration   = int(dev.pluginProps.get('timeout', '5'))
-            # timer_kill = threading.Timer(duration, self.kill_curl, [proc])
-            timer_kill = threading.Timer(timeout, self.kill_curl, [proc])
             match call_type:
-                case "file":
-                    # Cases that used a local file as a source land here.
-                    result = proc
+                # ================================  Curl Auth  ================================
+                # GlennNZ
                 case "curl":
-                    try:
-                        # Cases that used the curl method land here.
-                        timer_kill.start()
-                        result, err = proc.communicate()
-                        return_code = proc.returncode
-                    finally:
-                        timer_kill.cancel()
+                    # Commands that only use the common curl options are made in-process on a pooled session (see
+                    # curl_requests.py); anything else is still run by curl.
+                    options = None if fetched is not None else self.curl_options(request)
+                    if fetched is not None:
+                        response = fetched.result()
+                        result, return_code, err = response.body, response.return_code, response.error
+                        self.host_plugin.logger.debug(
+                            "[%s] curl timing (ms): DNS %.1f, connect %.1f, TLS %.1f, first byte %.1f, total %.1f" %
+                            (dev.name, *(response.timings[phase] * 1000 for phase in TIMING_PHASES))
+                        )
+                    elif options is not None:
+                        session = self.host_plugin.session_pool.acquire(self.device.id, request)
+                        result, return_code, err = curl_requests.send(
+                            session, request['url'], options, request['timeout'], request['max_bytes']
+                        )
+                    else:
+                        result, return_code, err = self.run_curl(request)
+                # ================================  Local File  ===============================
+                case "file":
+                    url = request['url'].replace('file://', '')
+                    url = url.replace('%20', ' ')
+
+                    # The file equivalent of a conditional GET: skip it if its mtime and size haven't changed.
+                    stat = os.stat(url)
+                    self.pending_validators = {'file_signature': (stat.st_mtime_ns, stat.st_size)}
+                    if self.pending_validators['file_signature'] == self.validators.get('file_signature'):
+                        return NOT_MODIFIED
+                    max_bytes = request['max_bytes']
+                    if max_bytes and stat.st_size > max_bytes:
+                        raise ResponseTooLarge(max_bytes)
+
+                    # The parsers take the raw bytes (XML documents declare their own encoding, and JSON is UTF-8), so
+                    # the file is read in one pass without decoding it. A file that grew since the stat can't be read
+                    # past the limit.
+                    with open(url, 'rb') as infile:
+                        result = infile.read(max_bytes + 1 if max_bytes else -1)
+                    if max_bytes and len(result) > max_bytes:
+                        raise ResponseTooLarge(max_bytes)
+                # =================================  Requests  ================================
                 case "request":
-                    # Cases that used the requests library land here.
-                    result = proc.text
+                    # Devices making the same request share it (see FetchCoalescer).
+                    if fetched is None:
+                        fetched = self.host_plugin.fetch_coalescer.fetch(
+                            FetchCoalescer.request_key(request), lambda: self.send_request(request)
+                        )
+                    proc = fetched.result()
+                    if proc.status_code == 304:
+                        return NOT_MODIFIED
+
+                    self.pending_validators = {}
+                    if proc.headers.get('ETag'):
+                        self.pending_validators['etag'] = proc.headers['ETag']
+                    if proc.headers.get('Last-Modified'):
+                        self.pending_validators['last_modified'] = proc.headers['Last-Modified']
+
+                    # The parsers take the raw bytes. XML documents declare their own encoding, and JSON is UTF-8.
+                    result = proc.content
                     return_code = proc.status_code
 
             # =============================================================================
@@ -1193,6 +2038,8 @@ class PluginDevice:
             # `curlcodes.py` for more information.
             match call_type:
                 case "curl":
+                    if return_code == curl_requests.CURL_FILESIZE_EXCEEDED:
+                        raise ResponseTooLarge(max_bytes_for(dev.pluginProps.get('maxResponseSize', 50)))
                     if return_code != 0:
                         # for plugin log (verbose error)
                         curl_err = err.replace(b'\n', b' ')
@@ -1208,6 +2055,13 @@ class PluginDevice:
                             indigo.server.log("[%s] Device is set to keep alive and will not be disabled." % dev.name, isError=True)
             return result
 
+        except ResponseTooLarge as err:
+            self.logger.warning("[%s] %s. Skipping until next scheduled poll." % (dev.name, err))
+            if int(dev.pluginProps.get('maxRetries', 10)) == -1 and self.bad_calls == 0:
+                indigo.server.log("[%s] Device is set to keep alive and will not be disabled." % dev.name, isError=True)
+            dev.updateStateOnServer('deviceIsOnline', value=False, uiValue="Too large")
+            return '{"GhostXML": "Response too large"}'
+
         except IOError:
             self.logger.warning("[%s] IOError:  Skipping until next scheduled poll." % dev.name)
             self.logger.debug("[%s] Device is offline. No data to return. Returning dummy dict." % dev.name)
@@ -1221,40 +2075,70 @@ class PluginDevice:
             self.logger.exception("General exception: %s" % return_code)
             return '{"GhostXML": "General Exception"}'
 
+        finally:
+            # The host has answered; let the next request to it start while this one is parsed.
+            self._release_host()
+
+    # =============================================================================
+    @staticmethod
+    @functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+    def clean_key(key: str = "") -> str:
+        """Sanitize a single key so it is a valid Indigo device state name.
+
+        Results are memoized, as the same keys recur on every poll.
+
+        Args:
+            key (str): The raw key.
+
+        Returns:
+            str: The sanitized key.
+        """
+        # Some characters need to be replaced in keys because simply deleting them could cause problems. Add additional
+        # k/v pairs to CHARS_TO_REPLACE as needed.['9@a(b)' --> '9_at_a(b)']
+        # Some characters can simply be eliminated. If something here causes problems, remove the element from
+        # CHARS_TO_REMOVE and add it to CHARS_TO_REPLACE. ['9_at_a(b)' --> '9_at_ab']
+        replacements = PluginDevice._KEY_REPLACEMENTS
+        new_key = PluginDevice._KEY_PATTERN.sub(lambda m: replacements[m.group(0)], key)
+        new_key = new_key.translate(PluginDevice._KEY_TABLE)
+
+        # Indigo will not accept device state names that begin with a number, so inspect them and prepend any with the
+        # string "No_" to force them to something that Indigo will accept. ['9_at_ab' --> 'No_9_at_ab']
+        if new_key[0].isdigit():
+            new_key = f'No_{new_key}'
+
+        return new_key
+
     # =============================================================================
-    def _clean_the_keys(self, input_data: dict = None) -> dict | None:
+    def _clean_the_keys(self, input_data: dict | Iterable = None) -> dict | None:
         """Sanitize dictionary keys so they are valid Indigo device state names.
 
         Replaces problematic characters using the ``CHARS_TO_REPLACE`` mapping, removes
         characters in ``CHARS_TO_REMOVE``, and prepends ``No_`` to any key that begins with a
-        digit (Indigo does not accept state names starting with a number).
+        digit (Indigo does not accept state names starting with a number). If two raw keys clean
+        to the same state name, the later value wins and the collision is logged once.
 
         Args:
-            input_data (dict): The dictionary whose keys need to be sanitized.
+            input_data (dict | Iterable): The dictionary whose keys need to be sanitized, or an
+                iterable of ``(key, value)`` pairs (such as the JSON flattener's output).
 
         Returns:
             dict | None: A new dictionary with sanitized keys, or None if an exception occurs.
         """
         try:
-            chars_to_replace = dict((re.escape(k), v) for k, v in CHARS_TO_REPLACE.items())
-            pattern     = re.compile("|".join(chars_to_replace))
             output_dict = {}
+            items       = input_data.items() if isinstance(input_data, dict) else input_data
 
-            for key in input_data:
-                # Some characters need to be replaced in keys because simply deleting them could cause problems. Add
-                # additional k/v pairs to chars_to_replace as needed.['9@a(b)' --> '9_at_a(b)']
-                new_key = pattern.sub(lambda m: chars_to_replace[re.escape(m.group(0))], str(key))
-
-                # Some characters can simply be eliminated. If something here causes problems, remove the element from
-                # the set and add it to the replacement dict above. ['9_at_a(b)' --> '9_at_ab']
-                new_key = ''.join([c for c in new_key if c not in CHARS_TO_REMOVE])
+            for key, value in items:
+                new_key = self.clean_key(str(key))
 
-                # Indigo will not accept device state names that begin with a number, so inspect them and prepend any
-                # with the string "No_" to force them to something that Indigo will accept. ['9_at_ab' --> 'No_9_at_ab']
-                if new_key[0].isdigit():
-                    new_key = f'No_{new_key}'
+                if new_key in output_dict and new_key not in self.key_collisions:
+                    self.key_collisions.add(new_key)
+                    self.logger.warning(
+                        "[%s] More than one key becomes the state '%s' (including '%s'). Only the last value is kept."
+                        % (self.device.name, new_key, key)
+                    )
 
-                output_dict[new_key] = input_data[key]
+                output_dict[new_key] = value
 
             return output_dict
 
@@ -1268,6 +2152,154 @@ class PluginDevice:
             # Add wider exception testing to test errors
             self.logger.exception('General exception:')
 
+    # =============================================================================
+    @staticmethod
+    def infer_state_type(value=None) -> str:
+        """Return the Indigo state type to use for a value on a ``GhostXMLdeviceTrue`` device.
+
+        Args:
+            value: The state value.
+
+        Returns:
+            str: One of ``'number'``, ``'onoff'``, ``'yesno'``, ``'truefalse'`` or ``'string'``.
+        """
+        # Values that are already numbers (including bools, which int() accepts) need no probing.
+        if isinstance(value, (int, float)):
+            return 'number'
+
+        try:
+            # Integers
+            _ = int(value)  # Try int; if it fails move on to the next one.
+            return 'number'
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            # Floats
+            _ = float(value)  # Try float; if it fails move on to the next one.
+            return 'number'
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            value = value.lower()
+        except (AttributeError, TypeError, ValueError):
+            return 'string'
+
+        for state_type, values in BOOL_STATE_VALUES.items():
+            if value in values:
+                return state_type
+
+        return 'string'
+
+    # =============================================================================
+    def _state_list_fingerprint(self, dev: indigo.Device = None) -> frozenset:
+        """Return a fingerprint of the state definitions ``get_device_state_list()`` would build.
+
+        For ``GhostXMLdevice`` devices this is the key set. For ``GhostXMLdeviceTrue`` devices it
+        also includes each key's inferred Indigo state type.
+
+        Args:
+            dev (indigo.Device): The Indigo device being refreshed.
+
+        Returns:
+            frozenset: The fingerprint.
+        """
+        if dev.deviceTypeId == 'GhostXMLdeviceTrue':
+            # Drop keys that have left the payload from the type-schema cache.
+            with self._lock:
+                self.state_types = {key: self.state_types[key] for key in self.final_dict if key in self.state_types}
+            return frozenset((key, self.state_type(key, value)) for key, value in self.final_dict.items())
+
+        return frozenset(self.final_dict)
+
+    # =============================================================================
+    def state_type(self, key: str = "", value=None) -> str:
+        """Return the inferred Indigo state type for a key, using the device's type-schema cache.
+
+        The cache keeps each key's inferred type. While a key's value keeps its Python type, the
+        cached type is confirmed with a cheap check instead of a full probe (see
+        ``infer_state_type()``): numbers stay numbers, a numeric string only needs ``float()``
+        (which accepts every string ``int()`` does), a boolean type only needs its word list, and a
+        string is kept while its value is unchanged. The key is re-probed if the check fails.
+
+        The cache is used by the refresh running on a fetch worker and by Indigo's state list callback
+        (``get_device_state_list()``), so it is read and written under the device's lock.
+
+        Args:
+            key (str): The state key.
+            value: The state value.
+
+        Returns:
+            str: The inferred state type.
+        """
+        with self._lock:
+            cached = self.state_types.get(key)
+            if cached is not None and cached[0] is type(value):
+                match cached[1]:
+                    case 'number':
+                        if isinstance(value, (int, float)):
+                            return 'number'
+                        try:
+                            _ = float(value)
+                            return 'number'
+                        except (TypeError, ValueError):
+                            pass
+                    case 'string':
+                        if cached[2] == value:
+                            return 'string'
+                    case bool_type:
+                        if value.lower() in BOOL_STATE_VALUES[bool_type]:
+                            return bool_type
+
+            state_type = self.infer_state_type(value)
+            self.state_types[key] = (type(value), state_type, value)
+            return state_type
+
+    # =============================================================================
+    def run_curl(self, request: dict = None) -> tuple:
+        """Run a Raw Curl request with the curl command, reading its output within the device's size limit.
+
+        Args:
+            request (dict): The request description built by ``build_request()``.
+
+        Returns:
+            tuple: ``(result, return_code, err)``: curl's output (bytes), its exit code and its verbose log (bytes).
+        """
+        # v = [verbose] s = [silent] k = [insecure]
+        # curl stops by itself if the server declares a length over the limit; longer output is cut off below.
+        size_limit = ['--max-filesize', str(request['max_bytes'])] if request['max_bytes'] else []
+
+        # The verbose log goes to a file so that curl can't block writing it while its output is being read.
+        with tempfile.TemporaryFile() as stderr:
+            # List form + no shell=True prevents shell injection via curl_array/url variable substitutions.
+            proc = subprocess.Popen(
+                ['/usr/bin/curl', f"-vsk{request['glob_off']}"] + size_limit + shlex.split(request['curl_array']) +
+                [request['url']],
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+            )
+            # The following code adds a timeout function to the call.
+            # Added by GlennNZ and DaveL17 2018-07-18
+            timer_kill = threading.Timer(request['timeout'], self.kill_curl, [proc])
+            try:
+                timer_kill.start()
+                chunks = iter(functools.partial(proc.stdout.read1, READ_CHUNK_SIZE), b"")
+                try:
+                    result = read_limited(chunks, request['max_bytes'])
+                except ResponseTooLarge:
+                    # Stop the transfer rather than read the rest of it.
+                    proc.kill()
+                    proc.wait()
+                    return b"", curl_requests.CURL_FILESIZE_EXCEEDED, b""
+                return_code = proc.wait()
+            finally:
+                timer_kill.cancel()
+                proc.stdout.close()
+
+            stderr.seek(0)
+            return result, return_code, stderr.read()
+
     # =============================================================================
     def kill_curl(self, proc: subprocess.Popen = None) -> None:
         """Kill a curl subprocess that has exceeded its timeout.
@@ -1296,21 +2328,25 @@ class PluginDevice:
             self.logger.exception('General exception:')
 
     # =============================================================================
-    def parse_the_json(self, dev: indigo.Device = None, root: str = "") -> flatdict.FlatDict | dict:
-        """Parse a raw JSON string into a flat dictionary.
+    def parse_the_json(self, dev: indigo.Device = None, root: bytes | str = "", selectors: StateSelectors = None,
+                       filters: KeyFilters = None) -> Iterable | dict:
+        """Parse a raw JSON payload into flat key/value pairs.
 
-        Deserializes the JSON payload and passes it through ``flatdict.FlatDict`` (using
-        ``'_ghostxml_'`` as the delimiter) to produce a single-level key/value mapping. If the
-        top-level JSON value is a list, it is first converted to a dict with ``No_<index>``
-        keys. On parse failure the existing device states are returned so the device thread
-        remains alive.
+        Deserializes the JSON payload (with orjson or ujson if installed, see
+        ``iterateJSON.loads()``) and hands it to ``iterateJSON.iterate_main()``, which
+        yields a single-level key/value pair for each leaf value (nested keys joined with
+        ``'_ghostxml_'``). If the top-level JSON value is a list, its items are keyed
+        ``No_<index>``. The pairs are consumed by ``_clean_the_keys()``. On parse failure the
+        existing device states are returned so the device thread remains alive.
 
         Args:
             dev (indigo.Device): The Indigo device whose JSON data is being parsed.
-            root (str): The raw JSON string to parse.
+            root (bytes | str): The raw JSON payload to parse.
+            selectors (StateSelectors): The device's state selectors, if only part of the payload is wanted.
+            filters (KeyFilters): The device's include and exclude key patterns, if any.
 
         Returns:
-            flatdict.FlatDict | dict: The flattened data, or the previous device states dict
+            Iterable | dict: The flat ``(key, value)`` pairs, or the previous device states dict
             if a parse error occurs.
         """
         self.old_device_states = dict(dev.states)
@@ -1323,20 +2359,13 @@ class PluginDevice:
                 del self.old_device_states[key]
 
         try:
-            parsed_json = json.loads(root)
-
-            # If List flattens once - with addition of No_ to the beginning (Indigo does not allow DeviceNames to start
-            # with numbers) then flatDict runs - and appears to run correctly (as no longer list - dict) if
-            # isinstance(list) then will flatten list down to dict.
-
-            if isinstance(parsed_json, list):
-                parsed_json = dict(("No_" + f"{i}", v) for (i, v) in enumerate(parsed_json))
-
-            self.json_raw_data = flatdict.FlatDict(parsed_json, delimiter='_ghostxml_')
+            parsed_json = iterateJSON.loads(root)
 
             dev.updateStateOnServer('parse_error', value=False)
 
-            return self.json_raw_data
+            return iterateJSON.iterate_main(
+                parsed_json, name=dev.name, selectors=selectors, filters=filters, **self.host_plugin.parse_limits
+            )
 
         except (ValueError, json.decoder.JSONDecodeError) as err:
             # If we let it, an exception here will kill the device's thread. Therefore, we have to return something
@@ -1356,7 +2385,9 @@ class PluginDevice:
 
         For ``GhostXMLdeviceTrue`` devices, string values that represent boolean concepts
         (e.g. "on", "true", "yes") also generate a companion ``<key>_bool`` state. For
-        standard ``GhostXMLdevice`` devices all values are coerced to strings.
+        standard ``GhostXMLdevice`` devices all values are coerced to strings. Only states whose
+        value has changed since the last push (plus any bookkeeping states) are sent to the
+        server.
 
         Args:
             dev (indigo.Device): The Indigo device whose states are being updated.
@@ -1369,14 +2400,10 @@ class PluginDevice:
                 # Parse all values into states as true type.
                 for key in sorted_list:
                     value = self.final_dict[key]
-                    if isinstance(value, str):
-                        match value.lower():
-                            case 'armed' | 'locked' | 'on' | 'open' | 'true' | 'up' | 'yes':
-                                self.final_dict[f"{key}_bool"] = True
-                                state_list.append({'key': f"{key}_bool", 'value': True})
-                            case 'closed' | 'disarmed' | 'down' | 'false' | 'no' | 'off' | 'unlocked':
-                                self.final_dict[f"{key}_bool"] = False
-                                state_list.append({'key': f"{key}_bool", 'value': False})
+                    if isinstance(value, str) and self.state_type(key, value) in BOOL_STATE_TYPES:
+                        is_true = value.lower() in BOOL_TRUE_VALUES
+                        self.final_dict[f"{key}_bool"] = is_true
+                        state_list.append({'key': f"{key}_bool", 'value': is_true})
                     state_list.append({'key': key, 'value': self.final_dict[key], 'uiValue': self.final_dict[key]})
             else:
                 # Parse all values into states as strings.
@@ -1396,10 +2423,22 @@ class PluginDevice:
             # Add wider exception testing to test errors
             self.logger.exception("General exception: %s" % subError)
 
-        dev.updateStatesOnServer(state_list)
+        # Drop states that already hold the same value. The cache is rebuilt from this poll's keys so that a state
+        # which drops out of the payload and later returns is sent again.
+        pushed_states = {}
+        changed       = []
+        for state in state_list:
+            signature = (type(state['value']), state['value'], state.get('uiValue'))
+            if state['key'] in BOOKKEEPING_STATES or self.pushed_states.get(state['key']) != signature:
+                changed.append(state)
+            pushed_states[state['key']] = signature
+
+        if changed:
+            dev.updateStatesOnServer(changed)
+        self.pushed_states = pushed_states
 
     # =============================================================================
-    def refresh_data_for_dev(self, dev: indigo.Device = None) -> None:
+    def refresh_data_for_dev(self, dev: indigo.Device = None, fetched: Future = None) -> None:
         """Refresh data for a single device if it is configured and enabled.
 
         Retrieves raw data via ``get_the_data()``, routes it to the appropriate parser (XML or
@@ -1407,16 +2446,36 @@ class PluginDevice:
 
         Args:
             dev (indigo.Device): The Indigo device to refresh.
+            fetched (Future): The async fetch or libcurl engine's future for this refresh, if any.
         """
         try:
             if dev.configured and dev.enabled:
 
                 # Get the data.
-                self.raw_data = self.get_the_data(dev)
+                self.raw_data = self.get_the_data(dev, fetched)
+                update_time   = t.strftime("%m/%d/%Y at %H:%M")
+
+                # For sources that don't support conditional requests, compare the payload itself with the last
+                # good refresh.
+                is_sentinel = isinstance(self.raw_data, str) and self.raw_data.startswith('{"GhostXML":')
+                if self.raw_data is not NOT_MODIFIED and not is_sentinel:
+                    payload_digest = self._payload_digest(self.raw_data)
+                    self.pending_validators['payload_digest'] = payload_digest
+                    if payload_digest == self.validators.get('payload_digest'):
+                        self.skipped_parses += 1
+                        self.raw_data = NOT_MODIFIED
+
+                # The source hasn't changed since the last good refresh, so the device states are already current.
+                if self.raw_data is NOT_MODIFIED:
+                    self.logger.debug("[%s] Source not modified. Skipping parse." % dev.name)
+                    dev.updateStatesOnServer([
+                        {'key': 'deviceLastUpdated', 'value': update_time},
+                        {'key': 'deviceTimestamp', 'value': t.time()},
+                    ])
+                    return
 
                 dev.updateStateOnServer('deviceIsOnline', value=dev.states['deviceIsOnline'], uiValue="Processing")
 
-                update_time = t.strftime("%m/%d/%Y at %H:%M")
                 dev.updateStateOnServer('deviceLastUpdated', value=update_time)
                 dev.updateStateOnServer('deviceTimestamp', value=t.time())
 
@@ -1426,21 +2485,20 @@ class PluginDevice:
                     self.final_dict = self.parse_the_json(dev, self.raw_data)
                     self.final_dict = self._clean_the_keys(self.final_dict)
 
-                elif dev.pluginProps['feedType'] == "XML":
-                    self.raw_data = self.strip_namespace(dev, self.raw_data)
-                    self.final_dict = iterateXML.iterate_main(self.raw_data)
-
-                elif dev.pluginProps['feedType'] == "JSON":
-                    self.final_dict = self.parse_the_json(dev, self.raw_data)
-                    self.final_dict = self._clean_the_keys(self.final_dict)
+                elif dev.pluginProps['feedType'] in ("XML", "JSON"):
+                    self.final_dict = self.parse_payload(dev, payload_digest)
 
                 else:
                     self.logger.warning("%s: The plugin only supports XML and JSON data sources." % dev.name)
                     return
 
                 if self.final_dict is not None:
-                    # Create the device states.
-                    dev.stateListOrDisplayStateIdChanged()
+                    # Create the device states. Rebuilding the state list is a full schema round-trip through
+                    # get_device_state_list(), so only do it when the keys (or their types) have changed.
+                    fingerprint = self._state_list_fingerprint(dev)
+                    if fingerprint != self.state_fingerprint:
+                        dev.stateListOrDisplayStateIdChanged()
+                        self.state_fingerprint = fingerprint
 
                     # Put the final values into the device states.
                     self.parse_state_values(dev)
@@ -1467,7 +2525,8 @@ class PluginDevice:
                         self.logger.info("%s updated." % dev.name)
                         dev.updateStateImageOnServer(indigo.kStateImageSel.SensorOn)
                         dev.setErrorStateOnServer(None)
-                        self.bad_calls = 0
+                        self.bad_calls  = 0
+                        self.validators = self.pending_validators
 
                 else:
                     # Set the Timestamp so that the seconds-since-update code doesn't keep checking a dead link /
@@ -1489,61 +2548,66 @@ class PluginDevice:
             self.logger.exception("General exception: %s" % dev.name)
 
     # =============================================================================
-    def strip_namespace(self, dev: indigo.Device = None, root: bytes | str = "") -> str:
-        """Strip XML namespace declarations from a raw XML payload.
+    def parse_payload(self, dev: indigo.Device = None, payload_digest: bytes = b"") -> dict | None:
+        """Flatten the device's XML or JSON payload into its final state dictionary.
 
-        Removes ``xmlns``, ``xmlns:xsi``, ``xmlns:xsd``, and ``xsi:noNamespaceSchemaLocation``
-        attributes from the XML string so that the parser can handle the document without
-        namespace-aware lookups. If ``root`` is empty, substitutes a default empty-document
-        placeholder.
+        Devices that receive the same payload and flatten it the same way (feed type, state
+        selectors and key filters) within the shared fetch window share one parse.
 
         Args:
-            dev (indigo.Device): The Indigo device associated with this payload (used for
-                logging).
-            root (bytes | str): The raw XML payload as a string or bytes object.
+            dev (indigo.Device): The Indigo device whose payload is being parsed.
+            payload_digest (bytes): The digest of ``self.raw_data``.
 
         Returns:
-            str: The namespace-stripped XML string, or the default empty-document placeholder
-            on error.
-        """
-        d_root = (
-            "<?xml version='1.0' encoding='UTF-8'?>"
-            "<Emptydict>"
-            "<Response>No data to return.</Response>"
-            "</Emptydict>"
+            dict | None: The flat, cleaned key/value pairs.
+        """
+        feed_type = dev.pluginProps['feedType']
+        coalescer = self.host_plugin.fetch_coalescer
+        parse_key = (
+            payload_digest, feed_type, dev.pluginProps.get('stateSelectors', ""),
+            dev.pluginProps.get('stateInclude', ""), dev.pluginProps.get('stateExclude', ""),
+            tuple(self.host_plugin.parse_limits.items())
         )
 
-        try:
-            if root == "":
-                root = d_root
+        final_dict = coalescer.parsed(parse_key)
+        if final_dict is not None:
+            if feed_type == "JSON":
+                dev.updateStateOnServer('parse_error', value=False)
+            return final_dict
+
+        if feed_type == "XML":
+            # The parser drops namespaces itself, so the payload is handed over as-is.
+            final_dict = iterateXML.iterate_main(
+                self.raw_data or EMPTY_XML_PAYLOAD, name=dev.name, selectors=self.selectors,
+                filters=self.key_filters, **self.host_plugin.parse_limits
+            )
+            shareable  = True
+        else:
+            flat_pairs = self.parse_the_json(dev, self.raw_data, self.selectors, self.key_filters)
+            # A parse error returns this device's previous states, which can't be shared.
+            shareable  = not isinstance(flat_pairs, dict)
+            final_dict = self._clean_the_keys(flat_pairs)
 
-            # root may be a bytes object or a string when it gets here. We want a string.
-            if not isinstance(root, str):
-                try:
-                    root = root.decode('utf-8')
-                except UnicodeDecodeError:
-                    self.logger.warning("%s - There was a problem decoding the payload object." % dev.name)
+        if shareable and final_dict is not None:
+            coalescer.store_parsed(parse_key, final_dict)
 
-            # Remove namespace stuff if it's in there. There's probably a more comprehensive re.sub() that could be
-            # run, but it also could do *too* much.
-            self.raw_data = ''
-            # self.raw_data = re.sub(' xmlns="[^"]+"', '', root.decode('utf-8'))
-            self.raw_data = re.sub(' xmlns="[^"]+"', '', root)
-            self.raw_data = re.sub(' xmlns:xsi="[^"]+"', '', self.raw_data)
-            self.raw_data = re.sub(' xmlns:xsd="[^"]+"', '', self.raw_data)
-            self.raw_data = re.sub(' xsi:noNamespaceSchemaLocation="[^"]+"', '', self.raw_data)
+        return final_dict
 
-            return self.raw_data
+    # =============================================================================
+    @staticmethod
+    def _payload_digest(payload: bytes | str = b"") -> bytes:
+        """Return a digest of a raw payload for detecting byte-identical responses.
 
-        except ValueError as sub_error:
-            self.logger.warning(
-                "[%s] Error parsing source data: %s. Skipping until next scheduled poll." % (dev.name, sub_error)
-            )
-            self.raw_data = d_root
-            dev.updateStateOnServer('deviceIsOnline', value=False, uiValue="No data")
-            return self.raw_data
+        Uses a 128-bit BLAKE2b digest: fast enough to be negligible next to parsing, and wide
+        enough that a changed payload is never mistaken for an unchanged one.
 
-        except Exception:  # noqa
-            # Add wider exception testing to test errors
-            self.logger.exception('General exception:')
-            return self.raw_data
+        Args:
+            payload (bytes | str): The raw payload returned by ``get_the_data()``.
+
+        Returns:
+            bytes: The payload digest.
+        """
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8', errors='surrogatepass')
+
+        return hashlib.blake2b(payload, digest_size=16).digest()
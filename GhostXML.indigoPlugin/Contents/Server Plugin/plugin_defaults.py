@@ -1,5 +1,20 @@
 kDefaultPluginPrefs = {
-    'oldDebugLevel':  "20",  # Supports legacy debugging levels.
-    'showDebugInfo': False,  # Verbose debug logging?
-    'showDebugLevel': "20",  # Debugging level.
+    'asyncConcurrency':  "50",        # Requests in flight at once with the asyncio fetch engine.
+    'backoffMax':        "3600",      # Longest interval (seconds) a failing device backs off to; 0 disables backoff.
+    'coalesceWindow':    "5",         # Seconds a completed fetch (and parse) is shared by identical requests.
+    'curlEngine':        "requests",  # Engine for Raw Curl devices ("requests", "libcurl" or "subprocess").
+    'fetchEngine':       "threads",   # Fetch engine for HTTP devices ("threads" or "asyncio").
+    'fetchWorkers':      "8",         # Number of shared threads used to refresh devices.
+    'hostMaxConcurrent': "0",         # Requests in flight at once per host; 0 is no limit.
+    'hostOverrides':     "",          # Per-host limits (host=concurrency[/rate], comma separated).
+    'hostRateLimit':     "0",         # Requests per second per host; 0 is no limit.
+    'oldDebugLevel':     "20",        # Supports legacy debugging levels.
+    'parseMaxDepth':     "64",        # Deepest nesting walked when flattening a payload.
+    'parseMaxKeys':      "100000",    # Most key/value pairs kept from a payload.
+    'scheduleJitter':    "10",        # Largest random delay added to each refresh interval (percent).
+    'sessionIdleExpiry': "300",       # Seconds an unused HTTP session is kept open.
+    'sessionPoolSize':   "10",        # Connections kept open per HTTP session.
+    'showDebugInfo':     False,       # Verbose debug logging?
+    'showDebugLevel':    "20",        # Debugging level.
+    'tokenTtl':          "300",       # Seconds an access token without an expiry is reused; 0 asks for one every poll.
 }
@@ -0,0 +1,168 @@
+"""
+Response size limits for GhostXML devices.
+
+Each device caps the size of its source (``maxResponseSize``, in megabytes; 0 for no limit). Responses are read in
+chunks as they arrive, and a transfer is abandoned as soon as it passes the cap (or before its body is read, if the
+server declares a larger Content-Length). A misbehaving endpoint that returns a huge error page costs no more than the
+cap in memory and time, and the device reports "Response too large" instead of stalling.
+"""
+READ_CHUNK_SIZE = 64 * 1024
+MEGABYTE        = 1024 * 1024
+
+
+class ResponseTooLarge(IOError):
+    """A response exceeded the device's size limit."""
+
+    def __init__(self, max_bytes: int = 0):
+        """Describe the limit that was exceeded.
+
+        Args:
+            max_bytes (int): The device's limit in bytes.
+        """
+        super().__init__(f"The response is larger than the {max_bytes / MEGABYTE:g} MB limit")
+        self.max_bytes = max_bytes
+
+
+class LimitedResponse:
+    """A response whose body has been read within the device's size limit.
+
+    Exposes the ``status_code``, ``headers`` and ``content`` attributes the plugin uses from
+    ``requests.Response`` and ``httpx.Response``.
+    """
+
+    def __init__(self, status_code: int = 200, headers=None, content: bytes = b""):
+        """Keep the parts of the response the plugin uses.
+
+        Args:
+            status_code (int): The HTTP status code.
+            headers: The response headers (a case-insensitive mapping).
+            content (bytes): The response body.
+        """
+        self.status_code = status_code
+        self.headers     = headers if headers is not None else {}
+        self.content     = content
+
+
+def max_bytes_for(value="") -> int:
+    """Return a device's size limit in bytes.
+
+    Args:
+        value: The device's ``maxResponseSize`` value, in megabytes.
+
+    Returns:
+        int: The limit in bytes (0 for no limit).
+
+    Raises:
+        ValueError: If the value is not a number of megabytes, or is negative.
+    """
+    megabytes = float(value)
+    if megabytes < 0:
+        raise ValueError("The size limit can't be negative.")
+    return int(megabytes * MEGABYTE)
+
+
+def check_length(headers=None, max_bytes: int = 0) -> None:
+    """Refuse a response whose declared length is over the limit, before its body is read.
+
+    Args:
+        headers: The response headers.
+        max_bytes (int): The limit in bytes (0 for no limit).
+
+    Raises:
+        ResponseTooLarge: If the response's Content-Length is over the limit.
+    """
+    length = (headers or {}).get('Content-Length', "")
+    if max_bytes and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(max_bytes)
+
+
+def read_limited(chunks=None, max_bytes: int = 0) -> bytes:
+    """Join a response's chunks, stopping as soon as they pass the limit.
+
+    Args:
+        chunks (Iterable): The response body, in chunks of bytes.
+        max_bytes (int): The limit in bytes (0 for no limit).
+
+    Returns:
+        bytes: The response body.
+
+    Raises:
+        ResponseTooLarge: If the body is over the limit.
+    """
+    parts = []
+    size  = 0
+    for chunk in chunks:
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise ResponseTooLarge(max_bytes)
+        parts.append(chunk)
+
+    return b"".join(parts)
+
+
+async def aread_limited(chunks=None, max_bytes: int = 0) -> bytes:
+    """Join an async response's chunks, stopping as soon as they pass the limit.
+
+    Args:
+        chunks (AsyncIterable): The response body, in chunks of bytes.
+        max_bytes (int): The limit in bytes (0 for no limit).
+
+    Returns:
+        bytes: The response body.
+
+    Raises:
+        ResponseTooLarge: If the body is over the limit.
+    """
+    parts = []
+    size  = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise ResponseTooLarge(max_bytes)
+        parts.append(chunk)
+
+    return b"".join(parts)
+
+
+def load_response(response=None, max_bytes: int = 0) -> LimitedResponse:
+    """Read a streamed ``requests.Response`` within the limit, then release its connection.
+
+    Args:
+        response (requests.Response): A response requested with ``stream=True``.
+        max_bytes (int): The limit in bytes (0 for no limit).
+
+    Returns:
+        LimitedResponse: The response with its body.
+
+    Raises:
+        ResponseTooLarge: If the response is over the limit. Its connection is closed rather than read to the end.
+    """
+    try:
+        check_length(response.headers, max_bytes)
+        content = read_limited(response.iter_content(READ_CHUNK_SIZE), max_bytes)
+    finally:
+        response.close()
+
+    return LimitedResponse(response.status_code, response.headers, content)
+
+
+async def aload_response(response=None, max_bytes: int = 0) -> LimitedResponse:
+    """Read a streamed ``httpx.Response`` within the limit, then release its connection.
+
+    Args:
+        response (httpx.Response): A response sent with ``stream=True``.
+        max_bytes (int): The limit in bytes (0 for no limit).
+
+    Returns:
+        LimitedResponse: The response with its body.
+
+    Raises:
+        ResponseTooLarge: If the response is over the limit. Its connection is closed rather than read to the end.
+    """
+    try:
+        check_length(response.headers, max_bytes)
+        content = await aread_limited(response.aiter_bytes(READ_CHUNK_SIZE), max_bytes)
+    finally:
+        await response.aclose()
+
+    return LimitedResponse(response.status_code, response.headers, content)
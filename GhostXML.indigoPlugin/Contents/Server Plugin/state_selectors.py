@@ -0,0 +1,334 @@
+"""
+Per-device state selectors for GhostXML devices.
+
+A device can list the paths it needs (``stateSelectors``), written JSONPath-style for JSON sources and ElementPath-style
+for XML sources. The flatteners match each key against the selectors as they walk the payload, so subtrees that can't
+lead to a selected path are never expanded. Everything below a selected path is kept. State names are built the same
+way as they are without selectors, so a selected instance of a repeated XML element keeps its number
+('item_2_title').
+
+JSON examples::
+
+    $.current.temp              a single value ('$.' is optional)
+    $.hourly[0].temp            an array item by index
+    $.alerts[*].event           every array item
+    $..humidity                 'humidity' at any depth
+    $['key with spaces']        a quoted key
+
+XML examples (paths are relative to the root element)::
+
+    channel/title               a single element
+    channel/item[2]/title       the second 'item' element (positions start at 1)
+    channel/*/title             any child element
+    .//temperature              'temperature' at any depth
+
+Devices can also list include and exclude key patterns (``stateInclude`` and ``stateExclude``), a lighter alternative
+to selectors. These are shell-style globs (``*``, ``?``, ``[abc]``) matched against the flattened key, with nested
+keys joined by underscores (before any other characters are replaced), e.g. ``*_links_*`` or ``*_A_t_t_r_i_b_s*``.
+"""
+import fnmatch
+import re
+
+DESCENDANT = None  # A step that matches any number of levels (JSONPath '..', ElementPath '//').
+WILDCARD   = '*'
+
+_JSON_TOKENS = re.compile(r"""\.\.|\.|\[\s*(?:\*|\d+|'[^']*'|"[^"]*")\s*]|[^.\[\]]+""")
+_XML_STEP    = re.compile(r"^(\*|[^\[\]@()=]+?)(?:\[(\d+)])?$")
+
+
+def split_selectors(text: str = "") -> list:
+    """Split a device's selector field into individual expressions.
+
+    Expressions are separated by commas (or new lines); commas inside brackets or quotes are part of the expression.
+
+    Args:
+        text (str): The selector field value.
+
+    Returns:
+        list: The non-empty expressions.
+    """
+    expressions, current, depth, quote = [], [], 0, None
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char in ',\n' and depth == 0:
+            expressions.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    expressions.append("".join(current).strip())
+
+    return [expression for expression in expressions if expression]
+
+
+def parse_json_selector(expression: str = "") -> tuple:
+    """Compile a JSONPath-style expression into a tuple of steps.
+
+    Each step is ``(name, index)``: ``(key, None)`` for an object key, ``(None, n)`` for an array index,
+    ``('*', None)`` for any key or index, or ``DESCENDANT``.
+
+    Args:
+        expression (str): The expression.
+
+    Returns:
+        tuple: The steps.
+
+    Raises:
+        ValueError: If the expression is not supported.
+    """
+    path = expression[1:] if expression.startswith('$') else f".{expression}"
+    if "".join(_JSON_TOKENS.findall(path)) != path:
+        raise ValueError(f"'{expression}' is not a supported JSON path.")
+
+    steps, pending = [], None
+    for token in _JSON_TOKENS.findall(path):
+        if token in ('.', '..'):
+            if pending is not None:
+                raise ValueError(f"'{expression}' has an empty key.")
+            pending = token
+            continue
+
+        if token.startswith('['):
+            inner = token[1:-1].strip()
+            if inner == WILDCARD:
+                step = (WILDCARD, None)
+            elif inner.isdigit():
+                step = (None, int(inner))
+            else:
+                step = (inner[1:-1], None)
+        elif pending is None:
+            raise ValueError(f"'{expression}' is missing a '.' before '{token}'.")
+        else:
+            step = (token, None)
+
+        if pending == '..':
+            steps.append(DESCENDANT)
+        pending = None
+        steps.append(step)
+
+    if pending is not None or not steps:
+        raise ValueError(f"'{expression}' must end with a key, index or wildcard.")
+
+    return tuple(steps)
+
+
+def parse_xml_selector(expression: str = "") -> tuple:
+    """Compile an ElementPath-style expression into a tuple of steps.
+
+    Each step is ``(tag, position)``, where position is ``None`` (any) or the 1-based position of the element among
+    its siblings with the same tag; or ``DESCENDANT``. Namespace prefixes are dropped, as they are from the payload.
+
+    Args:
+        expression (str): The expression.
+
+    Returns:
+        tuple: The steps.
+
+    Raises:
+        ValueError: If the expression is not supported.
+    """
+    # A leading '//' (or './/') matches any number of levels below the root element.
+    path  = expression[1:] if expression.startswith('.//') else expression
+    steps = [DESCENDANT] if path.startswith('//') else []
+    path  = path[2:] if path.startswith(('//', './')) else path
+    if path.startswith('/'):
+        raise ValueError(f"'{expression}' must be relative to the root element.")
+
+    for part in path.split('/'):
+        if part == "":
+            # The empty step between the slashes of '//'.
+            if not steps or steps[-1] is DESCENDANT:
+                raise ValueError(f"'{expression}' is not a supported XML path.")
+            steps.append(DESCENDANT)
+            continue
+        if part == '.':
+            continue
+
+        match = _XML_STEP.match(part)
+        if not match:
+            raise ValueError(f"'{expression}': '{part}' is not a supported step. Use tag, * or tag[n].")
+
+        tag = match.group(1).rpartition('}')[2].rpartition(':')[2]
+        steps.append((tag, int(match.group(2)) if match.group(2) else None))
+
+    if not steps or steps[-1] is DESCENDANT:
+        raise ValueError(f"'{expression}' must end with a tag or wildcard.")
+
+    return tuple(steps)
+
+
+class StateSelectors:
+    """A device's compiled state selectors.
+
+    Matching state is a frozenset of ``(selector, step)`` positions. ``advance()`` moves it down one level of the
+    payload; the flatteners keep a subtree only while the result is non-empty, and keep all of it once a selector has
+    been matched in full.
+    """
+
+    def __init__(self, text: str = "", feed_type: str = "JSON"):
+        """Compile the selectors in a device's selector field.
+
+        Args:
+            text (str): The selector field value.
+            feed_type (str): The device's feed type ("JSON" or "XML").
+
+        Raises:
+            ValueError: If an expression is not supported.
+        """
+        parse          = parse_xml_selector if feed_type == "XML" else parse_json_selector
+        self.selectors = tuple(parse(expression) for expression in split_selectors(text))
+        self.initial   = frozenset((number, 0) for number in range(len(self.selectors)))
+        self._cache    = {}
+
+    # =============================================================================
+    def __bool__(self) -> bool:
+        """Return whether the device has any selectors."""
+        return bool(self.selectors)
+
+    # =============================================================================
+    @staticmethod
+    def _matches(step: tuple, name, index) -> bool:
+        """Return whether a step matches one level of the payload.
+
+        Args:
+            step (tuple): The ``(name, index)`` step.
+            name: The JSON key or XML tag (None for a JSON array item).
+            index: The JSON array index or XML position (None for a JSON object key).
+
+        Returns:
+            bool: True if the step matches.
+        """
+        step_name, step_index = step
+        if step_name is None:
+            return name is None and index == step_index
+        if step_name != WILDCARD and step_name != name:
+            return False
+        return step_index is None or step_index == index
+
+    # =============================================================================
+    def advance(self, states: frozenset = None, name=None, index=None) -> frozenset | None:
+        """Return the matching state one level further down the payload.
+
+        Args:
+            states (frozenset): The matching state of the parent.
+            name: The JSON key or XML tag (None for a JSON array item).
+            index: The JSON array index or XML position (None for a JSON object key).
+
+        Returns:
+            frozenset | None: None if a selector has been matched in full (keep everything below), otherwise the new
+            state (empty if nothing below can match).
+        """
+        key = (states, name, index)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        result = set()
+        for number, position in states:
+            steps = self.selectors[number]
+            if steps[position] is DESCENDANT:
+                # Either this level is one of the levels skipped over, or it matches the next step.
+                result.add((number, position))
+                position += 1
+
+            if self._matches(steps[position], name, index):
+                if position + 1 == len(steps):
+                    result = None
+                    break
+                result.add((number, position + 1))
+
+        result = None if result is None else frozenset(result)
+        if len(self._cache) < 4096:
+            self._cache[key] = result
+
+        return result
+
+
+class KeyFilters:
+    """A device's compiled include and exclude key patterns.
+
+    Matching state is a bool: True once every key below a branch is included. ``descend()`` returns None for a branch
+    whose keys would all be dropped, so the flatteners never expand it; ``keep()`` decides each leaf key.
+    """
+
+    def __init__(self, include: str = "", exclude: str = ""):
+        """Compile the patterns in a device's include and exclude fields.
+
+        Args:
+            include (str): The include field value. If empty, every key not excluded is kept.
+            exclude (str): The exclude field value.
+        """
+        include = split_selectors(include)
+        exclude = split_selectors(exclude)
+
+        self.include     = self._compile(include)
+        self.exclude     = self._compile(exclude)
+        # A pattern ending in '*' that matches a branch prefix matches every key below it.
+        self.include_all = self._compile([pattern for pattern in include if pattern.endswith('*')])
+        self.exclude_all = self._compile([pattern for pattern in exclude if pattern.endswith('*')])
+        # The literal text each include pattern starts with; a branch that can't lead to one is skipped.
+        self.prefixes    = tuple(re.split(r"[*?\[]", pattern, maxsplit=1)[0] for pattern in include)
+        self.initial     = self.include is None
+
+    # =============================================================================
+    @staticmethod
+    def _compile(patterns: list):
+        """Compile a list of glob patterns into a single regular expression.
+
+        Args:
+            patterns (list): The glob patterns.
+
+        Returns:
+            re.Pattern | None: The compiled expression, or None if there are no patterns.
+        """
+        if not patterns:
+            return None
+        return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+    # =============================================================================
+    def __bool__(self) -> bool:
+        """Return whether the device has any include or exclude patterns."""
+        return self.include is not None or self.exclude is not None
+
+    # =============================================================================
+    def descend(self, key: str = "", included: bool = False) -> bool | None:
+        """Return the matching state for the keys below a branch.
+
+        Args:
+            key (str): The branch's flattened key.
+            included (bool): The matching state of the branch's parent.
+
+        Returns:
+            bool | None: None if every key below the branch is dropped, otherwise True if every key below it (that
+            isn't excluded) is kept.
+        """
+        branch = f"{key}_"
+        if self.exclude_all is not None and self.exclude_all.match(branch):
+            return None
+        if included or (self.include_all is not None and self.include_all.match(branch)):
+            return True
+        if not any(prefix.startswith(branch) or branch.startswith(prefix) for prefix in self.prefixes):
+            return None
+        return False
+
+    # =============================================================================
+    def keep(self, key: str = "", included: bool = False) -> bool:
+        """Return whether a leaf key is kept.
+
+        Args:
+            key (str): The flattened key.
+            included (bool): The matching state of the key's parent.
+
+        Returns:
+            bool: True if the key is kept.
+        """
+        if self.exclude is not None and self.exclude.match(key):
+            return False
+        return included or self.include.match(key) is not None
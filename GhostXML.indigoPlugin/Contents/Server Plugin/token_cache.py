@@ -0,0 +1,129 @@
+"""
+Shared access-token cache for GhostXML devices that use Token authentication.
+
+A Token device POSTs its credentials to the token URL for an ``access_token`` before it requests its data. Tokens are
+cached by token URL and credentials, so devices that share a token server share one token and only ask for a new one
+when it is about to expire: after ``TOKEN_REFRESH_FRACTION`` of its lifetime has passed. The lifetime is the reply's
+``expires_in`` value when it has one, and the configured TTL otherwise (a TTL of zero turns caching off for such
+servers).
+"""
+import threading
+import time as t
+
+TOKEN_REFRESH_FRACTION = 0.9  # Tokens are renewed once this much of their lifetime has passed.
+
+
+class TokenCache:
+    """A thread-safe cache of access tokens keyed by token URL and credentials.
+
+    ``lock()`` returns a per-key lock, so that when several devices need a new token at once
+    only one of them asks the token server for it.
+    """
+
+    def __init__(self, ttl: int = 300):
+        """Initialize the cache.
+
+        Args:
+            ttl (int): The number of seconds a token is kept when the token server doesn't say
+                how long it lasts.
+        """
+        self.ttl    = ttl
+        self.tokens = {}  # key: (access token, epoch time it is renewed)
+        self.locks  = {}  # key: threading.Lock
+        self._lock  = threading.Lock()
+
+    # =============================================================================
+    @staticmethod
+    def token_key(request: dict = None) -> tuple:
+        """Return the cache key for a request: the token URL and credentials.
+
+        Args:
+            request (dict): The request description built by ``PluginDevice.build_request()``.
+
+        Returns:
+            tuple: The cache key.
+        """
+        return request['token_url'], request['username'], request['password']
+
+    # =============================================================================
+    def get(self, key: tuple = None) -> str | None:
+        """Return the cached token, unless it is due to be renewed.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            str | None: The token, or None if a new one is needed.
+        """
+        with self._lock:
+            entry = self.tokens.get(key)
+            if entry is None or t.time() >= entry[1]:
+                return None
+            return entry[0]
+
+    # =============================================================================
+    def store(self, key: tuple = None, reply: dict = None) -> str:
+        """Cache the token from a token server reply.
+
+        Args:
+            key (tuple): The cache key.
+            reply (dict): The decoded reply, with ``access_token`` and optionally ``expires_in``.
+
+        Returns:
+            str: The access token.
+
+        Raises:
+            KeyError: If the reply has no ``access_token``.
+        """
+        token = reply["access_token"]
+        try:
+            lifetime = float(reply["expires_in"]) if reply.get("expires_in") is not None else self.ttl
+        except (TypeError, ValueError):
+            lifetime = self.ttl
+
+        with self._lock:
+            if lifetime > 0:
+                self.tokens[key] = (token, t.time() + lifetime * TOKEN_REFRESH_FRACTION)
+            else:
+                self.tokens.pop(key, None)
+
+        return token
+
+    # =============================================================================
+    def invalidate(self, key: tuple = None, token: str = "") -> None:
+        """Forget a token the server has rejected.
+
+        Only the rejected token is dropped; if another device has already replaced it, the
+        replacement is kept.
+
+        Args:
+            key (tuple): The cache key.
+            token (str): The rejected token.
+        """
+        with self._lock:
+            entry = self.tokens.get(key)
+            if entry is not None and entry[0] == token:
+                del self.tokens[key]
+
+    # =============================================================================
+    def lock(self, key: tuple = None) -> threading.Lock:
+        """Return the lock held while a new token is requested for a key.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            threading.Lock: The key's lock.
+        """
+        with self._lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    # =============================================================================
+    def configure(self, ttl: int = 300) -> None:
+        """Apply a new TTL. Cached tokens are kept.
+
+        Args:
+            ttl (int): The number of seconds a token is kept when the token server doesn't say
+                how long it lasts.
+        """
+        self.ttl = ttl
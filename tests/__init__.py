@@ -8,5 +8,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GhostXML.indig
 
 __all__ = [
     'test_xml',
-    'test_plugin'
+    'test_plugin',
+    'test_flatteners',
+    'test_state_selectors',
+    'test_host_limits',
+    'test_fetch_coalescer',
+    'test_token_cache',
+    'test_curl_args',
 ]
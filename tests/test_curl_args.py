@@ -0,0 +1,167 @@
+"""
+Unit tests for the translation of Raw Curl devices' curl options (curl_requests and curl_multi).
+"""
+from unittest import TestCase, skipIf
+
+import curl_multi
+from curl_requests import curl_user_agent, parse_curl_args, split_curl_args
+
+pycurl = curl_multi.pycurl
+
+
+class TestSplitCurlArgs(TestCase):
+    """
+    split_curl_args()
+    """
+
+    def test_quotes_and_line_continuations(self):
+        self.assertEqual(split_curl_args("-H 'Accept: text/xml' \\\n -u \"user:pa ss\""),
+                         ['-H', 'Accept: text/xml', '-u', 'user:pa ss'])
+
+    def test_unclosed_quote(self):
+        self.assertIsNone(split_curl_args("-H 'Accept: text/xml"))
+
+
+class TestParseCurlArgs(TestCase):
+    """
+    parse_curl_args()
+    """
+
+    def test_no_options(self):
+        self.assertEqual(parse_curl_args(""), {
+            'method': 'GET', 'headers': {'User-Agent': curl_user_agent()}, 'auth': None, 'data': None,
+            'follow_redirects': False,
+        })
+
+    def test_curl_user_agent(self):
+        self.assertRegex(curl_user_agent(), r"^curl(/\S+)?$")
+
+    def test_headers_auth_and_redirects(self):
+        options = parse_curl_args("-sL -H 'Accept: application/json' -H 'X-Empty;' -u user:secret --compressed")
+        self.assertEqual(options['headers'], {
+            'Accept': 'application/json', 'X-Empty': '', 'User-Agent': curl_user_agent()
+        })
+        self.assertEqual(options['auth'], ('user', 'secret'))
+        self.assertTrue(options['follow_redirects'])
+        self.assertEqual(parse_curl_args("--location")['follow_redirects'], True)
+
+    def test_user_agent_header(self):
+        self.assertEqual(parse_curl_args("-H 'User-Agent: sensor/1.0'")['headers'], {'User-Agent': 'sensor/1.0'})
+
+    def test_data(self):
+        options = parse_curl_args("-d a=1 --data-raw @b -XPUT")
+        self.assertEqual(options['method'], 'PUT')
+        self.assertEqual(options['data'], b"a=1&@b")
+        self.assertEqual(options['headers']['Content-Type'], 'application/x-www-form-urlencoded')
+
+        options = parse_curl_args("--data-binary '{\"a\": 1}' -H 'content-type: application/json'")
+        self.assertEqual(options['method'], 'POST')
+        self.assertEqual(options['headers']['content-type'], 'application/json')
+        self.assertNotIn('Content-Type', options['headers'])
+
+    def test_left_to_curl(self):
+        for curl_array in (
+                "-o out.json",                    # an unsupported option
+                "-H",                             # a missing value
+                "-H 'Accept:'",                   # removing one of curl's own headers
+                "-H 'Accept'",                    # a header without a value
+                "-H 'X-A: 1' -H 'x-a: 2'",        # a repeated header, which curl sends twice
+                "-u user",                        # curl would prompt for the password
+                "-d @body.json",                  # data read from a file
+                "-H 'Accept: text/xml",           # an unclosed quote
+        ):
+            with self.subTest(curl_array=curl_array):
+                self.assertIsNone(parse_curl_args(curl_array))
+
+
+@skipIf(pycurl is None, "pycurl is not installed")
+class TestCurlSetopts(TestCase):
+    """
+    curl_multi.curl_setopts()
+    """
+
+    def setopts(self, curl_array: str = "", url: str = "https://api.example.com/x", **kwargs) -> dict:
+        return dict(curl_multi.curl_setopts(curl_array, url, **kwargs))
+
+    def test_defaults(self):
+        setopts = self.setopts(timeout=7)
+        self.assertEqual(setopts[pycurl.URL], "https://api.example.com/x")
+        self.assertEqual(setopts[pycurl.TIMEOUT_MS], 7000)
+        self.assertEqual(setopts[pycurl.SSL_VERIFYPEER], 0)
+        self.assertEqual(setopts[pycurl.SSL_VERIFYHOST], 0)
+        self.assertTrue(setopts[pycurl.USERAGENT].startswith("curl/"))
+        self.assertNotIn(pycurl.MAXFILESIZE_LARGE, setopts)
+
+    def test_options(self):
+        setopts = self.setopts(
+            "-sSL -H 'Accept: text/xml' -H 'X-A: 1' -H 'X-A: 2' -u user:secret --digest -XPOST -A agent -e ref "
+            "-b a=1 -x proxy:3128 -m 2.5 --connect-timeout 1 --compressed --http1.1 -f", timeout=5, max_bytes=1024
+        )
+        self.assertEqual(setopts[pycurl.HTTPHEADER], ['Accept: text/xml', 'X-A: 1', 'X-A: 2'])
+        self.assertEqual(setopts[pycurl.USERPWD], "user:secret")
+        self.assertEqual(setopts[pycurl.HTTPAUTH], pycurl.HTTPAUTH_DIGEST)
+        self.assertEqual(setopts[pycurl.CUSTOMREQUEST], "POST")
+        self.assertEqual(setopts[pycurl.USERAGENT], "agent")
+        self.assertEqual(setopts[pycurl.REFERER], "ref")
+        self.assertEqual(setopts[pycurl.COOKIE], "a=1")
+        self.assertEqual(setopts[pycurl.PROXY], "proxy:3128")
+        self.assertEqual(setopts[pycurl.TIMEOUT_MS], 2500)
+        self.assertEqual(setopts[pycurl.CONNECTTIMEOUT_MS], 1000)
+        self.assertEqual(setopts[pycurl.ACCEPT_ENCODING], "")
+        self.assertEqual(setopts[pycurl.HTTP_VERSION], pycurl.CURL_HTTP_VERSION_1_1)
+        self.assertEqual(setopts[pycurl.FOLLOWLOCATION], 1)
+        self.assertEqual(setopts[pycurl.FAILONERROR], 1)
+        self.assertEqual(setopts[pycurl.MAXFILESIZE_LARGE], 1024)
+
+    def test_data(self):
+        setopts = self.setopts("-d a=1 --data 'b=2'")
+        self.assertEqual(setopts[pycurl.POSTFIELDS], b"a=1&b=2")
+        self.assertEqual(setopts[pycurl.POSTFIELDSIZE], 7)
+
+        setopts = self.setopts("-G -d a=1", url="https://api.example.com/x?b=2")
+        self.assertEqual(setopts[pycurl.URL], "https://api.example.com/x?b=2&a=1")
+        self.assertNotIn(pycurl.POSTFIELDS, setopts)
+
+    def test_url_globbing(self):
+        with self.assertRaises(ValueError):
+            self.setopts(url="https://api.example.com/x[1-2]")
+        self.assertIn(pycurl.URL, self.setopts(url="https://api.example.com/x[1-2]", glob_off=True))
+        self.assertIn(pycurl.URL, self.setopts("-g", url="https://api.example.com/x[1-2]"))
+
+    def test_unsupported(self):
+        for curl_array in ("-o out.json", "-H", "-u user", "-d @body.json", "-b cookies.txt", "-m soon", "'unclosed"):
+            with self.subTest(curl_array=curl_array), self.assertRaises(ValueError):
+                self.setopts(curl_array)
+
+
+@skipIf(pycurl is None, "pycurl is not installed")
+class TestCurlMultiEngine(TestCase):
+    """
+    curl_multi.CurlMultiEngine
+    """
+
+    def setUp(self):
+        self.engine = curl_multi.CurlMultiEngine()
+        self.addCleanup(self.engine.close)
+
+    def test_multi_handle_error_fails_transfers(self):
+        multi = self.engine.multi
+
+        class FailingMulti:
+            """Fails the first select(), as a broken multi handle would."""
+
+            def __getattr__(self, name):
+                return getattr(multi, name)
+
+            @staticmethod
+            def select(_):
+                raise pycurl.error(pycurl.E_MULTI_OUT_OF_MEMORY, "out of memory")
+
+        self.engine.multi = FailingMulti()
+        request = {'curl_array': "", 'url': "http://127.0.0.1:9/", 'timeout': 5, 'glob_off': False, 'max_bytes': 0}
+        future  = self.engine.submit(request)
+        self.assertIsInstance(future.exception(timeout=5), IOError)
+
+        # The engine carries on with a new multi handle.
+        self.assertTrue(self.engine.thread.is_alive())
+        self.assertIsInstance(self.engine.submit(request).result(timeout=10), curl_multi.CurlResponse)
@@ -0,0 +1,107 @@
+"""
+Unit tests for request coalescing (fetch_coalescer).
+"""
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from fetch_coalescer import FetchCoalescer
+
+REQUEST = {
+    'url': "https://api.example.com/data", 'auth_type': "None", 'username': "", 'password': "", 'token': "",
+    'token_url': "", 'headers': {'B': "2", 'A': "1"}, 'max_bytes': 1024,
+}
+
+
+class TestFetchCoalescer(TestCase):
+    """
+    FetchCoalescer
+    """
+
+    def setUp(self):
+        self.coalescer = FetchCoalescer(window=5.0)
+        self.key       = FetchCoalescer.request_key(REQUEST)
+        self.calls     = 0
+
+    def start(self, response="body"):
+        def make_request():
+            self.calls += 1
+            return response
+        return make_request
+
+    def test_request_key(self):
+        self.assertEqual(self.key, FetchCoalescer.request_key(dict(REQUEST, headers={'A': "1", 'B': "2"})))
+        for change in ({'url': "https://api.example.com/other"}, {'password': "x"}, {'max_bytes': 0},
+                       {'headers': {'A': "1"}}):
+            with self.subTest(change=change):
+                self.assertNotEqual(self.key, FetchCoalescer.request_key(dict(REQUEST, **change)))
+
+    def test_completed_fetch_is_shared(self):
+        first  = self.coalescer.fetch(self.key, self.start())
+        second = self.coalescer.fetch(self.key, self.start())
+        self.assertIs(first, second)
+        self.assertEqual(second.result(), "body")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.coalescer.shared, 1)
+
+    def test_in_flight_fetch_is_shared(self):
+        pending = Future()
+        first   = self.coalescer.fetch(self.key, lambda: pending)
+        second  = self.coalescer.fetch(self.key, self.start())
+        self.assertIs(first, second)
+        self.assertFalse(second.done())
+        pending.set_result("async body")
+        self.assertEqual(second.result(), "async body")
+        self.assertEqual(self.calls, 0)
+
+    def test_fetch_expires(self):
+        with patch('fetch_coalescer.t.time', return_value=1000.0):
+            self.coalescer.fetch(self.key, self.start())
+        with patch('fetch_coalescer.t.time', return_value=1006.0):
+            self.coalescer.fetch(self.key, self.start())
+        self.assertEqual(self.calls, 2)
+
+    def test_failed_fetch_is_not_reused(self):
+        def fail():
+            raise IOError("unreachable")
+
+        failed = self.coalescer.fetch(self.key, fail)
+        self.assertIsInstance(failed.exception(), IOError)
+        self.assertEqual(self.coalescer.fetch(self.key, self.start()).result(), "body")
+
+    def test_failed_async_fetch_is_not_reused(self):
+        pending = Future()
+        failed  = self.coalescer.fetch(self.key, lambda: pending)
+        pending.set_exception(IOError("unreachable"))
+        self.assertIsInstance(failed.exception(), IOError)
+        self.assertEqual(self.coalescer.fetch(self.key, self.start()).result(), "body")
+
+    def test_error_response_is_not_reused(self):
+        for response in (SimpleNamespace(status_code=500), SimpleNamespace(return_code=7)):
+            with self.subTest(response=response):
+                coalescer = FetchCoalescer(window=5.0)
+                self.assertIs(coalescer.fetch(self.key, self.start(response)).result(), response)
+                self.assertEqual(coalescer.fetch(self.key, self.start()).result(), "body")
+        self.assertEqual(self.calls, 4)
+
+    def test_not_modified_response_is_shared(self):
+        response = SimpleNamespace(status_code=304)
+        self.coalescer.fetch(self.key, self.start(response))
+        self.assertIs(self.coalescer.fetch(self.key, self.start()).result(), response)
+        self.assertEqual(self.calls, 1)
+
+    def test_parsed(self):
+        states = {'a': 1}
+        self.assertIsNone(self.coalescer.parsed(("digest", "JSON")))
+        self.coalescer.store_parsed(("digest", "JSON"), states)
+        shared = self.coalescer.parsed(("digest", "JSON"))
+        self.assertEqual(shared, states)
+        # Each device gets its own copy.
+        shared['b'] = 2
+        self.assertEqual(self.coalescer.parsed(("digest", "JSON")), states)
+
+    def test_zero_window_keeps_no_parses(self):
+        self.coalescer.configure(window=0)
+        self.coalescer.store_parsed(("digest", "JSON"), {'a': 1})
+        self.assertIsNone(self.coalescer.parsed(("digest", "JSON")))
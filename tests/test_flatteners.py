@@ -0,0 +1,226 @@
+"""
+Unit tests for the JSON and XML flatteners (iterateJSON and iterateXML).
+
+The expected states were produced by the flatteners these modules replaced (``flatdict.FlatDict`` for JSON and the
+``XmlDictConfig`` walk in the previous iterateXML), so device state names and values are unchanged.
+"""
+import json
+from unittest import TestCase
+
+import iterateJSON
+import iterateXML
+from state_selectors import KeyFilters, StateSelectors
+
+JSON_PAYLOAD = json.dumps({
+    "name": "Station 1",
+    "online": True,
+    "updated": None,
+    "current": {"temp": 21.5, "humidity": 40, "wind": {"speed": 3, "dir": "NW"}},
+    "hourly": [{"temp": 20, "rain": False}, {"temp": 19, "rain": True}],
+    "tags": ["a", "b"],
+    "alerts": [],
+    "extra": {},
+})
+
+# flatdict.FlatDict(payload, delimiter='_ghostxml_')
+JSON_STATES = {
+    'name': 'Station 1',
+    'online': True,
+    'updated': None,
+    'current_ghostxml_temp': 21.5,
+    'current_ghostxml_humidity': 40,
+    'current_ghostxml_wind_ghostxml_speed': 3,
+    'current_ghostxml_wind_ghostxml_dir': 'NW',
+    'hourly_ghostxml_0_ghostxml_temp': 20,
+    'hourly_ghostxml_0_ghostxml_rain': False,
+    'hourly_ghostxml_1_ghostxml_temp': 19,
+    'hourly_ghostxml_1_ghostxml_rain': True,
+    'tags_ghostxml_0': 'a',
+    'tags_ghostxml_1': 'b',
+    'alerts': None,
+    'extra': None,
+}
+
+XML_PAYLOAD = b"""<?xml version="1.0"?>
+<rss version="2.0">
+  <channel>
+    <title>Feed</title>
+    <link href="https://example.com">Home</link>
+    <item id="1"><title>First</title><enclosure url="a.mp3" length="10"/></item>
+    <item id="2"><title>Second</title><category>x</category><category>y</category></item>
+    <ttl>60</ttl>
+  </channel>
+</rss>"""
+
+# The previous iterateXML.iterate_main(payload)
+XML_STATES = {
+    'version': '2.0',
+    'channel_title': 'Feed',
+    'channel_link': 'Home',
+    'channel_link_href': 'https://example.com',
+    'channel_item_1_title': 'First',
+    'channel_item_1_enclosure': None,
+    'channel_item_1_enclosure_url': 'a.mp3',
+    'channel_item_1_enclosure_length': '10',
+    'channel_item_1_id': '1',
+    'channel_item_2_title': 'Second',
+    'channel_item_2_category': 'x',
+    'channel_item_2_id': '2',
+    'channel_ttl': '60',
+}
+
+
+class TestIterateJSON(TestCase):
+    """
+    iterateJSON.iterate_main()
+    """
+
+    def flatten(self, payload, **kwargs) -> dict:
+        return dict(iterateJSON.iterate_main(iterateJSON.loads(payload), **kwargs))
+
+    def test_matches_flatdict(self):
+        states = self.flatten(JSON_PAYLOAD)
+        self.assertEqual(states, JSON_STATES)
+        self.assertEqual(list(states), list(JSON_STATES))
+
+    def test_top_level_list(self):
+        # Indigo state names can't begin with a number.
+        states = self.flatten('[{"id": 1, "v": "on"}, {"id": 2, "v": "off"}, 7]')
+        self.assertEqual(states, {
+            'No_0_ghostxml_id': 1, 'No_0_ghostxml_v': 'on', 'No_1_ghostxml_id': 2, 'No_1_ghostxml_v': 'off', 'No_2': 7
+        })
+
+    def test_scalar_payload(self):
+        self.assertEqual(self.flatten('42'), {})
+
+    def test_loads_bytes(self):
+        self.assertEqual(iterateJSON.loads(JSON_PAYLOAD.encode()), json.loads(JSON_PAYLOAD))
+
+    def test_loads_invalid(self):
+        with self.assertRaises(ValueError):
+            iterateJSON.loads(b'{"a": ')
+
+    def test_max_keys(self):
+        with self.assertLogs("Plugin", "WARNING") as logs:
+            states = self.flatten('{"a": 1, "b": 2, "c": 3, "d": 4}', max_keys=3)
+        self.assertEqual(states, {'a': 1, 'b': 2, 'c': 3})
+        self.assertIn("more than 3 values", logs.output[0])
+
+    def test_max_keys_exactly_reached(self):
+        with self.assertNoLogs("Plugin", "WARNING"):
+            states = self.flatten('{"a": 1, "b": 2, "c": 3}', max_keys=3)
+        self.assertEqual(len(states), 3)
+
+    def test_max_depth(self):
+        with self.assertLogs("Plugin", "WARNING") as logs:
+            states = self.flatten('{"a": {"b": {"c": 1}}, "d": 2}', max_depth=1)
+        self.assertEqual(states, {'d': 2})
+        self.assertIn("more than 1 levels deep", logs.output[0])
+
+    def test_max_depth_and_max_keys(self):
+        with self.assertLogs("Plugin", "WARNING") as logs:
+            states = self.flatten('{"a": {"b": 1}, "c": 2, "d": 3}', max_depth=0, max_keys=1)
+        self.assertEqual(states, {'c': 2})
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("more than 0 levels deep", logs.output[0])
+        self.assertIn("more than 1 values", logs.output[1])
+
+    def test_selectors(self):
+        selectors = StateSelectors("$.current.temp, $.hourly[1].temp", "JSON")
+        self.assertEqual(self.flatten(JSON_PAYLOAD, selectors=selectors), {
+            'current_ghostxml_temp': 21.5, 'hourly_ghostxml_1_ghostxml_temp': 19,
+        })
+
+    def test_selector_subtree_and_descendant(self):
+        self.assertEqual(self.flatten(JSON_PAYLOAD, selectors=StateSelectors("$.current.wind", "JSON")), {
+            'current_ghostxml_wind_ghostxml_speed': 3, 'current_ghostxml_wind_ghostxml_dir': 'NW',
+        })
+        self.assertEqual(self.flatten(JSON_PAYLOAD, selectors=StateSelectors("$..temp", "JSON")), {
+            'current_ghostxml_temp': 21.5, 'hourly_ghostxml_0_ghostxml_temp': 20, 'hourly_ghostxml_1_ghostxml_temp': 19,
+        })
+
+    def test_selected_states_keep_their_names(self):
+        states    = self.flatten(JSON_PAYLOAD)
+        selectors = StateSelectors("$.hourly[*].rain, $.tags[1], $.alerts", "JSON")
+        selected  = self.flatten(JSON_PAYLOAD, selectors=selectors)
+        self.assertEqual(set(selected), {
+            'hourly_ghostxml_0_ghostxml_rain', 'hourly_ghostxml_1_ghostxml_rain', 'tags_ghostxml_1', 'alerts'
+        })
+        self.assertTrue(all(states[key] == value for key, value in selected.items()))
+
+    def test_filters(self):
+        filters = KeyFilters(include="current_*, name", exclude="*_wind_*")
+        self.assertEqual(self.flatten(JSON_PAYLOAD, filters=filters), {
+            'name': 'Station 1', 'current_ghostxml_temp': 21.5, 'current_ghostxml_humidity': 40,
+        })
+
+
+class TestIterateXML(TestCase):
+    """
+    iterateXML.iterate_main()
+    """
+
+    def test_matches_xml_dict_config(self):
+        states = iterateXML.iterate_main(XML_PAYLOAD)
+        self.assertEqual(states, XML_STATES)
+        self.assertEqual(list(states), list(XML_STATES))
+
+    def test_str_payload(self):
+        self.assertEqual(iterateXML.iterate_main(XML_PAYLOAD.decode()), XML_STATES)
+
+    def test_declared_encoding(self):
+        payload = '<?xml version="1.0" encoding="ISO-8859-1"?><r><city>Zürich</city></r>'.encode('latin-1')
+        self.assertEqual(iterateXML.iterate_main(payload), {'city': 'Zürich'})
+
+    def test_namespaces_dropped(self):
+        payload = (b'<r xmlns="urn:a" xmlns:b="urn:b" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                   b'xsi:schemaLocation="urn:a a.xsd"><b:v b:unit="C">5</b:v></r>')
+        self.assertEqual(iterateXML.iterate_main(payload), {'v': '5', 'v_unit': 'C'})
+
+    def test_max_keys(self):
+        with self.assertLogs("Plugin", "WARNING") as logs:
+            states = iterateXML.iterate_main(b"<r><a>1</a><b>2</b><c>3</c><d>4</d></r>", max_keys=3)
+        self.assertEqual(states, {'a': '1', 'b': '2', 'c': '3'})
+        self.assertIn("more than 3 values", logs.output[0])
+
+    def test_max_keys_exactly_reached(self):
+        with self.assertNoLogs("Plugin", "WARNING"):
+            states = iterateXML.iterate_main(b"<r><a>1</a><b>2</b><c>3</c></r>", max_keys=3)
+        self.assertEqual(len(states), 3)
+
+    def test_max_depth(self):
+        with self.assertLogs("Plugin", "WARNING"):
+            states = iterateXML.iterate_main(b"<r><a><b><c>1</c></b></a><d>2</d></r>", max_depth=1)
+        self.assertEqual(states, {'d': '2'})
+
+    def test_selectors(self):
+        selectors = StateSelectors("channel/title, channel/item[2]/title", "XML")
+        self.assertEqual(iterateXML.iterate_main(XML_PAYLOAD, selectors=selectors), {
+            'channel_title': 'Feed', 'channel_item_2_title': 'Second',
+        })
+
+    def test_selected_states_keep_their_names(self):
+        for expression in ("channel/item[1]", "channel/item[2]", "channel/item/title", ".//title", "channel/link",
+                           "channel/item[2]/category[1]", "channel/*/enclosure"):
+            with self.subTest(expression=expression):
+                selected = iterateXML.iterate_main(XML_PAYLOAD, selectors=StateSelectors(expression, "XML"))
+                self.assertTrue(selected)
+                self.assertTrue(all(XML_STATES.get(key) == value for key, value in selected.items()), selected)
+
+    def test_selected_leaf_that_has_no_state(self):
+        # Only the first instance of a repeated leaf is a state, so selecting a later one selects nothing.
+        selectors = StateSelectors("channel/item[2]/category[2]", "XML")
+        self.assertEqual(iterateXML.iterate_main(XML_PAYLOAD, selectors=selectors), {})
+
+    def test_selected_instance_of_a_single_element(self):
+        selected = iterateXML.iterate_main(XML_PAYLOAD, selectors=StateSelectors("channel/item[1]", "XML"))
+        self.assertEqual(selected, {
+            'channel_item_1_title': 'First', 'channel_item_1_enclosure': None, 'channel_item_1_enclosure_url': 'a.mp3',
+            'channel_item_1_enclosure_length': '10', 'channel_item_1_id': '1',
+        })
+
+    def test_filters(self):
+        filters = KeyFilters(exclude="channel_item_*")
+        self.assertEqual(iterateXML.iterate_main(XML_PAYLOAD, filters=filters), {
+            key: value for key, value in XML_STATES.items() if not key.startswith('channel_item_')
+        })
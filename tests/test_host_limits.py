@@ -0,0 +1,109 @@
+"""
+Unit tests for per-host request limits (host_limits).
+"""
+import threading
+import time
+from unittest import TestCase
+
+from host_limits import HostLimiter, parse_overrides
+
+
+class TestParseOverrides(TestCase):
+    """
+    parse_overrides()
+    """
+
+    def test_overrides(self):
+        self.assertEqual(parse_overrides("192.168.1.20=1, API.example.com=4/2.5\nhost=0"), {
+            '192.168.1.20': (1, 0.0), 'api.example.com': (4, 2.5), 'host': (0, 0.0)
+        })
+
+    def test_empty(self):
+        self.assertEqual(parse_overrides(" , \n"), {})
+
+    def test_invalid(self):
+        for text in ("host", "host=x", "=2", "host=-1", "host=1/-2", "host=1/x"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_overrides(text)
+
+
+class TestHostLimiter(TestCase):
+    """
+    HostLimiter
+    """
+
+    def setUp(self):
+        self.started = []
+
+    def start(self, name: str):
+        return lambda held_host: self.started.append((name, held_host))
+
+    def test_host_of(self):
+        self.assertEqual(HostLimiter.host_of({'call_type': "request", 'url': "https://API.example.com:8443/x"}),
+                         "api.example.com")
+        self.assertEqual(HostLimiter.host_of({'call_type': "file", 'url': "file:///tmp/a.json"}), "")
+        self.assertEqual(HostLimiter.host_of(None), "")
+
+    def test_unlimited_hosts_start_at_once(self):
+        limiter = HostLimiter()
+        limiter.run("a.example.com", self.start("first"))
+        limiter.run("", self.start("file"))
+        self.assertEqual(self.started, [("first", ""), ("file", "")])
+
+    def test_concurrency_limit(self):
+        limiter = HostLimiter(max_concurrent=2)
+        for name in ("one", "two", "three"):
+            limiter.run("a.example.com", self.start(name))
+        self.assertEqual(self.started, [("one", "a.example.com"), ("two", "a.example.com")])
+
+        # Other hosts have their own slots.
+        limiter.run("b.example.com", self.start("other"))
+        self.assertEqual(self.started[-1], ("other", "b.example.com"))
+
+        limiter.release("a.example.com")
+        self.assertEqual(self.started[-1], ("three", "a.example.com"))
+
+    def test_release_unknown_host(self):
+        limiter = HostLimiter(max_concurrent=1)
+        limiter.release("")
+        limiter.release("never.example.com")
+        self.assertEqual(limiter.hosts, {})
+
+    def test_override(self):
+        limiter = HostLimiter(max_concurrent=1, overrides={'slow.example.com': (0, 0)})
+        for name in ("one", "two"):
+            limiter.run("slow.example.com", self.start(name))
+        self.assertEqual(self.started, [("one", ""), ("two", "")])
+
+    def test_rate_limit(self):
+        limiter = HostLimiter(rate=20.0)
+        done    = threading.Event()
+        times   = []
+
+        def start(_):
+            times.append(time.monotonic())
+            if len(times) == 25:
+                done.set()
+
+        for _ in range(25):
+            limiter.run("a.example.com", start)
+        # A burst of one second's worth starts at once; the rest wait for the bucket to refill.
+        self.assertEqual(len(times), 20)
+        self.assertTrue(done.wait(2))
+        self.assertGreaterEqual(times[-1] - times[0], 0.2)
+        limiter.close()
+
+    def test_configure_starts_queued_requests(self):
+        limiter = HostLimiter(max_concurrent=1)
+        for name in ("one", "two"):
+            limiter.run("a.example.com", self.start(name))
+        limiter.configure(max_concurrent=2)
+        self.assertEqual([name for name, _ in self.started], ["one", "two"])
+
+    def test_close_drops_queued_requests(self):
+        limiter = HostLimiter(max_concurrent=1)
+        for name in ("one", "two"):
+            limiter.run("a.example.com", self.start(name))
+        limiter.close()
+        limiter.release("a.example.com")
+        self.assertEqual([name for name, _ in self.started], ["one"])
@@ -0,0 +1,129 @@
+"""
+Unit tests for state selectors and key filters (state_selectors).
+"""
+from unittest import TestCase
+
+from state_selectors import (
+    DESCENDANT, KeyFilters, StateSelectors, parse_json_selector, parse_xml_selector, split_selectors
+)
+
+
+class TestSplitSelectors(TestCase):
+    """
+    split_selectors()
+    """
+
+    def test_commas_and_new_lines(self):
+        self.assertEqual(split_selectors("$.a, $.b\n$.c[1]"), ['$.a', '$.b', '$.c[1]'])
+
+    def test_commas_inside_brackets_and_quotes(self):
+        self.assertEqual(split_selectors("$['a,b'].c, a[\"x,y\"]"), ["$['a,b'].c", 'a["x,y"]'])
+
+    def test_empty(self):
+        self.assertEqual(split_selectors(" , \n"), [])
+
+
+class TestParseJsonSelector(TestCase):
+    """
+    parse_json_selector()
+    """
+
+    def test_steps(self):
+        self.assertEqual(parse_json_selector("$.hourly[0].temp"), (('hourly', None), (None, 0), ('temp', None)))
+        self.assertEqual(parse_json_selector("$.alerts[*].event"),
+                         (('alerts', None), ('*', None), ('event', None)))
+        self.assertEqual(parse_json_selector("$..humidity"), (DESCENDANT, ('humidity', None)))
+        self.assertEqual(parse_json_selector("$['key with spaces']"), (('key with spaces', None),))
+
+    def test_leading_dollar_is_optional(self):
+        self.assertEqual(parse_json_selector("current.temp"), parse_json_selector("$.current.temp"))
+
+    def test_unsupported(self):
+        for expression in ("$", "$.a.", "$.a..", "$.a[?(@.b)]", "$a"):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                parse_json_selector(expression)
+
+
+class TestParseXmlSelector(TestCase):
+    """
+    parse_xml_selector()
+    """
+
+    def test_steps(self):
+        self.assertEqual(parse_xml_selector("channel/item[2]/title"),
+                         (('channel', None), ('item', 2), ('title', None)))
+        self.assertEqual(parse_xml_selector("channel/*/title"), (('channel', None), ('*', None), ('title', None)))
+        self.assertEqual(parse_xml_selector(".//temperature"), (DESCENDANT, ('temperature', None)))
+        self.assertEqual(parse_xml_selector("a//b"), (('a', None), DESCENDANT, ('b', None)))
+
+    def test_namespace_prefix_dropped(self):
+        self.assertEqual(parse_xml_selector("soap:Body/x"), (('Body', None), ('x', None)))
+
+    def test_unsupported(self):
+        for expression in ("/rss/channel", "a/", "a///b", "item[@id='1']", "a//"):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                parse_xml_selector(expression)
+
+
+class TestStateSelectors(TestCase):
+    """
+    StateSelectors.advance()
+    """
+
+    def test_bool(self):
+        self.assertFalse(StateSelectors("", "JSON"))
+        self.assertTrue(StateSelectors("$.a", "JSON"))
+
+    def test_advance(self):
+        selectors = StateSelectors("channel/item[2]", "XML")
+        channel   = selectors.advance(selectors.initial, 'channel', 1)
+        self.assertTrue(channel)
+        self.assertEqual(selectors.advance(selectors.initial, 'other', 1), frozenset())
+        self.assertEqual(selectors.advance(channel, 'item', 1), frozenset())
+        # A selector matched in full keeps everything below it.
+        self.assertIsNone(selectors.advance(channel, 'item', 2))
+
+    def test_descendant(self):
+        selectors = StateSelectors("$..temp", "JSON")
+        states    = selectors.advance(selectors.initial, 'hourly', None)
+        states    = selectors.advance(states, None, 3)
+        self.assertIsNone(selectors.advance(states, 'temp', None))
+
+    def test_json_index_and_key_differ(self):
+        selectors = StateSelectors("$.a[0]", "JSON")
+        states    = selectors.advance(selectors.initial, 'a', None)
+        self.assertIsNone(selectors.advance(states, None, 0))
+        self.assertEqual(selectors.advance(states, '0', None), frozenset())
+
+
+class TestKeyFilters(TestCase):
+    """
+    KeyFilters
+    """
+
+    def test_bool(self):
+        self.assertFalse(KeyFilters("", ""))
+        self.assertTrue(KeyFilters("", "*_links_*"))
+
+    def test_exclude_only(self):
+        filters = KeyFilters(exclude="*_links_*, debug")
+        self.assertTrue(filters.keep("data_value", filters.initial))
+        self.assertFalse(filters.keep("debug", filters.initial))
+        self.assertIsNone(filters.descend("data_links", filters.initial))
+
+    def test_include(self):
+        filters = KeyFilters(include="current_*")
+        self.assertTrue(filters.keep("current_temp", filters.initial))
+        self.assertFalse(filters.keep("hourly_temp", filters.initial))
+        # Branches that can't lead to an included key are skipped; matching branches include everything below.
+        self.assertIsNone(filters.descend("hourly", filters.initial))
+        self.assertTrue(filters.descend("current", filters.initial))
+
+    def test_include_prefix_branch(self):
+        filters = KeyFilters(include="a_b_c")
+        self.assertIs(filters.descend("a", filters.initial), False)
+        self.assertIsNone(filters.descend("x", filters.initial))
+
+    def test_exclude_wins(self):
+        filters = KeyFilters(include="*", exclude="*_secret")
+        self.assertFalse(filters.keep("api_secret", filters.descend("api", filters.initial)))
@@ -0,0 +1,68 @@
+"""
+Unit tests for the shared access-token cache (token_cache).
+"""
+from unittest import TestCase
+from unittest.mock import patch
+
+from token_cache import TOKEN_REFRESH_FRACTION, TokenCache
+
+REQUEST = {'token_url': "https://auth.example.com/token", 'username': "user", 'password': "secret"}
+
+
+class TestTokenCache(TestCase):
+    """
+    TokenCache
+    """
+
+    def setUp(self):
+        self.cache = TokenCache(ttl=100)
+        self.key   = TokenCache.token_key(REQUEST)
+
+    def test_token_key(self):
+        self.assertEqual(self.key, ("https://auth.example.com/token", "user", "secret"))
+        self.assertNotEqual(self.key, TokenCache.token_key(dict(REQUEST, password="other")))
+
+    def test_store_and_get(self):
+        self.assertIsNone(self.cache.get(self.key))
+        self.assertEqual(self.cache.store(self.key, {'access_token': "abc"}), "abc")
+        self.assertEqual(self.cache.get(self.key), "abc")
+
+    def test_renewed_before_expiry(self):
+        with patch('token_cache.t.time', return_value=1000.0):
+            self.cache.store(self.key, {'access_token': "abc", 'expires_in': 60})
+        with patch('token_cache.t.time', return_value=1000.0 + 60 * TOKEN_REFRESH_FRACTION - 1):
+            self.assertEqual(self.cache.get(self.key), "abc")
+        with patch('token_cache.t.time', return_value=1000.0 + 60 * TOKEN_REFRESH_FRACTION):
+            self.assertIsNone(self.cache.get(self.key))
+
+    def test_ttl_used_without_expires_in(self):
+        for reply in ({'access_token': "abc"}, {'access_token': "abc", 'expires_in': None},
+                      {'access_token': "abc", 'expires_in': "soon"}):
+            with self.subTest(reply=reply):
+                with patch('token_cache.t.time', return_value=1000.0):
+                    self.cache.store(self.key, reply)
+                self.assertEqual(self.cache.tokens[self.key][1], 1000.0 + 100 * TOKEN_REFRESH_FRACTION)
+
+    def test_zero_ttl_disables_caching(self):
+        cache = TokenCache(ttl=0)
+        self.assertEqual(cache.store(self.key, {'access_token': "abc"}), "abc")
+        self.assertIsNone(cache.get(self.key))
+        # A token server that says how long its tokens last is still cached.
+        cache.store(self.key, {'access_token': "def", 'expires_in': 60})
+        self.assertEqual(cache.get(self.key), "def")
+
+    def test_reply_without_token(self):
+        with self.assertRaises(KeyError):
+            self.cache.store(self.key, {'error': "denied"})
+
+    def test_invalidate(self):
+        self.cache.store(self.key, {'access_token': "new"})
+        # A token another device has already replaced is not dropped.
+        self.cache.invalidate(self.key, "old")
+        self.assertEqual(self.cache.get(self.key), "new")
+        self.cache.invalidate(self.key, "new")
+        self.assertIsNone(self.cache.get(self.key))
+
+    def test_lock_per_key(self):
+        self.assertIs(self.cache.lock(self.key), self.cache.lock(self.key))
+        self.assertIsNot(self.cache.lock(self.key), self.cache.lock(("other", "user", "secret")))